@@ -0,0 +1,226 @@
+""" Benchmark each stage of the HAR conversion pipeline.
+
+A synthetic HAR file is generated, and every stage is timed and memory
+profiled separately: loading entries, the teststep builders (url, method,
+headers, data and validate) and dumping JSON/YAML testcases. Results are
+written as JSON, so runs of different commits can be compared with
+benchmarks.compare.
+
+Usage:
+    >>> python -m benchmarks.bench_pipeline --entries 10000 --body-size 4096 \
+            --output results.json
+
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+from har2case import codec, reader, writers
+from har2case.__about__ import __version__
+from har2case.core import HarParser
+
+from benchmarks import har_factory
+
+# teststep builders of HarParser, in the order _prepare_teststep calls them
+BUILDER_STAGES = [
+    ("prepare_teststep.url", "_HarParser__make_request_url"),
+    ("prepare_teststep.method", "_HarParser__make_request_method"),
+    ("prepare_teststep.headers", "_HarParser__make_request_headers"),
+    ("prepare_teststep.data", "_make_request_data"),
+    ("prepare_teststep.validate", "_make_validate")
+]
+
+
+def _new_teststep():
+    return {
+        "name": "",
+        "request": {},
+        "validate": []
+    }
+
+
+def measure(func, repeat=3):
+    """ time func repeat times, then run it once more to trace peak memory.
+        tracemalloc slows down allocations, so the traced run is not timed.
+    """
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start_at = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start_at)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": seconds,
+        "min_seconds": min(seconds),
+        "peak_memory_bytes": peak_memory
+    }
+
+
+def bench_load(har_file_path, repeat):
+    def load():
+        for _ in reader.iter_har_log_entries(har_file_path):
+            pass
+
+    return measure(load, repeat)
+
+
+def bench_builders(har_file_path, repeat):
+    parser = HarParser(har_file_path)
+    entries = list(reader.iter_har_log_entries(har_file_path))
+    results = {}
+    for stage, method_name in BUILDER_STAGES:
+        builder = getattr(parser, method_name)
+
+        def build():
+            for entry_json in entries:
+                builder(_new_teststep(), entry_json)
+
+        results[stage] = measure(build, repeat)
+        results[stage]["calls"] = len(entries)
+
+    def prepare():
+        for entry_json in entries:
+            parser._prepare_teststep(entry_json)
+
+    results["prepare_teststep"] = measure(prepare, repeat)
+    results["prepare_teststep"]["calls"] = len(entries)
+    return results
+
+
+def bench_dump(har_file_path, repeat, fmt_version):
+    parser = HarParser(har_file_path)
+    config = parser._prepare_config()
+    teststeps = list(parser._iter_teststeps())
+    results = {}
+    for file_type in ["JSON", "YAML"]:
+        def dump():
+            outfile = io.StringIO()
+            writer = writers.make_testcase_writer(file_type, outfile, fmt_version)
+            writer.write_config(config)
+            for teststep in teststeps:
+                writer.write_teststep(teststep)
+            writer.close()
+            dump.output_bytes = len(outfile.getvalue().encode("utf-8"))
+
+        stage = "dump_{}".format(file_type.lower())
+        results[stage] = measure(dump, repeat)
+        results[stage]["output_bytes"] = dump.output_bytes
+
+    return results
+
+
+def bench_gen_testcase(har_file_path, repeat, fmt_version):
+    results = {}
+    for file_type in ["JSON", "YAML"]:
+        def gen_testcase():
+            output_testcase_file = HarParser(har_file_path).gen_testcase(file_type, fmt_version)
+            os.remove(output_testcase_file)
+
+        results["gen_testcase_{}".format(file_type.lower())] = measure(gen_testcase, repeat)
+
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT
+        ).decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(entries, body_size, body_size_jitter, mime_mix, seed, indent, repeat, fmt_version):
+    """ generate HAR file and benchmark all stages, return results dict.
+    """
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        har_file_path = os.path.join(tmp_dir, "bench.har")
+        har_factory.write_har(
+            har_file_path, entries, body_size, body_size_jitter, mime_mix, seed, indent)
+
+        stages = {}
+        stages["load"] = bench_load(har_file_path, repeat)
+        stages.update(bench_builders(har_file_path, repeat))
+        stages.update(bench_dump(har_file_path, repeat, fmt_version))
+        stages.update(bench_gen_testcase(har_file_path, repeat, fmt_version))
+
+        return {
+            "har2case_version": __version__,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": codec.get_codec().name,
+            "yaml_libyaml": bool(getattr(yaml, "__with_libyaml__", False)),
+            "params": {
+                "entries": entries,
+                "body_size": body_size,
+                "body_size_jitter": body_size_jitter,
+                "mime_mix": mime_mix,
+                "seed": seed,
+                "indent": indent,
+                "repeat": repeat,
+                "fmt_version": fmt_version,
+                "har_file_bytes": os.path.getsize(har_file_path)
+            },
+            "stages": stages
+        }
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark har2case conversion pipeline.")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--body-size", type=int, default=2048)
+    parser.add_argument("--body-size-jitter", type=float, default=0.5)
+    parser.add_argument("--mime-mix", default="json=6,html=2,image=2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--indent", type=int, default=None)
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="timed runs of each stage, one more run is made to trace memory.")
+    parser.add_argument("--format", dest="fmt_version", default="v2")
+    parser.add_argument("--json-backend", default="auto")
+    parser.add_argument("--output", help="write JSON results to file instead of stdout.")
+    args = parser.parse_args()
+
+    codec.use_backend(args.json_backend)
+    results = run(
+        args.entries, args.body_size, args.body_size_jitter,
+        har_factory.parse_mime_mix(args.mime_mix), args.seed, args.indent,
+        args.repeat, args.fmt_version
+    )
+
+    results_str = json.dumps(results, indent=4, sort_keys=True)
+    if args.output:
+        with io.open(args.output, "w", encoding="utf-8") as f:
+            f.write(results_str)
+    else:
+        sys.stdout.write(results_str + "\n")
+
+
+if __name__ == "__main__":
+    main()
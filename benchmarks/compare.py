@@ -0,0 +1,73 @@
+""" Compare two benchmark results of benchmarks.bench_pipeline.
+
+Usage:
+    >>> python -m benchmarks.compare base.json head.json --threshold 0.1
+
+Exit code is 1 if any stage of head is slower than base by more than threshold.
+"""
+
+import argparse
+import io
+import json
+import sys
+
+
+def load_results(file_path):
+    with io.open(file_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(base, head, threshold=0.1):
+    """ compare stages of two results.
+
+    Returns:
+        list: (stage, base_seconds, head_seconds, time_ratio, memory_ratio, regressed)
+
+    """
+    rows = []
+    for stage in sorted(set(base["stages"]) & set(head["stages"])):
+        base_stage = base["stages"][stage]
+        head_stage = head["stages"][stage]
+        time_ratio = head_stage["min_seconds"] / base_stage["min_seconds"] \
+            if base_stage["min_seconds"] else None
+        memory_ratio = float(head_stage["peak_memory_bytes"]) / base_stage["peak_memory_bytes"] \
+            if base_stage["peak_memory_bytes"] else None
+        regressed = time_ratio is not None and time_ratio > 1 + threshold
+        rows.append((
+            stage, base_stage["min_seconds"], head_stage["min_seconds"],
+            time_ratio, memory_ratio, regressed
+        ))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare har2case benchmark results.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="relative slowdown of a stage reported as regression, default is 0.1")
+    args = parser.parse_args()
+
+    base = load_results(args.base)
+    head = load_results(args.head)
+    if base["params"] != head["params"]:
+        sys.stderr.write("warning: benchmark params differ, results are not comparable.\n")
+
+    rows = compare(base, head, args.threshold)
+    print("{:<28} {:>10} {:>10} {:>8} {:>8}".format(
+        "stage", "base(s)", "head(s)", "time", "memory"))
+    for stage, base_seconds, head_seconds, time_ratio, memory_ratio, regressed in rows:
+        print("{:<28} {:>10.4f} {:>10.4f} {:>8} {:>8}{}".format(
+            stage, base_seconds, head_seconds,
+            "{:.2f}x".format(time_ratio) if time_ratio else "-",
+            "{:.2f}x".format(memory_ratio) if memory_ratio else "-",
+            "  REGRESSED" if regressed else ""
+        ))
+
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+""" Generate synthetic HAR files for benchmarks.
+
+Usage:
+    >>> python -m benchmarks.har_factory demo.har --entries 10000 --body-size 4096 \
+            --mime-mix json=6,html=2,image=2
+
+"""
+
+import argparse
+import base64
+import io
+import json
+import random
+
+# mime type of response content, and whether its text is base64 encoded
+MIME_TYPES = {
+    "json": ("application/json; charset=utf-8", True),
+    "html": ("text/html; charset=utf-8", False),
+    "text": ("text/plain; charset=utf-8", False),
+    "image": ("image/png", True)
+}
+
+DEFAULT_MIME_MIX = {"json": 6, "html": 2, "image": 2}
+
+_HOSTS = ["httprunner.top", "api.httprunner.top", "cdn.httprunner.top", "static.example.com"]
+_PATHS = ["/api/v1/Account/Login", "/api/v1/users", "/api/v1/orders", "/static/app.js", "/home"]
+_METHODS = ["GET", "GET", "GET", "POST", "PUT"]
+
+
+def parse_mime_mix(mime_mix_str):
+    """ parse mime mix string, e.g. "json=6,html=2,image=2" => {"json": 6, "html": 2, "image": 2}
+    """
+    mime_mix = {}
+    for item in mime_mix_str.split(","):
+        name, _, weight = item.partition("=")
+        if name not in MIME_TYPES:
+            raise ValueError("unknown mime type: {}".format(name))
+        mime_mix[name] = float(weight or 1)
+
+    return mime_mix
+
+
+def _make_json_body(rand, body_size):
+    body = {
+        "IsSuccess": True,
+        "Code": 200,
+        "Message": None,
+        "Value": {"items": []}
+    }
+    items = body["Value"]["items"]
+    size = len(json.dumps(body))
+    while size < body_size:
+        item = {"id": len(items), "name": "item-{}".format(rand.random())}
+        # items are joined with ", " in dumped body
+        size += len(json.dumps(item)) + (2 if items else 0)
+        items.append(item)
+
+    return json.dumps(body)
+
+
+def _make_body(rand, mime, body_size):
+    if mime == "json":
+        return _make_json_body(rand, body_size)
+    elif mime == "image":
+        return "".join(chr(rand.randint(0, 255)) for _ in range(body_size))
+    else:
+        words = ["httprunner", "har2case", "benchmark", "<div>", "</div>", "\n"]
+        text = []
+        size = 0
+        while size < body_size:
+            word = rand.choice(words)
+            text.append(word)
+            size += len(word) + 1
+        return " ".join(text)
+
+
+def make_entry(rand, index, body_size, mime):
+    """ make one HAR entry with a response body of about body_size chars.
+    """
+    method = rand.choice(_METHODS)
+    url = "https://{}{}?page={}&ts={}".format(
+        rand.choice(_HOSTS), rand.choice(_PATHS), index % 10, index)
+    mime_type, is_base64 = MIME_TYPES[mime]
+
+    text = _make_body(rand, mime, body_size)
+    if is_base64:
+        encoding = "latin-1" if mime == "image" else "utf-8"
+        text = base64.b64encode(text.encode(encoding)).decode("ascii")
+
+    request = {
+        "method": method,
+        "url": url,
+        "httpVersion": "HTTP/1.1",
+        "cookies": [{"name": "lang", "value": "zh"}],
+        "headers": [
+            {"name": "Host", "value": url.split("/")[2]},
+            {"name": "Accept", "value": "application/json"},
+            {"name": "Content-Type", "value": "application/json; charset=utf-8"},
+            {"name": "User-Agent", "value": "iOS/10.3"},
+            {"name": "Cookie", "value": "lang=zh"},
+            {"name": "X-Request-Id", "value": str(index)}
+        ],
+        "queryString": [
+            {"name": "page", "value": str(index % 10)},
+            {"name": "ts", "value": str(index)}
+        ],
+        "headersSize": -1,
+        "bodySize": -1
+    }
+    if method in ["POST", "PUT"]:
+        request["postData"] = {
+            "mimeType": "application/json; charset=utf-8",
+            "text": json.dumps({"user": "user{}".format(index), "password": "123456"})
+        }
+
+    content = {"size": len(text), "mimeType": mime_type, "text": text}
+    if is_base64:
+        content["encoding"] = "base64"
+
+    return {
+        "startedDateTime": "2017-11-13T11:40:07.212+08:00",
+        "time": 35,
+        "request": request,
+        "response": {
+            "status": 200,
+            "statusText": "OK",
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": [
+                {"name": "Content-Type", "value": mime_type},
+                {"name": "Server", "value": "nginx"}
+            ],
+            "content": content,
+            "redirectURL": "",
+            "headersSize": -1,
+            "bodySize": len(text)
+        },
+        "cache": {},
+        "timings": {"send": 1, "wait": 30, "receive": 4}
+    }
+
+
+def write_har(har_file_path, entries_count, body_size=1024, body_size_jitter=0.5,
+              mime_mix=None, seed=0, indent=None):
+    """ write synthetic HAR file, entries are written one by one.
+
+    Args:
+        har_file_path (str): output HAR file path.
+        entries_count (int): entries count.
+        body_size (int): average response body size in chars.
+        body_size_jitter (float): body sizes vary randomly within body_size * (1 +/- jitter).
+        mime_mix (dict): relative weights of MIME_TYPES names.
+        seed (int): random seed, same arguments generate the same file.
+        indent (int): JSON indent, compact if None.
+
+    """
+    rand = random.Random(seed)
+    mime_mix = mime_mix or DEFAULT_MIME_MIX
+    mime_names = sorted(mime_mix)
+    mime_weights = [mime_mix[name] for name in mime_names]
+    total_weight = float(sum(mime_weights))
+
+    def choose_mime():
+        point = rand.random() * total_weight
+        for name, weight in zip(mime_names, mime_weights):
+            point -= weight
+            if point < 0:
+                return name
+        return mime_names[-1]
+
+    with io.open(har_file_path, "w", encoding="utf-8") as f:
+        f.write(u'{"log": {"version": "1.2", "creator": {"name": "har2case benchmarks"}, '
+                u'"entries": [')
+        for index in range(entries_count):
+            size = max(0, int(body_size * (1 + rand.uniform(-body_size_jitter, body_size_jitter))))
+            entry = make_entry(rand, index, size, choose_mime())
+            if index:
+                f.write(u",")
+            f.write(u"\n" if indent else u"")
+            f.write(json.dumps(entry, indent=indent))
+        f.write(u"]}}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic HAR file.")
+    parser.add_argument("har_file_path")
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--body-size", type=int, default=1024)
+    parser.add_argument("--body-size-jitter", type=float, default=0.5)
+    parser.add_argument("--mime-mix", default="json=6,html=2,image=2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--indent", type=int, default=None)
+    args = parser.parse_args()
+
+    write_har(
+        args.har_file_path, args.entries, args.body_size, args.body_size_jitter,
+        parse_mime_mix(args.mime_mix), args.seed, args.indent
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import sys
+
+__all__ = ["convert", "iter_teststeps"]
+
+if sys.version_info < (3, 7):
+    from har2case.api import convert, iter_teststeps
+else:
+    def __getattr__(name):
+        # the conversion API is imported on first use, so that importing
+        # submodules, e.g. har2case.cli for har2case -V, stays cheap
+        if name in __all__:
+            from har2case import api
+            return getattr(api, name)
+
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    def __dir__():
+        return sorted(list(globals()) + __all__)
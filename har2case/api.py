@@ -0,0 +1,101 @@
+""" Library API, converting HAR sources without files on disk.
+
+Services embedding har2case convert HARs uploaded over HTTP, where writing
+temporary files and reading testcases back is wasted work. A HAR source is a
+file path, HAR content as bytes, a binary file object, a HAR document dict or
+an iterable of log entries. The output sink is a file path, a text or binary
+file object, a testcase writer, or None to get the testcase structure back.
+
+Usage:
+    >>> testcase = convert(har_content, fmt_version="v2", filter_str="httprunner.top")
+    >>> convert(har_content, io.BytesIO(), file_type="YAML")
+    >>> for teststep in iter_teststeps(entries, dedup=True):
+    ...     print(teststep["name"])
+
+"""
+
+import io
+import os
+
+from har2case import writers
+from har2case.core import HarParser
+from har2case.exceptions import ParamsError
+from har2case.reader import is_file_path
+
+
+def _make_har_parser(source, options):
+    if options.get("incremental"):
+        raise ParamsError(
+            "incremental conversion is only supported by HarParser.gen_testcase.")
+
+    return HarParser(source, **options)
+
+
+def iter_teststeps(source, **options):
+    """ convert HAR source, and make teststeps one by one.
+
+    Args:
+        source: HAR file path, HAR content as bytes, binary file object, HAR
+            document dict, or iterable of log entries.
+        options: HarParser arguments, e.g. filter_str or dedup.
+
+    Returns:
+        iterator: teststeps, without v1 "test" wrappers.
+
+    """
+    return _make_har_parser(source, options).iter_teststeps()
+
+
+def _write_testcase_file(har_parser, outfile, file_type, fmt_version):
+    if not isinstance(outfile, (io.RawIOBase, io.BufferedIOBase)):
+        har_parser.write_testcase(writers.make_testcase_writer(file_type, outfile, fmt_version))
+        return
+
+    # binary file object, encoded to UTF-8 and left open
+    text_file = io.TextIOWrapper(outfile, encoding="utf-8")
+    try:
+        har_parser.write_testcase(writers.make_testcase_writer(file_type, text_file, fmt_version))
+        text_file.flush()
+    finally:
+        text_file.detach()
+
+
+def convert(source, output=None, file_type="JSON", fmt_version="v1", **options):
+    """ convert HAR source to testcase, and write it to output sink.
+
+    Args:
+        source: HAR file path, HAR content as bytes, binary file object, HAR
+            document dict, or iterable of log entries.
+        output: None to return testcase structure, testcase file path, text or
+            binary file object opened for writing, or writers.TestcaseWriter.
+        file_type (str): JSON or YAML, format of testcase files and file objects.
+        fmt_version (str): testcase format version, v1 or v2.
+        options: HarParser arguments, e.g. filter_str or dedup.
+
+    Returns:
+        testcase structure if output is None, otherwise output.
+
+    Raises:
+        exceptions.FileFormatError: HAR content error.
+        exceptions.ParamsError: invalid source or options.
+
+    """
+    har_parser = _make_har_parser(source, options)
+    if output is None:
+        return har_parser.make_testcase(fmt_version)
+
+    if isinstance(output, writers.TestcaseWriter):
+        har_parser.write_testcase(output)
+    elif is_file_path(output):
+        try:
+            with io.open(output, "w", encoding="utf-8") as outfile:
+                _write_testcase_file(har_parser, outfile, file_type, fmt_version)
+        except Exception:
+            # do not leave incomplete testcase behind
+            if os.path.isfile(output):
+                os.remove(output)
+            raise
+    else:
+        _write_testcase_file(har_parser, output, file_type, fmt_version)
+
+    return output
@@ -0,0 +1,172 @@
+""" Convert many HAR files in parallel.
+
+Usage:
+    # convert all HAR files in directories and glob patterns with 8 workers
+    >>> har2case captures/ "archive/2019-*/*.har" -j 8
+
+"""
+
+import glob
+import logging
+import multiprocessing
+import os
+import re
+import time
+
+from har2case import codec
+from har2case.compression import is_har_file
+from har2case.core import HarParser
+
+# wildcards of glob patterns
+_GLOB_MAGIC_RE = re.compile("[*?[]")
+
+
+def collect_har_files(sources):
+    """ expand HAR sources to HAR file paths.
+
+    Args:
+        sources (list): HAR file paths, directories or glob patterns.
+            directories are searched recursively for .har files, and compressed
+            .har.gz, .har.bz2, .har.xz and .har.zst files.
+
+    Returns:
+        list: HAR file paths, in order of sources and without duplicates.
+
+    """
+    har_files = []
+    seen = set()
+
+    def add(path):
+        if path not in seen:
+            seen.add(path)
+            har_files.append(path)
+
+    for source in sources:
+        if os.path.isdir(source):
+            for dirpath, dirnames, filenames in os.walk(source):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if is_har_file(filename):
+                        add(os.path.join(dirpath, filename))
+
+        elif _GLOB_MAGIC_RE.search(source):
+            for path in sorted(glob.glob(source)):
+                if os.path.isfile(path):
+                    add(path)
+
+        else:
+            add(source)
+
+    return har_files
+
+
+def convert_har_file(har_file_path, file_type="JSON", fmt_version="v1",
+                     filter_str=None, exclude_str=None, max_body_size=None,
+                     oversize_body="scan", cache_dir=None, cache_size=None,
+                     incremental=False, dedup=False, header_filter=None, use_mmap=False,
+                     correlate=False):
+    """ convert one HAR file, errors are returned instead of raised.
+
+    Returns:
+        tuple: (har_file_path, output_testcase_file, error), output_testcase_file
+            is None on failure and error is None on success.
+
+    """
+    try:
+        output_testcase_file = HarParser(
+            har_file_path, filter_str, exclude_str,
+            max_body_size=max_body_size, oversize_body=oversize_body,
+            cache_dir=cache_dir, cache_size=cache_size,
+            incremental=incremental, dedup=dedup, header_filter=header_filter,
+            use_mmap=use_mmap, correlate=correlate
+        ).gen_testcase(file_type, fmt_version)
+        return har_file_path, output_testcase_file, None
+    except Exception as ex:
+        return har_file_path, None, "{}: {}".format(type(ex).__name__, ex)
+
+
+def _convert_har_file_star(args):
+    return convert_har_file(*args)
+
+
+def _init_worker(log_level, json_backend):
+    logging.basicConfig(level=log_level)
+    codec.use_backend(json_backend)
+
+
+def iter_convert_har_files(har_files, workers=None, file_type="JSON", fmt_version="v1",
+                           filter_str=None, exclude_str=None, max_body_size=None,
+                           oversize_body="scan", cache_dir=None, cache_size=None,
+                           incremental=False, dedup=False, header_filter=None,
+                           use_mmap=False, correlate=False):
+    """ convert HAR files with a pool of worker processes.
+
+    Args:
+        har_files (list): HAR file paths.
+        workers (int): worker processes count, defaults to CPU count.
+            HAR files are converted in current process if workers is 1.
+
+    Yields:
+        tuple: (har_file_path, output_testcase_file, error) in order of completion.
+
+    """
+    tasks = [
+        (har_file_path, file_type, fmt_version, filter_str, exclude_str,
+         max_body_size, oversize_body, cache_dir, cache_size, incremental, dedup,
+         header_filter, use_mmap, correlate)
+        for har_file_path in har_files
+    ]
+    workers = min(workers or multiprocessing.cpu_count(), len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            yield _convert_har_file_star(task)
+        return
+
+    pool = multiprocessing.Pool(
+        workers,
+        initializer=_init_worker,
+        initargs=(logging.getLogger().getEffectiveLevel(), codec.get_codec().name)
+    )
+    try:
+        for result in pool.imap_unordered(_convert_har_file_star, tasks):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def run_batch(sources, workers=None, file_type="JSON", fmt_version="v1",
+              filter_str=None, exclude_str=None, max_body_size=None, oversize_body="scan",
+              cache_dir=None, cache_size=None, incremental=False, dedup=False,
+              header_filter=None, use_mmap=False, correlate=False):
+    """ convert HAR files in sources, log status of each file and a final summary.
+
+    Returns:
+        int: failed HAR files count.
+
+    """
+    har_files = collect_har_files(sources)
+    logging.info("Start to convert {} HAR files.".format(len(har_files)))
+
+    start_at = time.time()
+    failures = []
+    results = iter_convert_har_files(
+        har_files, workers, file_type, fmt_version, filter_str, exclude_str,
+        max_body_size, oversize_body, cache_dir, cache_size, incremental, dedup,
+        header_filter, use_mmap, correlate)
+    for index, (har_file_path, output_testcase_file, error) in enumerate(results, 1):
+        if error:
+            failures.append(har_file_path)
+            logging.error("[{}/{}] FAILED {}: {}".format(
+                index, len(har_files), har_file_path, error))
+        else:
+            logging.info("[{}/{}] OK {} -> {}".format(
+                index, len(har_files), har_file_path, output_testcase_file))
+
+    logging.info("Converted {} of {} HAR files in {:.2f} seconds, {} failed.".format(
+        len(har_files) - len(failures), len(har_files), time.time() - start_at, len(failures)))
+    for har_file_path in failures:
+        logging.error("failed: {}".format(har_file_path))
+
+    return len(failures)
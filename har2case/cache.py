@@ -0,0 +1,167 @@
+""" On-disk cache of teststeps, keyed by digest of HAR entries.
+
+Teststeps made from HAR entries are stored in a SQLite database in cache
+directory, so entries already converted in previous runs are not parsed again.
+Keys are digests of entry request and response, without ignored request
+headers and fields not used in teststeps, such as timings. Keys are namespaced
+by har2case version, ignored request headers and conversion options, so any
+change of them invalidates cached teststeps. The database size is bounded,
+least recently used teststeps are evicted.
+
+Usage:
+    >>> with TeststepCache(".har2case_cache", IGNORE_REQUEST_HEADERS) as cache:
+    ...     key = cache.make_key(entry_json)
+    ...     teststep = cache.get(key)
+    ...     if teststep is None:
+    ...         teststep = make_teststep(entry_json)
+    ...         cache.put(key, teststep)
+
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from har2case import codec
+from har2case.__about__ import __version__
+from har2case.headers import fold
+from har2case.mapped import decode_entry_texts
+
+CACHE_FILE_NAME = "teststeps.sqlite3"
+
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+# evict down to this ratio of cache size, so that eviction does not run every time
+_EVICT_RATIO = 0.8
+
+
+class TeststepCache(object):
+    """ size bounded LRU cache of teststeps in SQLite database.
+
+    Args:
+        cache_dir (str): directory of database file, created if missing.
+        ignore_request_headers (list): case folded request header names not used
+            in teststeps.
+        options (dict): conversion options which change teststeps.
+        max_size (int): max size of cached teststeps in bytes.
+
+    """
+
+    def __init__(self, cache_dir, ignore_request_headers, options=None,
+                 max_size=DEFAULT_CACHE_SIZE):
+        self.ignore_request_headers = frozenset(ignore_request_headers)
+        self.max_size = max_size
+        # canonical JSON of entries may differ between JSON backends
+        self.namespace = json.dumps(
+            [__version__, codec.get_codec().name, sorted(self.ignore_request_headers),
+             options or {}],
+            sort_keys=True
+        ).encode("utf-8")
+
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        # autocommit, so that the write lock is not held between puts and
+        # processes sharing the cache directory do not wait for each other
+        self.conn = sqlite3.connect(
+            os.path.join(cache_dir, CACHE_FILE_NAME), timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS teststeps ("
+            "key TEXT PRIMARY KEY, teststep TEXT NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS teststeps_accessed ON teststeps (accessed)")
+
+        self.hit_keys = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def make_key(self, entry_json):
+        """ make digest of entry request and response, ignored request headers
+            are excluded. Lazy texts of mapped entries are digested decoded.
+        """
+        entry_json = decode_entry_texts(entry_json)
+        request = entry_json.get("request") or {}
+        headers = request.get("headers")
+        if headers:
+            request = dict(request)
+            request["headers"] = [
+                header
+                for header in headers
+                if fold(header.get("name", "")) not in self.ignore_request_headers
+            ]
+
+        canonical_entry = codec.dumps_canonical([request, entry_json.get("response")])
+        return hashlib.sha1(self.namespace + canonical_entry).hexdigest()
+
+    def get(self, key):
+        """ get cached teststep, None if missing.
+        """
+        row = self.conn.execute(
+            "SELECT teststep FROM teststeps WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self.hit_keys.append(key)
+        return codec.loads(row[0])
+
+    def put(self, key, teststep):
+        teststep_str = codec.dumps(teststep)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO teststeps (key, teststep, size, accessed) "
+            "VALUES (?, ?, ?, ?)",
+            (key, teststep_str, len(teststep_str), time.time())
+        )
+
+    def evict(self):
+        """ delete least recently used teststeps if cache size exceeds max_size.
+        """
+        total_size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM teststeps"
+        ).fetchone()[0]
+        if total_size <= self.max_size:
+            return
+
+        evict_size = total_size - self.max_size * _EVICT_RATIO
+        evict_keys = []
+        for key, size in self.conn.execute(
+                "SELECT key, size FROM teststeps ORDER BY accessed"):
+            evict_keys.append((key,))
+            evict_size -= size
+            if evict_size <= 0:
+                break
+
+        self.conn.executemany("DELETE FROM teststeps WHERE key = ?", evict_keys)
+
+    def close(self):
+        """ record access time of hit teststeps and evict in one transaction.
+        """
+        if self.conn is None:
+            return
+
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "UPDATE teststeps SET accessed = ? WHERE key = ?",
+                ((now, key) for key in self.hit_keys)
+            )
+            self.evict()
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        else:
+            self.conn.execute("COMMIT")
+        finally:
+            self.conn.close()
+            self.conn = None
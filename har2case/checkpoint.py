@@ -0,0 +1,136 @@
+""" Checkpoints of incremental conversion.
+
+A checkpoint is saved next to the testcase after each incremental conversion.
+It records how far the HAR file was read, a digest of the HAR content read so
+far, and where the testcase ends before its closing tail. If the HAR file only
+has entries appended since then, the next conversion reads the new entries
+only, and appends their teststeps to the testcase. Otherwise the testcase is
+rebuilt from scratch.
+
+Usage:
+    >>> last_checkpoint = Checkpoint.load("demo.json" + CHECKPOINT_SUFFIX)
+    >>> har_sha1 = last_checkpoint.verify("demo.har", "demo.json", options)
+    >>> if har_sha1 is None:
+    ...     # HAR file prefix, testcase or options changed, rebuild testcase
+
+"""
+
+import hashlib
+import io
+import json
+import os
+
+from har2case.__about__ import __version__
+from har2case.compat import bytes
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path, end, start=0, sha1=None):
+    """ update sha1 with file content in [start, end) bytes range.
+
+    Args:
+        file_path (str): file path.
+        end (int): end offset of content.
+        start (int): start offset of content.
+        sha1: hashlib sha1 object to update, a new one if None.
+
+    Returns:
+        sha1 object, or None if the file is shorter than end.
+
+    """
+    sha1 = sha1 or hashlib.sha1()
+    with io.open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(remaining, _HASH_BLOCK_SIZE))
+            if not block:
+                return None
+            sha1.update(block)
+            remaining -= len(block)
+
+    return sha1
+
+
+class Checkpoint(object):
+    """ progress of HAR file conversion.
+
+    Args:
+        options (dict): conversion options, a checkpoint is only used with the same
+            options.
+        entries_count (int): HAR log entries read, including filtered ones.
+        teststeps_count (int): teststeps written to testcase.
+        har_offset (int): byte offset in HAR file right after the last entry read.
+        har_sha1 (str): sha1 hex digest of HAR file content before har_offset.
+        output_body_size (int): testcase size in bytes before its closing tail.
+        output_size (int): testcase size in bytes.
+
+    """
+
+    FIELDS = [
+        "options", "entries_count", "teststeps_count", "har_offset", "har_sha1",
+        "output_body_size", "output_size"
+    ]
+
+    def __init__(self, options, entries_count, teststeps_count, har_offset, har_sha1,
+                 output_body_size, output_size):
+        self.options = options
+        self.entries_count = entries_count
+        self.teststeps_count = teststeps_count
+        self.har_offset = har_offset
+        self.har_sha1 = har_sha1
+        self.output_body_size = output_body_size
+        self.output_size = output_size
+
+    @classmethod
+    def load(cls, file_path):
+        """ load checkpoint file, None if it is missing, invalid or saved by
+            another har2case version.
+        """
+        try:
+            with io.open(file_path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content.get("har2case_version") != __version__:
+                return None
+            return cls(**dict((field, content[field]) for field in cls.FIELDS))
+        except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def save(self, file_path):
+        content = dict((field, getattr(self, field)) for field in self.FIELDS)
+        content["har2case_version"] = __version__
+        json_str = json.dumps(content, indent=4, sort_keys=True)
+        if isinstance(json_str, bytes):
+            json_str = json_str.decode("utf-8")
+
+        with io.open(file_path, "w", encoding="utf-8") as f:
+            f.write(json_str)
+
+    def verify(self, har_file_path, output_file_path, options):
+        """ check whether conversion can resume from checkpoint.
+
+        Args:
+            har_file_path (str): HAR file path.
+            output_file_path (str): testcase file path.
+            options (dict): conversion options of this run.
+
+        Returns:
+            sha1 object of HAR file content before har_offset, to be updated with
+            content read afterwards, or None if conversion cannot resume.
+
+        """
+        if options != self.options:
+            return None
+
+        if not os.path.isfile(output_file_path) \
+                or os.path.getsize(output_file_path) != self.output_size:
+            return None
+
+        sha1 = hash_file(har_file_path, self.har_offset)
+        if sha1 is None or sha1.hexdigest() != self.har_sha1:
+            return None
+
+        return sha1
@@ -7,14 +7,37 @@ Usage:
     # convert to YAML format testcase
     >>> har2case demo.har -2y
 
+    # convert compressed HAR file
+    >>> har2case demo.har.gz
+
+    # convert HAR files in directories and glob patterns with 4 worker processes
+    >>> har2case captures/ "archive/*.har" -j 4
+
+    # keep converting HAR files dropped into spool directory
+    >>> har2case watch spool/
+
+    # merge HAR files into one testsuite, with common leading teststeps hoisted
+    >>> har2case merge captures/ --suite-dir suite/
+
+    # serve conversion of HAR content posted to http://127.0.0.1:8000/convert
+    >>> har2case serve --port 8000
+
 """
 
 import argparse
 import logging
+import os
+import re
 import sys
 
+from har2case import codec
 from har2case.__about__ import __description__, __version__
-from har2case.core import HarParser
+from har2case.compression import is_har_file
+from har2case.exceptions import MyBaseError
+from har2case.headers import load_header_filter
+
+# wildcards of glob patterns
+_GLOB_MAGIC_RE = re.compile("[*?[]")
 
 
 def main():
@@ -27,8 +50,11 @@ def main():
     parser.add_argument(
         '--log-level', default='INFO',
         help="Specify logging level, default is INFO.")
-    parser.add_argument('har_source_file', nargs='?',
-        help="Specify HAR source file")
+    parser.add_argument('har_source_file', nargs='*',
+        help="Specify HAR source file, multiple files, directories or glob patterns "
+             "can be specified for batch conversion. 'watch <dir>' keeps converting "
+             "HAR files dropped into directory, 'merge <sources>' converts HAR files "
+             "into one testsuite, and 'serve' runs a conversion HTTP server.")
     parser.add_argument(
         '-2y', '--to-yml', '--to-yaml',
         dest='to_yaml', action='store_true',
@@ -38,10 +64,109 @@ def main():
         dest='fmt_version', default='v1',
         help="Specify YAML/JSON testcase format version, v2 corresponds to HttpRunner 2.2.0+.")
     parser.add_argument(
-        '--filter', help="Specify filter keyword, only url include filter string will be converted.")
+        '--filter',
+        help="Specify filter rules, only url include filter string will be converted, "
+             "multiple rules can be joined with '|'. Rules can be scoped with host:, path:, "
+             "method:, status:, mime: prefixes, and re: prefix matches a regex.")
     parser.add_argument(
         '--exclude',
-        help="Specify exclude keyword, url that includes exclude string will be ignored, multiple keywords can be joined with '|'")
+        help="Specify exclude rules, url that includes exclude string will be ignored, "
+             "multiple rules can be joined with '|'. Rules support the same prefixes as --filter.")
+    parser.add_argument(
+        '--allow-header', action='append', default=[], metavar='NAME',
+        help="Keep request header in teststeps even if it is ignored by default, e.g. "
+             "Cookie, can be specified multiple times.")
+    parser.add_argument(
+        '--deny-header', action='append', default=[], metavar='NAME',
+        help="Ignore request header in teststeps, can be specified multiple times.")
+    parser.add_argument(
+        '--headers-config',
+        help="Specify JSON/YAML file with allow and deny lists of request headers.")
+
+    parser.add_argument(
+        '-j', '--workers', type=int, default=None,
+        help="Specify worker processes count for batch conversion, default is CPU count.")
+    parser.add_argument(
+        '--entry-workers', type=int, default=1,
+        help="Specify worker processes count to convert entries of one HAR file in parallel, "
+             "default is 1.")
+
+    parser.add_argument(
+        '--max-body-size', type=int, default=None,
+        help="Specify max response body size in bytes to load as a whole for validators, "
+             "default is no limit.")
+    parser.add_argument(
+        '--oversize-body', default='scan', choices=['scan', 'skip'],
+        help="Specify how to make validators of bodies larger than --max-body-size, scan "
+             "top level keys with a streaming scanner, or skip them. Default is scan.")
+
+    parser.add_argument(
+        '--cache-dir',
+        help="Specify directory to cache converted teststeps in, entries converted before "
+             "are loaded from cache instead of parsed again.")
+    parser.add_argument(
+        '--cache-size', type=int, default=256,
+        help="Specify max size of teststeps cache in MB, default is 256.")
+
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="Only convert entries appended to HAR file since the last incremental "
+             "conversion, and append their teststeps to the existing testcase.")
+
+    parser.add_argument(
+        '--dedup', action='store_true',
+        help="Drop duplicate requests, only validators shared by all duplicates are "
+             "kept.")
+
+    parser.add_argument(
+        '--correlate', action='store_true',
+        help="Replace values of responses sent back in later requests, e.g. tokens and "
+             "IDs, with variables extracted from responses. Not supported in merge mode.")
+
+    parser.add_argument(
+        '--mmap', action='store_true', dest='use_mmap',
+        help="Load HAR file from its memory mapping, large bodies are decoded only if "
+             "teststeps need them. Faster for captures with large bodies, but all "
+             "entries are held in memory.")
+
+    parser.add_argument(
+        '--settle-time', type=float, default=2.0,
+        help="Specify seconds a HAR file must stay unchanged before it is converted in "
+             "watch mode, default is 2.")
+    parser.add_argument(
+        '--poll', action='store_true',
+        help="Poll directory for changes in watch mode, instead of inotify.")
+
+    parser.add_argument(
+        '--suite-dir', default='testsuite',
+        help="Specify directory to write testsuite and testcases to in merge mode, "
+             "default is testsuite.")
+    parser.add_argument(
+        '--max-prefix-steps', type=int, default=50,
+        help="Specify max leading teststeps common to all HAR files hoisted into a "
+             "common testcase in merge mode, default is 50.")
+
+    parser.add_argument(
+        '--host', default='127.0.0.1',
+        help="Specify address to listen on in serve mode, default is 127.0.0.1.")
+    parser.add_argument(
+        '--port', type=int, default=8000,
+        help="Specify port to listen on in serve mode, default is 8000.")
+    parser.add_argument(
+        '--timeout', type=float, default=60,
+        help="Specify seconds a conversion may take in serve mode, default is 60.")
+    parser.add_argument(
+        '--max-upload-size', type=int, default=256,
+        help="Specify max size of HAR content posted in serve mode in MB, default is 256.")
+
+    parser.add_argument(
+        '--profile', action='store_true',
+        help="Print time and counters of each conversion step after conversion of a "
+             "single HAR file.")
+
+    parser.add_argument(
+        '--json-backend', default='auto', choices=['auto'] + codec.JSON_BACKENDS,
+        help="Specify JSON library to load and dump with, default is the fastest installed.")
 
     args = parser.parse_args()
 
@@ -52,14 +177,115 @@ def main():
     log_level = getattr(logging, args.log_level.upper())
     logging.basicConfig(level=log_level)
 
-    har_source_file = args.har_source_file
-    if not har_source_file or not har_source_file.endswith(".har"):
-        logging.error("HAR file not specified.")
+    try:
+        json_backend = codec.use_backend(args.json_backend)
+    except ImportError as ex:
+        logging.error("JSON backend {} is not installed: {}".format(args.json_backend, ex))
         sys.exit(1)
 
+    logging.debug("JSON backend: {}".format(json_backend))
+
     output_file_type = "YML" if args.to_yaml else "JSON"
-    HarParser(
-        har_source_file, args.filter, args.exclude
-    ).gen_testcase(output_file_type, args.fmt_version.lower())
+    fmt_version = args.fmt_version.lower()
+
+    cache_size = args.cache_size * 1024 * 1024
+    try:
+        header_filter = load_header_filter(
+            args.headers_config, args.allow_header, args.deny_header)
+    except (IOError, OSError, MyBaseError) as ex:
+        logging.error(ex)
+        sys.exit(1)
+
+    har_sources = args.har_source_file
+    if har_sources[:1] == ["watch"]:
+        if len(har_sources) != 2 or not os.path.isdir(har_sources[1]):
+            logging.error("watch directory not specified.")
+            sys.exit(1)
+
+        # commands import only what they run, to keep startup cheap
+        from har2case.watch import watch
+        watch(
+            har_sources[1], args.workers, output_file_type, fmt_version,
+            args.filter, args.exclude, args.max_body_size, args.oversize_body,
+            args.cache_dir, cache_size, args.incremental, args.dedup, header_filter,
+            args.use_mmap, args.correlate, args.settle_time,
+            False if args.poll else None
+        )
+        return 0
+
+    if har_sources[:1] == ["merge"]:
+        from har2case.batch import collect_har_files
+        from har2case.merge import merge_har_files
+        har_files = collect_har_files(har_sources[1:])
+        if not har_files:
+            logging.error("HAR files to merge not specified.")
+            sys.exit(1)
+        if args.correlate:
+            logging.error("--correlate is not supported in merge mode.")
+            sys.exit(1)
+
+        _, failures = merge_har_files(
+            har_files, args.suite_dir, output_file_type, fmt_version,
+            args.max_prefix_steps,
+            filter_str=args.filter, exclude_str=args.exclude, workers=args.entry_workers,
+            max_body_size=args.max_body_size, oversize_body=args.oversize_body,
+            cache_dir=args.cache_dir, cache_size=cache_size, dedup=args.dedup,
+            header_filter=header_filter, use_mmap=args.use_mmap
+        )
+        return 1 if failures else 0
+
+    if har_sources == ["serve"]:
+        # asyncio service is only imported when serving
+        from har2case.service import serve
+        serve(
+            args.host, args.port, args.workers, timeout=args.timeout,
+            max_upload_size=args.max_upload_size * 1024 * 1024,
+            options={
+                "filter_str": args.filter,
+                "exclude_str": args.exclude,
+                "max_body_size": args.max_body_size,
+                "oversize_body": args.oversize_body,
+                "dedup": args.dedup,
+                "correlate": args.correlate,
+                "header_filter": header_filter
+            }
+        )
+        return 0
+
+    if len(har_sources) > 1 or (har_sources and (
+            os.path.isdir(har_sources[0]) or _GLOB_MAGIC_RE.search(har_sources[0]))):
+        # HAR files are converted in pool worker processes, which can not have
+        # entry worker processes of their own
+        if args.profile or args.entry_workers != 1:
+            logging.warning(
+                "--profile and --entry-workers are ignored when converting several HAR files.")
+
+        from har2case.batch import run_batch
+        failures = run_batch(
+            har_sources, args.workers, output_file_type, fmt_version,
+            args.filter, args.exclude, args.max_body_size, args.oversize_body,
+            args.cache_dir, cache_size, args.incremental, args.dedup, header_filter,
+            args.use_mmap, args.correlate
+        )
+        return 1 if failures else 0
+
+    if not har_sources or not is_har_file(har_sources[0]):
+        logging.error("HAR file not specified.")
+        sys.exit(1)
+
+    from har2case.core import HarParser
+    har_parser = HarParser(
+        har_sources[0], args.filter, args.exclude, args.entry_workers, args.profile,
+        args.max_body_size, args.oversize_body, args.cache_dir, cache_size,
+        args.incremental, args.dedup, header_filter, args.use_mmap, args.correlate
+    )
+    try:
+        har_parser.gen_testcase(output_file_type, fmt_version)
+    except MyBaseError as ex:
+        logging.error(ex)
+        sys.exit(1)
+
+    if args.profile:
+        sys.stderr.write(har_parser.stats.report() + "\n")
 
     return 0
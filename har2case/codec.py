@@ -0,0 +1,292 @@
+""" Pluggable JSON codec.
+
+The fastest JSON library installed is picked automatically, in the order of
+JSON_BACKENDS, and can be forced with use_backend() or the --json-backend
+command line option. All backends produce the same documents as the standard
+library json module: values that a fast backend can not handle (e.g. NaN or
+huge integers) are loaded or dumped with the standard library instead.
+
+Usage:
+    >>> from har2case import codec
+    >>> codec.use_backend("orjson")
+    >>> codec.loads('{"a": 1}')
+    {'a': 1}
+
+"""
+
+import json
+import math
+import re
+import sys
+
+from har2case.compat import bytes, ensure_ascii
+
+JSON_BACKENDS = ["orjson", "rapidjson", "ujson", "simplejson", "json"]
+
+# decode errors of all backends are subclasses of ValueError
+JSONDecodeError = ValueError
+
+_INDENT_RE = re.compile(r"^( +)", re.M)
+
+# json.loads only accepts str on Python 3.4 and 3.5
+_JSON_LOADS_BYTES = not (3, 0) <= sys.version_info[:2] < (3, 6)
+
+
+def _double_indent(match):
+    return match.group(1) * 2
+
+
+def _json_loads(s):
+    """ deserialize JSON str or bytes with standard library, bytes are decoded
+        as utf-8 if json.loads does not accept them.
+    """
+    if not _JSON_LOADS_BYTES and isinstance(s, (bytes, bytearray)):
+        s = s.decode("utf-8")
+
+    return json.loads(s)
+
+
+def _has_non_finite_float(obj):
+    """ whether obj has NaN or Infinity floats, which orjson dumps as null.
+    """
+    if isinstance(obj, float):
+        return math.isnan(obj) or math.isinf(obj)
+    elif isinstance(obj, dict):
+        return any(_has_non_finite_float(value) for value in obj.values())
+    elif isinstance(obj, (list, tuple)):
+        return any(_has_non_finite_float(item) for item in obj)
+
+    return False
+
+
+class JSONCodec(object):
+    """ standard library json codec, base class of other backends.
+    """
+
+    name = "json"
+
+    def loads(self, s):
+        return _json_loads(s)
+
+    def loads_buffer(self, buffer):
+        """ deserialize JSON bytes-like object, e.g. a memoryview of a mapped file,
+            which is copied to bytes unless the backend reads buffers directly, and
+            decoded to str if the backend does not read bytes.
+        """
+        return self.loads(bytes(buffer))
+
+    def dumps(self, obj, indent=None):
+        json_str = json.dumps(obj, ensure_ascii=ensure_ascii, indent=indent)
+        if isinstance(json_str, bytes):
+            json_str = json_str.decode("utf-8")
+
+        return json_str
+
+    def dumps_canonical(self, obj):
+        """ serialize obj to compact JSON bytes with sorted keys, equal objects are
+            serialized to equal bytes by the same backend.
+        """
+        return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class _FallbackJSONCodec(JSONCodec):
+    """ fast backend which falls back to standard library on any error.
+    """
+
+    def _loads(self, s):
+        raise NotImplementedError
+
+    def _dumps(self, obj, indent):
+        raise NotImplementedError
+
+    def _dumps_canonical(self, obj):
+        return JSONCodec.dumps_canonical(self, obj)
+
+    def loads(self, s):
+        try:
+            return self._loads(s)
+        except (ValueError, OverflowError):
+            # let standard library decide, and raise its errors
+            return _json_loads(s)
+
+    def dumps(self, obj, indent=None):
+        try:
+            return self._dumps(obj, indent)
+        except (TypeError, ValueError, OverflowError):
+            return JSONCodec.dumps(self, obj, indent)
+
+    def dumps_canonical(self, obj):
+        try:
+            return self._dumps_canonical(obj)
+        except (TypeError, ValueError, OverflowError):
+            return JSONCodec.dumps_canonical(self, obj)
+
+
+class OrjsonCodec(_FallbackJSONCodec):
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self.orjson = orjson
+
+    def _loads(self, s):
+        return self.orjson.loads(s)
+
+    def loads_buffer(self, buffer):
+        try:
+            return self.orjson.loads(buffer)
+        except (ValueError, OverflowError):
+            return _json_loads(bytes(buffer))
+
+    def _dumps(self, obj, indent):
+        if indent != 4 or ensure_ascii:
+            return JSONCodec.dumps(self, obj, indent)
+
+        json_bytes = self._dumps_finite(
+            obj, self.orjson.OPT_INDENT_2 | self.orjson.OPT_NON_STR_KEYS)
+        json_str = json_bytes.decode("utf-8")
+
+        # orjson only supports indent of 2 spaces, strings never contain raw
+        # line breaks so leading spaces are always indentation.
+        return _INDENT_RE.sub(_double_indent, json_str)
+
+    def _dumps_canonical(self, obj):
+        return self._dumps_finite(obj, self.orjson.OPT_SORT_KEYS)
+
+    def _dumps_finite(self, obj, option):
+        """ dump obj with orjson, ValueError is raised if it has NaN or Infinity,
+            which orjson dumps as null while standard library dumps as is.
+        """
+        json_bytes = self.orjson.dumps(obj, option=option)
+        # obj is only scanned if orjson might have dumped such floats
+        if b"null" in json_bytes and _has_non_finite_float(obj):
+            raise ValueError("orjson does not support NaN and Infinity.")
+
+        return json_bytes
+
+
+class RapidjsonCodec(_FallbackJSONCodec):
+
+    name = "rapidjson"
+
+    def __init__(self):
+        import rapidjson
+        self.rapidjson = rapidjson
+
+    def _loads(self, s):
+        return self.rapidjson.loads(s)
+
+    def _dumps(self, obj, indent):
+        return self.rapidjson.dumps(obj, ensure_ascii=ensure_ascii, indent=indent)
+
+
+class UjsonCodec(_FallbackJSONCodec):
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+        self.ujson = ujson
+
+    def _loads(self, s):
+        return self.ujson.loads(s)
+
+    def _dumps(self, obj, indent):
+        return self.ujson.dumps(
+            obj, ensure_ascii=ensure_ascii, indent=indent or 0,
+            escape_forward_slashes=False
+        )
+
+
+class SimplejsonCodec(JSONCodec):
+
+    name = "simplejson"
+
+    def __init__(self):
+        import simplejson
+        self.simplejson = simplejson
+
+    def loads(self, s):
+        return self.simplejson.loads(s)
+
+    def dumps(self, obj, indent=None):
+        json_str = self.simplejson.dumps(obj, ensure_ascii=ensure_ascii, indent=indent)
+        if isinstance(json_str, bytes):
+            json_str = json_str.decode("utf-8")
+
+        return json_str
+
+
+_CODEC_CLASSES = {
+    "orjson": OrjsonCodec,
+    "rapidjson": RapidjsonCodec,
+    "ujson": UjsonCodec,
+    "simplejson": SimplejsonCodec,
+    "json": JSONCodec
+}
+
+_codec = None
+
+
+def make_codec(name=None):
+    """ make JSON codec of backend name, pick the fastest installed backend if name is
+        None or "auto".
+
+    Raises:
+        ImportError: backend is not installed.
+        ValueError: unknown backend name.
+
+    """
+    if name and name != "auto":
+        if name not in _CODEC_CLASSES:
+            raise ValueError("unknown JSON backend: {}".format(name))
+
+        return _CODEC_CLASSES[name]()
+
+    for name in JSON_BACKENDS:
+        try:
+            return _CODEC_CLASSES[name]()
+        except ImportError:
+            continue
+
+
+def use_backend(name=None):
+    """ set JSON backend used by har2case, return its name.
+    """
+    global _codec
+    _codec = make_codec(name)
+    return _codec.name
+
+
+def get_codec():
+    if _codec is None:
+        use_backend()
+
+    return _codec
+
+
+def loads(s):
+    """ deserialize JSON str or bytes with current backend.
+    """
+    return get_codec().loads(s)
+
+
+def loads_buffer(buffer):
+    """ deserialize JSON bytes-like object with current backend, without copying
+        it if possible.
+    """
+    return get_codec().loads_buffer(buffer)
+
+
+def dumps(obj, indent=None):
+    """ serialize obj to JSON str with current backend, ensure_ascii is the same as
+        compat.ensure_ascii.
+    """
+    return get_codec().dumps(obj, indent)
+
+
+def dumps_canonical(obj):
+    """ serialize obj to compact JSON bytes with sorted keys with current backend.
+    """
+    return get_codec().dumps_canonical(obj)
@@ -0,0 +1,198 @@
+""" Compressed HAR files.
+
+HAR files compressed with gzip, bzip2, xz or zstd (.har.gz, .har.bz2,
+.har.xz, .har.zst) are decompressed while they are read, without temporary
+files. Decompression runs on a background thread, which hands decompressed
+blocks to the reader through a bounded queue, so it overlaps with parsing
+as the decompressors release the GIL. zstd needs the zstandard package.
+Decompression modules are imported when a compressed file is opened.
+
+Usage:
+    >>> with open_har_file("demo.har.gz") as f:
+    ...     content = f.read()
+
+"""
+
+import io
+import os
+import threading
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+from har2case.exceptions import FileFormatError
+
+HAR_SUFFIX = ".har"
+
+COMPRESSION_SUFFIXES = [".gz", ".bz2", ".xz", ".zst"]
+
+HAR_SUFFIXES = [HAR_SUFFIX] + [HAR_SUFFIX + suffix for suffix in COMPRESSION_SUFFIXES]
+
+# bytes decompressed at a time, and blocks queued ahead of the reader
+DECOMPRESS_BLOCK_SIZE = 1024 * 1024
+DECOMPRESS_QUEUE_SIZE = 8
+
+_EOF = object()
+
+
+def is_har_file(path):
+    """ whether path is a HAR file, plain or compressed.
+    """
+    return any(path.endswith(suffix) for suffix in HAR_SUFFIXES)
+
+
+def get_compression(path):
+    """ compression suffix of HAR file path, None if it is not compressed.
+    """
+    for suffix in COMPRESSION_SUFFIXES:
+        if path.endswith(HAR_SUFFIX + suffix):
+            return suffix
+    return None
+
+
+def strip_har_suffix(path):
+    """ strip HAR suffix, e.g. demo.har.gz => demo, or extension of other paths.
+    """
+    for suffix in HAR_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+
+    return os.path.splitext(path)[0]
+
+
+def _open_decompressed(path, compression):
+    """ open decompressed binary stream of compressed file.
+    """
+    if compression == ".gz":
+        import gzip
+        return gzip.open(path, "rb")
+    elif compression == ".bz2":
+        import bz2
+        return bz2.BZ2File(path, "rb")
+    elif compression == ".xz":
+        try:
+            import lzma
+        except ImportError:
+            raise FileFormatError("lzma module is required to read {}".format(path))
+        return lzma.open(path, "rb")
+    else:
+        try:
+            import zstandard
+        except ImportError:
+            raise FileFormatError("zstandard package is required to read {}".format(path))
+        # closing stream reader closes the file as well
+        return zstandard.ZstdDecompressor().stream_reader(io.open(path, "rb"))
+
+
+class ThreadedDecompressor(object):
+    """ read-only binary file object of compressed file, decompressed on a
+        background thread.
+
+    Args:
+        path (str): compressed file path.
+        compression (str): one of COMPRESSION_SUFFIXES.
+
+    """
+
+    def __init__(self, path, compression):
+        self.path = path
+        # opened here, so missing files and unsupported formats raise in caller
+        self.stream = _open_decompressed(path, compression)
+        self.blocks = queue.Queue(DECOMPRESS_QUEUE_SIZE)
+        # current block and read position in it
+        self.block = b""
+        self.block_pos = 0
+        self.eof = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._decompress, name="har2case-decompress")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decompress(self):
+        try:
+            while True:
+                block = self.stream.read(DECOMPRESS_BLOCK_SIZE)
+                if not block:
+                    break
+                if not self._put(block):
+                    return
+            self._put(_EOF)
+        except Exception as ex:
+            self._put(ex)
+
+    def _next_block(self):
+        """ get next decompressed block, return False at end of file.
+        """
+        if self.eof:
+            return False
+
+        block = self.blocks.get()
+        if block is _EOF:
+            self.eof = True
+            return False
+
+        if isinstance(block, Exception):
+            self.eof = True
+            raise FileFormatError(
+                "compressed HAR file error: {}, {!r}".format(self.path, block))
+
+        self.block = block
+        self.block_pos = 0
+        return True
+
+    def read(self, size=-1):
+        """ read up to size decompressed bytes, all remaining bytes if size < 0.
+            fewer bytes are returned only at end of file.
+        """
+        parts = []
+        remaining = size
+        while remaining != 0:
+            if self.block_pos >= len(self.block) and not self._next_block():
+                break
+
+            if remaining < 0:
+                part = self.block[self.block_pos:]
+            else:
+                part = self.block[self.block_pos:self.block_pos + remaining]
+                remaining -= len(part)
+            self.block_pos += len(part)
+            parts.append(part)
+
+        return b"".join(parts)
+
+    def close(self):
+        if self.stopped.is_set():
+            return
+
+        self.stopped.set()
+        self.thread.join()
+        self.stream.close()
+
+
+def open_har_file(path):
+    """ open HAR file read-only as binary file object, compressed files are
+        decompressed on a background thread.
+    """
+    compression = get_compression(path)
+    if compression is None:
+        return io.open(path, "rb")
+
+    return ThreadedDecompressor(path, compression)
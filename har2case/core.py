@@ -1,50 +1,142 @@
-import base64
-import json
+import collections
+import io
 import logging
 import os
-import sys
-
-from har2case import utils
-from har2case.compat import urlparse
-
-try:
-    from json.decoder import JSONDecodeError
-except ImportError:
-    JSONDecodeError = ValueError
-
-
-IGNORE_REQUEST_HEADERS = [
-    "host",
-    "accept",
-    "content-length",
-    "connection",
-    "accept-encoding",
-    "accept-language",
-    "origin",
-    "referer",
-    "cache-control",
-    "pragma",
-    "cookie",
-    "upgrade-insecure-requests",
-    ":authority",
-    ":method",
-    ":scheme",
-    ":path"
-]
+
+from har2case import codec, ir, mapped, reader, urls, utils, writers
+from har2case.checkpoint import CHECKPOINT_SUFFIX, Checkpoint, hash_file
+from har2case.compression import get_compression, strip_har_suffix
+from har2case.matcher import EntryMatcher
+from har2case.codec import JSONDecodeError
+from har2case.compat import bytes
+from har2case.exceptions import ParamsError
+# IGNORE_REQUEST_HEADERS is kept importable from core
+from har2case.headers import (IGNORE_REQUEST_HEADERS, VALIDATE_RESPONSE_HEADERS,  # noqa: F401
+                              HeaderFilter, lookup_headers)
+from har2case.stats import ConversionStats
+
+# entries count sent to a worker process at a time
+PARALLEL_CHUNK_SIZE = 64
+
+_worker_har_parser = None
+
+
+def _init_teststep_worker(har_parser, json_backend):
+    global _worker_har_parser
+    _worker_har_parser = har_parser
+    codec.use_backend(json_backend)
+
+
+def _prepare_teststeps_chunk(entries):
+    """ make teststeps of entries in worker process, return teststeps and stats of
+        the chunk, which are merged into parent HarParser stats.
+    """
+    har_parser = _worker_har_parser
+    if har_parser.stats is not None:
+        har_parser.stats = ConversionStats()
+
+    return har_parser._prepare_teststeps_chunk(entries), har_parser.stats
 
 
 class HarParser(object):
 
-    def __init__(self, har_file_path, filter_str=None, exclude_str=None):
+    def __init__(self, har_file_path, filter_str=None, exclude_str=None, workers=1,
+                 profile=False, max_body_size=None, oversize_body="scan",
+                 cache_dir=None, cache_size=None, incremental=False, dedup=False,
+                 header_filter=None, use_mmap=False, correlate=False):
+        """
+        Args:
+            har_file_path (str): HAR file path, or HAR source in memory: HAR content
+                as bytes, binary file object, HAR document dict, or iterable of log
+                entries. Testcases of sources in memory are made with
+                make_testcase or write_testcase, see har2case.api.
+            filter_str (str): only entries matching filter rules will be converted,
+                multiple rules can be joined with '|', see har2case.matcher.
+            exclude_str (str): entries matching any exclude rule will be ignored,
+                multiple rules can be joined with '|'.
+            workers (int): worker processes count to make teststeps with,
+                teststeps are made in current process if workers is 1.
+            profile (bool): record time and counters of conversion steps in stats.
+            max_body_size (int): response bodies larger than this, in bytes, are not
+                loaded as a whole to make validators, None for no limit.
+            oversize_body (str): how to make validators of oversize bodies, "scan"
+                top level keys with a streaming scanner, or "skip" validating them.
+            cache_dir (str): directory of teststeps cache, teststeps are not cached
+                if not specified.
+            cache_size (int): max size of teststeps cache in bytes.
+            incremental (bool): save a checkpoint next to testcase, and only convert
+                entries appended to HAR file since the last checkpoint.
+            dedup (bool): drop duplicate requests, see har2case.dedup.
+            header_filter (HeaderFilter): request headers converted to teststeps,
+                headers in IGNORE_REQUEST_HEADERS are ignored by default.
+            use_mmap (bool): load entries from memory mapping of HAR file, large
+                texts are decoded only if teststeps need them, see har2case.mapped.
+                All entries are held in memory, instead of read one by one.
+            correlate (bool): replace response values sent back in later requests,
+                e.g. tokens and IDs, with variables extracted from responses,
+                see har2case.correlate.
+
+        """
         self.har_file_path = har_file_path
         self.filter_str = filter_str
         self.exclude_str = exclude_str or ""
-
-    def __make_request_url(self, teststep_dict, entry_json):
-        """ parse HAR entry request url and queryString, and make teststep url and params
+        self.matcher = EntryMatcher(filter_str, exclude_str)
+        self.workers = workers
+        self.stats = ConversionStats() if profile else None
+        self.max_body_size = max_body_size
+        self.oversize_body = oversize_body
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        if incremental and dedup:
+            logging.warning(
+                "incremental conversion is disabled, deduplicated testcase can not be appended.")
+            incremental = False
+        if correlate and dedup:
+            logging.warning(
+                "correlation is disabled, extracts can not be kept in deduplicated teststeps.")
+            correlate = False
+        if incremental and correlate:
+            logging.warning(
+                "incremental conversion is disabled, extracts can not be added to "
+                "teststeps written before.")
+            incremental = False
+        is_path = reader.is_file_path(har_file_path)
+        if incremental and not (is_path and not get_compression(har_file_path)):
+            logging.warning(
+                "incremental conversion is disabled, only plain HAR files can be resumed.")
+            incremental = False
+        if use_mmap and (incremental or not is_path or get_compression(har_file_path)):
+            logging.warning(
+                "memory mapped loading is disabled for incremental conversion and "
+                "HAR files which are compressed or not on disk.")
+            use_mmap = False
+        self.incremental = incremental
+        self.dedup = dedup
+        self.correlate = correlate
+        self.use_mmap = use_mmap
+        self.header_filter = header_filter or HeaderFilter()
+        # byte offset in HAR file to resume reading entries from
+        self._resume_offset = None
+        # entries count and byte offset of entries read, tracked in incremental mode
+        self._read_progress = None
+        # teststeps cache shared by conversions of many HAR files, closed by its
+        # owner, see har2case.merge
+        self._shared_cache = None
+
+    def __getstate__(self):
+        # worker processes only make teststeps, HAR sources in memory stay here
+        state = self.__dict__.copy()
+        if not reader.is_file_path(self.har_file_path):
+            state["har_file_path"] = None
+        state["_shared_cache"] = None
+        return state
+
+    def __make_request_url(self, teststep_dict, entry):
+        """ parse HAR entry request url and queryString, and make teststep url and params,
+            values of repeated params are collected in a list.
 
         Args:
-            entry_json (dict):
+            entry (ir.Entry): entry made from HAR log entry, or HAR log entry dict, e.g.
                 {
                     "request": {
                         "url": "https://httprunner.top/home?v=1&w=2",
@@ -66,41 +158,36 @@ class HarParser(object):
             }
 
         """
-        request_params = utils.convert_list_to_dict(
-            entry_json["request"].get("queryString", [])
-        )
-
-        url = entry_json["request"].get("url")
+        request = ir.make_entry(entry).request
+        url = request.url
         if not url:
-            logging.exception("url missed in request.")
-            sys.exit(1)
-
-        parsed_object = urlparse.urlparse(url)
-        if request_params:
-            parsed_object = parsed_object._replace(query='')
-            teststep_dict["request"]["url"] = parsed_object.geturl()
-            teststep_dict["request"]["params"] = request_params
+            raise ParamsError("url missed in request.")
+
+        url_parts = urls.parse_url(url)
+        if request.query:
+            teststep_dict["request"]["url"] = url_parts.base_url
+            teststep_dict["request"]["params"] = utils.convert_pairs_to_dict(request.query)
         else:
             teststep_dict["request"]["url"] = url
 
-        teststep_dict["name"] = parsed_object.path
+        teststep_dict["name"] = url_parts.name
 
-    def __make_request_method(self, teststep_dict, entry_json):
+    def __make_request_method(self, teststep_dict, entry):
         """ parse HAR entry request method, and make teststep method.
         """
-        method = entry_json["request"].get("method")
+        method = ir.make_entry(entry).request.method
         if not method:
-            logging.exception("method missed in request.")
-            sys.exit(1)
+            raise ParamsError("method missed in request.")
 
         teststep_dict["request"]["method"] = method
 
-    def __make_request_headers(self, teststep_dict, entry_json):
+    def __make_request_headers(self, teststep_dict, entry):
         """ parse HAR entry request headers, and make teststep headers.
-            header in IGNORE_REQUEST_HEADERS will be ignored.
+            headers ignored by header filter, IGNORE_REQUEST_HEADERS by default,
+            will be ignored.
 
         Args:
-            entry_json (dict):
+            entry (ir.Entry): entry made from HAR log entry, or HAR log entry dict, e.g.
                 {
                     "request": {
                         "headers": [
@@ -119,21 +206,17 @@ class HarParser(object):
             }
 
         """
-        teststep_headers = {}
-        for header in entry_json["request"].get("headers", []):
-            if header["name"].lower() in IGNORE_REQUEST_HEADERS:
-                continue
-
-            teststep_headers[header["name"]] = header["value"]
+        request = ir.make_entry(entry).request
+        teststep_headers = self.header_filter.filter(request.headers)
 
         if teststep_headers:
             teststep_dict["request"]["headers"] = teststep_headers
 
-    def _make_request_data(self, teststep_dict, entry_json):
+    def _make_request_data(self, teststep_dict, entry):
         """ parse HAR entry request data, and make teststep request data
 
         Args:
-            entry_json (dict):
+            entry (ir.Entry): entry made from HAR log entry, or HAR log entry dict, e.g.
                 {
                     "request": {
                         "method": "POST",
@@ -158,24 +241,22 @@ class HarParser(object):
             }
 
         """
-        method = entry_json["request"].get("method")
-        if method in ["POST", "PUT", "PATCH"]:
-            postData = entry_json["request"].get("postData", {})
-            mimeType = postData.get("mimeType")
+        request = ir.make_entry(entry).request
+        if request.method in ["POST", "PUT", "PATCH"]:
+            mimeType = request.post_mime_type
 
             # Note that text and params fields are mutually exclusive.
-            if "text" in postData:
-                post_data = postData.get("text")
+            if request.post_params is None:
+                post_data = request.post_text
             else:
-                params = postData.get("params", [])
-                post_data = utils.convert_list_to_dict(params)
+                post_data = utils.convert_pairs_to_dict(request.post_params)
 
             request_data_key = "data"
             if not mimeType:
                 pass
             elif mimeType.startswith("application/json"):
                 try:
-                    post_data = json.loads(post_data)
+                    post_data = codec.loads(post_data)
                     request_data_key = "json"
                 except JSONDecodeError:
                     pass
@@ -187,11 +268,11 @@ class HarParser(object):
 
             teststep_dict["request"][request_data_key] = post_data
 
-    def _make_validate(self, teststep_dict, entry_json):
+    def _make_validate(self, teststep_dict, entry):
         """ parse HAR entry response and make teststep validate.
 
         Args:
-            entry_json (dict):
+            entry (ir.Entry): entry made from HAR log entry, or HAR log entry dict, e.g.
                 {
                     "request": {},
                     "response": {
@@ -219,52 +300,97 @@ class HarParser(object):
             }
 
         """
+        entry = ir.make_entry(entry)
+        response = entry.response
         teststep_dict["validate"].append(
-            {"eq": ["status_code", entry_json["response"].get("status")]}
+            {"eq": ["status_code", response.status]}
         )
 
-        resp_content_dict = entry_json["response"].get("content")
-
-        headers_mapping = utils.convert_list_to_dict(
-            entry_json["response"].get("headers", [])
-        )
-        if "Content-Type" in headers_mapping:
-            teststep_dict["validate"].append(
-                {"eq": ["headers.Content-Type", headers_mapping["Content-Type"]]}
-            )
+        # header names are case insensitive, e.g. content-type in HTTP/2 captures
+        found_headers = lookup_headers(response.headers, VALIDATE_RESPONSE_HEADERS)
+        for name in VALIDATE_RESPONSE_HEADERS:
+            if name in found_headers:
+                teststep_dict["validate"].append(
+                    {"eq": ["headers.{}".format(name), found_headers[name]]}
+                )
 
-        text = resp_content_dict.get("text")
-        if not text:
+        if not response.text:
             return
 
-        mime_type = resp_content_dict.get("mimeType")
+        mime_type = response.mime_type
         if mime_type and mime_type.startswith("application/json"):
 
-            encoding = resp_content_dict.get("encoding")
-            if encoding and encoding == "base64":
-                content = base64.b64decode(text).decode('utf-8')
-            else:
-                content = text
-
-            try:
-                resp_content_json = json.loads(content)
-            except JSONDecodeError:
-                logging.warning(
-                    "response content can not be loaded as json: {}".format(content.encode("utf-8"))
+            body_size = response.body_size
+            if self.max_body_size is None or body_size <= self.max_body_size:
+                content_items = self._load_content_scalars(response)
+            elif self.oversize_body == "skip":
+                logging.info(
+                    "skip validating response content of {}, size {} exceeds {}".format(
+                        entry.request.url, body_size, self.max_body_size)
                 )
+                if self.stats is not None:
+                    self.stats.incr("validate_skipped_oversize")
                 return
+            else:
+                content_items = self._scan_content_scalars(response)
 
-            if not isinstance(resp_content_json, dict):
-                return
-
-            for key, value in resp_content_json.items():
-                if isinstance(value, (dict, list)):
-                    continue
-
+            for key, value in content_items or []:
                 teststep_dict["validate"].append(
                     {"eq": ["content.{}".format(key), value]}
                 )
 
+    def _load_content_scalars(self, response):
+        """ load whole response content, and return (key, value) of its top level
+            scalars, None if content is not a JSON object.
+        """
+        # codec loads bytes, a decoded str copy is only made if the backend needs it
+        content = response.body()
+        if response.is_base64 and self.stats is not None:
+            self.stats.incr("bytes_decoded", len(content))
+
+        try:
+            resp_content_json = codec.loads(content)
+        except JSONDecodeError:
+            if not isinstance(content, bytes):
+                content = content.encode("utf-8")
+            logging.warning(
+                "response content can not be loaded as json: {}".format(content)
+            )
+            return None
+
+        if not isinstance(resp_content_json, dict):
+            return None
+
+        return [
+            (key, value)
+            for key, value in resp_content_json.items()
+            if not isinstance(value, (dict, list))
+        ]
+
+    def _scan_content_scalars(self, response):
+        """ scan top level scalars of oversize response content, without decoding
+            it as a whole or loading nested values.
+        """
+        is_base64 = response.is_base64
+        if is_base64:
+            fp = reader.Base64Reader(response.body_text())
+        else:
+            fp = reader.TextReader(response.body_text())
+        try:
+            content_items = reader.scan_object_scalars(fp)
+        except ValueError as ex:
+            logging.warning(
+                "response content can not be scanned as json: {}".format(ex)
+            )
+            return None
+        finally:
+            if self.stats is not None:
+                self.stats.incr("validate_scanned_oversize")
+                if is_base64:
+                    self.stats.incr("bytes_decoded", fp.decoded_bytes)
+
+        return content_items
+
     def _prepare_teststep(self, entry_json):
         """ extract info from entry dict and make teststep
 
@@ -286,17 +412,27 @@ class HarParser(object):
                 }
 
         """
+        entry = ir.make_entry(entry_json)
         teststep_dict = {
             "name": "",
             "request": {},
             "validate": []
         }
 
-        self.__make_request_url(teststep_dict, entry_json)
-        self.__make_request_method(teststep_dict, entry_json)
-        self.__make_request_headers(teststep_dict, entry_json)
-        self._make_request_data(teststep_dict, entry_json)
-        self._make_validate(teststep_dict, entry_json)
+        builders = [
+            ("make_request_url", self.__make_request_url),
+            ("make_request_method", self.__make_request_method),
+            ("make_request_headers", self.__make_request_headers),
+            ("make_request_data", self._make_request_data),
+            ("make_validate", self._make_validate)
+        ]
+        if self.stats is None:
+            for _, builder in builders:
+                builder(teststep_dict, entry)
+        else:
+            for name, builder in builders:
+                with self.stats.timer(name):
+                    builder(teststep_dict, entry)
 
         return teststep_dict
 
@@ -309,43 +445,251 @@ class HarParser(object):
             "variables": {}
         }
 
-    def _prepare_teststeps(self, fmt_version):
-        """ make teststep list.
-            teststeps list are parsed from HAR log entries list.
-
+    def _iter_entries(self):
+        """ load HAR log entries one by one, and drop filtered or excluded entries.
         """
-        def is_exclude(url, exclude_str):
-            exclude_str_list = exclude_str.split("|")
-            for exclude_str in exclude_str_list:
-                if exclude_str and exclude_str in url:
-                    return True
+        stats = self.stats
+        matcher = self.matcher
+
+        def skip_entry(entry_fields):
+            if stats is not None:
+                stats.incr("entries_total")
+
+            dropped = matcher.check_entry(entry_fields)
+            if dropped and stats is not None:
+                stats.incr("entries_{}".format(dropped))
 
-            return False
+            return dropped
+
+        if not reader.is_file_path(self.har_file_path):
+            log_entries = reader.iter_har_source_entries(
+                self.har_file_path,
+                skip_entry=skip_entry if matcher else None
+            )
+        elif self.use_mmap:
+            # bodies of filtered or excluded entries are lazy texts never decoded
+            log_entries = mapped.load_mapped_har_log_entries(
+                self.har_file_path, mapped.LAZY_TEXT_SIZE)
+            if matcher:
+                log_entries = (
+                    entry_json
+                    for entry_json in log_entries
+                    if not skip_entry(entry_json)
+                )
+        else:
+            # filtered or excluded entries are skipped by reader without decoding bodies
+            log_entries = reader.iter_har_log_entries(
+                self.har_file_path,
+                skip_entry=skip_entry if matcher else None,
+                start_offset=self._resume_offset,
+                progress=self._read_progress
+            )
+        if stats is not None:
+            log_entries = stats.iter_timed("load_entry", log_entries)
 
-        teststeps = []
-        log_entries = utils.load_har_log_entries(self.har_file_path)
         for entry_json in log_entries:
-            url = entry_json["request"].get("url")
-            if self.filter_str and self.filter_str not in url:
-                continue
+            if stats is not None and not matcher:
+                stats.incr("entries_total")
+
+            yield entry_json
+
+    def _prepare_teststeps_chunk(self, entries):
+        return [
+            self._prepare_teststep(entry_json)
+            for entry_json in entries
+        ]
 
-            if is_exclude(url, self.exclude_str):
+    def _iter_jobs(self, cache):
+        """ load entries and look up their teststeps in cache.
+
+        Yields:
+            tuple: (cache key, entry_json, cached teststep or None)
+
+        """
+        for entry_json in self._iter_entries():
+            if cache is None:
+                yield None, entry_json, None
                 continue
 
-            if fmt_version == "v1":
-                teststeps.append(
-                    {"test": self._prepare_teststep(entry_json)}
-                )
+            key = cache.make_key(entry_json)
+            teststep = cache.get(key)
+            if self.stats is not None:
+                self.stats.incr("cache_misses" if teststep is None else "cache_hits")
+
+            yield key, entry_json, teststep
+
+    def _iter_collected_jobs(self, jobs):
+        """ collect response values of entries to correlate, as jobs are taken.
+
+        Returns:
+            tuple: (jobs, deque of response values of jobs taken, in order), values
+                of a job are popped when its teststep is made.
+
+        """
+        from har2case import correlate
+
+        response_values = collections.deque()
+
+        def iter_jobs():
+            for key, entry_json, teststep in jobs:
+                response_values.append(correlate.collect_response_values(entry_json))
+                yield key, entry_json, teststep
+
+        return iter_jobs(), response_values
+
+    def _iter_teststeps_parallel(self, jobs):
+        """ shard entries not cached across worker processes, and yield
+            (cache key, teststep, is_made) in entries order. pending chunks are
+            bounded, so entries are not read ahead of workers.
+
+        """
+        # imported only for entry workers, it is slow to import
+        import multiprocessing
+
+        pool = multiprocessing.Pool(
+            self.workers,
+            initializer=_init_teststep_worker,
+            initargs=(self, codec.get_codec().name)
+        )
+        pending = collections.deque()
+
+        def submit(chunk):
+            entries = [
+                entry_json
+                for _, entry_json, teststep in chunk
+                if teststep is None
+            ]
+            result = pool.apply_async(_prepare_teststeps_chunk, (entries,)) if entries else None
+            # entries are not kept while their teststeps are being made
+            pending.append(([(key, teststep) for key, _, teststep in chunk], result))
+
+        def collect():
+            chunk, result = pending.popleft()
+            made_teststeps = []
+            if result is not None:
+                made_teststeps, stats = result.get()
+                if stats is not None:
+                    self.stats.merge(stats)
+
+            made_teststeps = iter(made_teststeps)
+            return [
+                (key, next(made_teststeps), True) if teststep is None else (key, teststep, False)
+                for key, teststep in chunk
+            ]
+
+        try:
+            chunk = []
+            for job in jobs:
+                chunk.append(job)
+                if len(chunk) < PARALLEL_CHUNK_SIZE:
+                    continue
+
+                submit(chunk)
+                chunk = []
+                while len(pending) >= self.workers * 2:
+                    for result in collect():
+                        yield result
+
+            if chunk:
+                submit(chunk)
+
+            while pending:
+                for result in collect():
+                    yield result
+
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _open_cache(self):
+        if not self.cache_dir:
+            return None
+
+        from har2case.cache import DEFAULT_CACHE_SIZE, TeststepCache
+        return TeststepCache(
+            self.cache_dir,
+            self.header_filter.ignored,
+            {"max_body_size": self.max_body_size, "oversize_body": self.oversize_body},
+            self.cache_size or DEFAULT_CACHE_SIZE
+        )
+
+    def _iter_teststeps(self):
+        """ make teststeps one by one.
+            teststeps are parsed from HAR log entries, or loaded from cache.
+
+        """
+        cache = self._shared_cache or self._open_cache()
+        try:
+            jobs = self._iter_jobs(cache)
+            if self.correlate:
+                from har2case import correlate
+                jobs, response_values = self._iter_collected_jobs(jobs)
+
+            if self.workers and self.workers > 1:
+                results = self._iter_teststeps_parallel(jobs)
             else:
-                # v2
-                teststeps.append(
-                    self._prepare_teststep(entry_json)
+                results = (
+                    (key, self._prepare_teststep(entry_json), True) if teststep is None
+                    else (key, teststep, False)
+                    for key, entry_json, teststep in jobs
+                )
+
+            def iter_made_teststeps():
+                for key, teststep, is_made in results:
+                    if is_made and cache is not None:
+                        cache.put(key, teststep)
+
+                    if self.stats is not None:
+                        self.stats.incr("teststeps")
+                    yield teststep
+
+            teststeps = iter_made_teststeps()
+            if self.correlate:
+                teststeps = correlate.correlate_teststeps(
+                    ((teststep, response_values.popleft()) for teststep in teststeps),
+                    self.stats
                 )
+            if self.dedup:
+                from har2case import dedup
+                teststeps = dedup.dedup_teststeps(teststeps, self.stats)
 
-        return teststeps
+            for teststep in teststeps:
+                yield teststep
+        finally:
+            if cache is not None and cache is not self._shared_cache:
+                cache.close()
+
+    def iter_teststeps(self):
+        """ make teststeps of HAR source one by one, without v1 "test" wrappers.
+
+        Yields:
+            dict: teststep
+                {
+                    "name": "/api/v1/Account/Login",
+                    "request": {},
+                    "validate": []
+                }
 
-    def _make_testcase(self, fmt_version):
-        """ Extract info from HAR file and prepare for testcase
+        """
+        return self._iter_teststeps()
+
+    def _prepare_teststeps(self, fmt_version):
+        """ make teststep list.
+            teststeps list are parsed from HAR log entries list.
+
+        """
+        if fmt_version == "v1":
+            return [
+                {"test": teststep}
+                for teststep in self._iter_teststeps()
+            ]
+        else:
+            # v2
+            return list(self._iter_teststeps())
+
+    def make_testcase(self, fmt_version="v1"):
+        """ Extract info from HAR source and prepare for testcase, in memory.
         """
         logging.debug("Extract info from HAR file and prepare for testcase.")
 
@@ -367,15 +711,184 @@ class HarParser(object):
 
         return testcase
 
+    # former private name, kept for existing callers
+    _make_testcase = make_testcase
+
+    def write_testcase(self, writer):
+        """ write testcase of HAR source with a testcase writer, which is closed
+            after the last teststep. teststeps are written one by one as they are
+            prepared.
+
+        Args:
+            writer (writers.TestcaseWriter): writer of output file, or in memory
+                writer, see writers.make_testcase_writer.
+
+        """
+        writer.write_config(self._prepare_config())
+        self._write_teststeps(writer)
+        writer.close()
+
+    def _write_teststeps(self, writer):
+        stats = self.stats
+        for teststep in self._iter_teststeps():
+            logging.debug("prepared teststep: {}".format(teststep))
+            if stats is None:
+                writer.write_teststep(teststep)
+            else:
+                with stats.timer("write_teststep"):
+                    writer.write_teststep(teststep)
+
+    def _make_checkpoint_options(self, file_type, fmt_version):
+        return {
+            "file_type": file_type,
+            "fmt_version": fmt_version,
+            "filter": self.filter_str,
+            "exclude": self.exclude_str,
+            "max_body_size": self.max_body_size,
+            "oversize_body": self.oversize_body,
+            "ignored_headers": sorted(self.header_filter.ignored)
+        }
+
+    def _load_checkpoint(self, checkpoint_file, output_testcase_file, options):
+        """ load checkpoint to resume conversion from.
+
+        Returns:
+            tuple: (checkpoint, sha1 object of HAR content read), or (None, None)
+                if testcase should be rebuilt.
+
+        """
+        checkpoint = Checkpoint.load(checkpoint_file)
+        if checkpoint is None:
+            logging.info("No valid checkpoint found, convert the whole HAR file.")
+            return None, None
+
+        har_sha1 = checkpoint.verify(self.har_file_path, output_testcase_file, options)
+        if har_sha1 is None:
+            logging.info(
+                "HAR file, testcase or options changed since checkpoint, rebuild testcase.")
+            return None, None
+
+        logging.info("Resume conversion after {} entries.".format(checkpoint.entries_count))
+        return checkpoint, har_sha1
+
     def gen_testcase(self, file_type="JSON", fmt_version="v1"):
-        harfile = os.path.splitext(self.har_file_path)[0]
+        """ convert HAR file and write testcase next to it.
+            teststeps are written to output file one by one as they are prepared.
+            In incremental mode, only entries appended since the last conversion
+            are converted, and their teststeps are appended to the testcase.
+
+        Raises:
+            exceptions.ParamsError: HAR source is not a file path, testcases of
+                sources in memory are written with write_testcase.
+
+        """
+        if not reader.is_file_path(self.har_file_path):
+            raise ParamsError(
+                "testcase of HAR source in memory can not be written next to it.")
+
+        harfile = strip_har_suffix(self.har_file_path)
         output_testcase_file = "{}.{}".format(harfile, file_type.lower())
+        checkpoint_file = output_testcase_file + CHECKPOINT_SUFFIX
+
+        output_format = "JSON" if file_type == "JSON" else "YAML"
 
         logging.info("Start to generate testcase.")
-        testcase = self._make_testcase(fmt_version)
-        logging.debug("prepared testcase: {}".format(testcase))
+        logging.info("dump testcase to {} format.".format(output_format))
+
+        stats = self.stats
+        options = self._make_checkpoint_options(file_type, fmt_version)
+        last_checkpoint = har_sha1 = None
+        if self.incremental:
+            last_checkpoint, har_sha1 = self._load_checkpoint(
+                checkpoint_file, output_testcase_file, options)
+            if stats is not None:
+                stats.incr("checkpoint_resumed" if last_checkpoint else "checkpoint_rebuilt")
+
+        if last_checkpoint is not None:
+            self._resume_offset = last_checkpoint.har_offset
+            self._read_progress = {
+                "entries_count": last_checkpoint.entries_count,
+                "offset": last_checkpoint.har_offset
+            }
+        elif self.incremental:
+            self._resume_offset = None
+            self._read_progress = {"entries_count": 0, "offset": 0}
+            # the checkpoint is invalid from now on, even if conversion fails
+            if os.path.isfile(checkpoint_file):
+                os.remove(checkpoint_file)
+
+        outfile = tail = None
+        try:
+            if last_checkpoint is not None:
+                # drop closing tail of testcase, and append teststeps after the last one
+                with io.open(output_testcase_file, "r+b") as f:
+                    f.seek(last_checkpoint.output_body_size)
+                    tail = f.read()
+                    f.truncate(last_checkpoint.output_body_size)
+                outfile = io.open(output_testcase_file, "a", encoding="utf-8")
+                writer = writers.make_testcase_writer(file_type, outfile, fmt_version)
+                writer.resume(last_checkpoint.teststeps_count)
+            else:
+                outfile = io.open(output_testcase_file, "w", encoding="utf-8")
+                writer = writers.make_testcase_writer(file_type, outfile, fmt_version)
+                writer.write_config(self._prepare_config())
+
+            with outfile:
+                self._write_teststeps(writer)
+                outfile.flush()
+                output_body_size = outfile.tell()
+                writer.close()
+        except Exception:
+            if outfile is not None:
+                outfile.close()
+
+            if tail is not None:
+                # keep testcase and checkpoint of the last conversion
+                with io.open(output_testcase_file, "r+b") as f:
+                    f.truncate(last_checkpoint.output_body_size)
+                    f.seek(last_checkpoint.output_body_size)
+                    f.write(tail)
+            elif outfile is not None:
+                # do not leave incomplete testcase behind
+                if os.path.isfile(output_testcase_file):
+                    os.remove(output_testcase_file)
+                if os.path.isfile(checkpoint_file):
+                    os.remove(checkpoint_file)
+            raise
+        finally:
+            progress = self._read_progress
+            self._resume_offset = self._read_progress = None
+
+        if self.incremental:
+            self._save_checkpoint(
+                checkpoint_file, output_testcase_file, options, progress,
+                last_checkpoint, har_sha1, writer.teststeps_count, output_body_size
+            )
+
+        if stats is not None:
+            stats.incr("output_bytes", os.path.getsize(output_testcase_file))
+
+        logging.info("Generate {} testcase successfully: {}".format(
+            output_format, output_testcase_file))
+        return output_testcase_file
 
-        if file_type == "JSON":
-            utils.dump_json(testcase, output_testcase_file)
+    def _save_checkpoint(self, checkpoint_file, output_testcase_file, options, progress,
+                         last_checkpoint, har_sha1, teststeps_count, output_body_size):
+        """ save checkpoint after conversion, har_sha1 of content before the last
+            checkpoint is updated with content read since then.
+        """
+        har_offset = progress["offset"]
+        if last_checkpoint is None:
+            har_sha1 = hash_file(self.har_file_path, har_offset)
         else:
-            utils.dump_yaml(testcase, output_testcase_file)
+            har_sha1 = hash_file(
+                self.har_file_path, har_offset, last_checkpoint.har_offset, har_sha1)
+
+        if har_sha1 is None:
+            # HAR file was truncated while converting
+            return
+
+        Checkpoint(
+            options, progress["entries_count"], teststeps_count, har_offset,
+            har_sha1.hexdigest(), output_body_size, os.path.getsize(output_testcase_file)
+        ).save(checkpoint_file)
@@ -0,0 +1,399 @@
+""" Correlate dynamic values across teststeps.
+
+Responses return values which later requests send back, e.g. tokens, IDs and
+redirect locations. Replayed as recorded literals they would be stale, so they
+are replaced with $variable references, and the teststep of the response
+extracts the variable, in HttpRunner style:
+
+    -   test:
+            name: /api/get-token
+            extract:
+            -   token: content.token
+    -   test:
+            name: /api/users/1000
+            request:
+                headers:
+                    token: $token
+
+Response values, i.e. leaves of JSON bodies, Set-Cookie values and Location
+headers, are indexed as entries stream by, and looked up in url paths, params,
+headers and bodies of later requests. Only strings which look like generated
+values are indexed: MIN_VALUE_LENGTH to MAX_VALUE_LENGTH chars, with a digit
+and without whitespace. Values already sent in earlier requests are not
+dynamic, and are not indexed. Both indexes are LRU maps of at most index_size
+values, so memory is bounded on HAR files of any size.
+
+Extracts are added to teststeps already passed by, so teststeps are spooled
+until the last one, in memory first and to a temporary file once they grow
+large, and yielded with their extracts afterwards.
+
+Usage:
+    >>> correlator = TeststepCorrelator()
+    >>> for teststep, entry_json in pairs:
+    ...     correlator.add(teststep, collect_response_values(entry_json))
+    >>> teststeps = list(correlator.iter_teststeps())
+
+"""
+
+import collections
+import logging
+import re
+import tempfile
+
+from har2case import codec, ir
+from har2case.compat import basestring
+
+MIN_VALUE_LENGTH = 6
+MAX_VALUE_LENGTH = 4096
+
+# max values in index of response values, and of request values seen
+DEFAULT_INDEX_SIZE = 10000
+
+# JSON bodies larger than this, in bytes, are not indexed
+MAX_INDEXED_BODY_SIZE = 1024 * 1024
+
+# leaves of a JSON body indexed at most, in document order
+MAX_INDEXED_LEAVES = 1000
+
+# spooled teststeps are moved to a temporary file beyond this size in bytes
+SPOOL_MEMORY_SIZE = 8 * 1024 * 1024
+
+# strings without whitespace, with a digit
+_DYNAMIC_VALUE_RE = re.compile(r"\S*\d\S*\Z")
+
+# JSON keys addressable in HttpRunner extract paths
+_PATH_KEY_RE = re.compile(r"^[\w-]+$")
+
+# words of header values, e.g. "Bearer <token>" or "sid=<value>; theme=dark"
+_HEADER_WORD_RE = re.compile(r"[^\s;,]+")
+_HEADER_WORD_SEPARATOR_RE = re.compile(r"[\s;,=]")
+
+_URL_PATH_RE = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*://[^/?#]*)(.*)$")
+
+_INVALID_VARIABLE_CHAR_RE = re.compile(r"\W")
+
+
+def is_dynamic_value(value):
+    """ whether value looks like a generated value, e.g. a token or an ID.
+    """
+    return isinstance(value, basestring) \
+        and MIN_VALUE_LENGTH <= len(value) <= MAX_VALUE_LENGTH \
+        and _DYNAMIC_VALUE_RE.match(value) is not None
+
+
+def _iter_json_leaves(value, path):
+    """ yield (path, name, leaf) of string leaves, path is a list of keys.
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(key, basestring) and _PATH_KEY_RE.match(key):
+                for leaf in _iter_json_leaves(item, path + [key]):
+                    yield leaf
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            for leaf in _iter_json_leaves(item, path + [str(index)]):
+                yield leaf
+    elif is_dynamic_value(value):
+        yield path, path[-1] if path else "content", value
+
+
+def _collect_body_values(response):
+    mime_type = response.mime_type
+    if not (mime_type and mime_type.startswith("application/json")):
+        return []
+    if not response.text or response.body_size > MAX_INDEXED_BODY_SIZE:
+        return []
+
+    try:
+        content_json = codec.loads(response.body())
+    except (ValueError, TypeError):
+        return []
+
+    values = []
+    for path, name, value in _iter_json_leaves(content_json, []):
+        values.append((value, ".".join(["content"] + path), name))
+        if len(values) >= MAX_INDEXED_LEAVES:
+            break
+
+    return values
+
+
+def collect_response_values(entry_json):
+    """ collect dynamic values of entry response.
+
+    Returns:
+        list: (value, extract path, variable name hint), e.g.
+            [("baNLX1zhFYP11Seb", "content.token", "token")]
+
+    """
+    response = ir.make_entry(entry_json).response
+    values = _collect_body_values(response)
+    for name, value in response.headers:
+        name = name.lower()
+        if not isinstance(value, basestring):
+            continue
+        elif name == "set-cookie":
+            cookie_name, _, cookie_value = value.split(";", 1)[0].partition("=")
+            cookie_name = cookie_name.strip()
+            cookie_value = cookie_value.strip()
+            if cookie_name and is_dynamic_value(cookie_value):
+                values.append((cookie_value, "cookies.{}".format(cookie_name), cookie_name))
+        elif name == "location" and is_dynamic_value(value):
+            values.append((value, "headers.Location", "location"))
+
+    return values
+
+
+class _LRUMap(object):
+    """ map of at most size items, least recently used items are evicted.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.items = collections.OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def get(self, key):
+        value = self.items.pop(key, None)
+        if value is not None:
+            self.items[key] = value
+        return value
+
+    def put(self, key, value):
+        self.items.pop(key, None)
+        self.items[key] = value
+        if len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+
+class _ValueSource(object):
+    """ response value of a teststep, variable is set once a request uses it.
+    """
+
+    __slots__ = ("step_index", "path", "name", "variable")
+
+    def __init__(self, step_index, path, name):
+        self.step_index = step_index
+        self.path = path
+        self.name = name
+        self.variable = None
+
+
+class TeststepCorrelator(object):
+    """ replace response values in later requests with variables, and add
+        extracts of them to teststeps of responses.
+
+    Args:
+        index_size (int): max response values indexed, and request values
+            remembered, least recently used values are evicted.
+
+    """
+
+    def __init__(self, index_size=DEFAULT_INDEX_SIZE):
+        # response value: _ValueSource
+        self.index = _LRUMap(index_size)
+        # request values not correlated, they are not dynamic if returned later
+        self.sent_values = _LRUMap(index_size)
+        # step index: [(variable, extract path)]
+        self.extracts = {}
+        self.variables = set()
+        self.name_counts = {}
+        self.correlated_count = 0
+        self.teststeps_count = 0
+        self.spool = tempfile.SpooledTemporaryFile(SPOOL_MEMORY_SIZE, "w+b")
+
+    def _make_variable(self, source):
+        name = _INVALID_VARIABLE_CHAR_RE.sub("_", source.name)
+        if not name or name[0].isdigit():
+            name = "var_{}".format(name)
+
+        # variables named after the same key are numbered, e.g. id, id_2, id_3
+        index = self.name_counts.get(name, 0) + 1
+        variable = name if index == 1 else "{}_{}".format(name, index)
+        while variable in self.variables:
+            index += 1
+            variable = "{}_{}".format(name, index)
+
+        self.name_counts[name] = index
+        self.variables.add(variable)
+        self.extracts.setdefault(source.step_index, []).append((variable, source.path))
+        return variable
+
+    def _correlate(self, value):
+        """ return variable reference of value if it is a response value,
+            otherwise None.
+        """
+        if not is_dynamic_value(value):
+            return None
+
+        source = self.index.get(value)
+        if source is None:
+            self.sent_values.put(value, True)
+            return None
+
+        if source.variable is None:
+            source.variable = self._make_variable(source)
+
+        self.correlated_count += 1
+        return "$" + source.variable
+
+    def _correlate_words(self, value):
+        """ correlate value as a whole, or its words, e.g. header values.
+        """
+        reference = self._correlate(value)
+        if reference is not None or _HEADER_WORD_SEPARATOR_RE.search(value) is None:
+            return reference or value
+
+        def replace_word(match):
+            word = match.group(0)
+            reference = self._correlate(word)
+            if reference is not None:
+                return reference
+
+            # name=value pairs, e.g. cookies
+            name, equal, word_value = word.partition("=")
+            if equal:
+                reference = self._correlate(word_value)
+                if reference is not None:
+                    return name + equal + reference
+
+            return word
+
+        return _HEADER_WORD_RE.sub(replace_word, value)
+
+    def _correlate_url(self, url):
+        reference = self._correlate(url)
+        if reference is not None:
+            return reference
+
+        match = _URL_PATH_RE.match(url)
+        if match is None:
+            return url
+
+        base, path = match.groups()
+        # relative redirect locations, e.g. /orders/1234
+        reference = self._correlate(path)
+        if reference is not None:
+            return base + reference
+
+        path, question, query = path.partition("?")
+        segments = [
+            self._correlate(segment) or segment
+            for segment in path.split("/")
+        ]
+        return base + "/".join(segments) + question + query
+
+    def _correlate_json(self, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                value[key] = self._correlate_json(item)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                value[index] = self._correlate_json(item)
+        elif isinstance(value, basestring):
+            return self._correlate(value) or value
+
+        return value
+
+    def _correlate_request(self, request):
+        if "url" in request:
+            request["url"] = self._correlate_url(request["url"])
+
+        for field in ("params", "data", "json"):
+            if field in request:
+                request[field] = self._correlate_json(request[field])
+
+        headers = request.get("headers")
+        for name, value in (headers or {}).items():
+            if isinstance(value, basestring):
+                headers[name] = self._correlate_words(value)
+
+    def add(self, teststep, response_values):
+        """ correlate teststep request with responses of teststeps added before, and
+            index its response values. teststep is updated in place.
+
+        Args:
+            teststep (dict): teststep made of entry.
+            response_values (list): values of entry response, see
+                collect_response_values.
+
+        """
+        self._correlate_request(teststep["request"])
+
+        step_index = self.teststeps_count
+        for value, path, name in response_values:
+            if value in self.sent_values:
+                continue
+
+            source = self.index.get(value)
+            # values extracted already stay correlated to their first response
+            if source is None or source.variable is None:
+                self.index.put(value, _ValueSource(step_index, path, name))
+
+        self.spool.write(codec.dumps(teststep).encode("utf-8"))
+        self.spool.write(b"\n")
+        self.teststeps_count += 1
+
+    def iter_teststeps(self):
+        """ yield spooled teststeps in order, with extracts of their response values
+            used in later requests.
+        """
+        self.spool.seek(0)
+        try:
+            for step_index, line in enumerate(self.spool):
+                teststep = codec.loads(line.decode("utf-8"))
+                extracts = self.extracts.pop(step_index, None)
+                if extracts is not None:
+                    teststep = _add_extracts(teststep, extracts)
+                yield teststep
+        finally:
+            self.spool.close()
+
+
+def _add_extracts(teststep, extracts):
+    """ add extracts before validators, and drop validators of extracted values,
+        which are dynamic.
+    """
+    extracted_paths = set(path for _, path in extracts)
+    made_teststep = {}
+    for key, value in teststep.items():
+        if key == "validate":
+            made_teststep["extract"] = [{variable: path} for variable, path in extracts]
+            value = [
+                validator for validator in value
+                if not (isinstance(validator, dict) and "eq" in validator
+                        and validator["eq"][0] in extracted_paths)
+            ]
+        made_teststep[key] = value
+
+    if "extract" not in made_teststep:
+        made_teststep["extract"] = [{variable: path} for variable, path in extracts]
+
+    return made_teststep
+
+
+def correlate_teststeps(pairs, stats=None):
+    """ correlate dynamic values across teststeps, and log correlated count.
+
+    Args:
+        pairs (iterable): (teststep, response values) in order of entries.
+        stats (ConversionStats): record counters of correlated values.
+
+    Yields:
+        dict: teststep, with variable references and extracts.
+
+    """
+    correlator = TeststepCorrelator()
+    for teststep, response_values in pairs:
+        correlator.add(teststep, response_values)
+
+    logging.info("correlate {} request values with {} extracted variables.".format(
+        correlator.correlated_count, len(correlator.variables)))
+    if stats is not None:
+        stats.incr("correlated_values", correlator.correlated_count)
+        stats.incr("extracted_variables", len(correlator.variables))
+
+    for teststep in correlator.iter_teststeps():
+        yield teststep
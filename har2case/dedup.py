@@ -0,0 +1,126 @@
+""" Deduplicate repeated requests.
+
+Captures repeat the same request many times, e.g. polling and retries.
+Teststeps are indexed by a digest of their name and request, and teststeps
+with the same digest are exact duplicates: only the first one is kept. Only
+validators shared by all duplicates are kept, so that values which differ
+between responses, e.g. timestamps, are not validated.
+
+Requests which differ only in param or body values, e.g. pagination, are not
+collapsed: HttpRunner reads parameters only in testcase config or testsuite,
+so a teststep parameterized with the recorded values would be replayed once.
+
+Usage:
+    >>> deduplicator = TeststepDeduplicator()
+    >>> for teststep in teststeps:
+    ...     deduplicator.add(teststep)
+    >>> teststeps = list(deduplicator.iter_teststeps())
+
+"""
+
+import hashlib
+import logging
+
+from har2case import codec
+
+
+class _TeststepGroup(object):
+    """ exact duplicate teststeps.
+    """
+
+    __slots__ = ("teststep", "validators")
+
+    def __init__(self, teststep):
+        self.teststep = teststep
+        # canonical JSON of validators shared by all teststeps
+        self.validators = None
+
+    def add(self, teststep):
+        validators = set(
+            codec.dumps_canonical(validator)
+            for validator in teststep.get("validate", [])
+        )
+        if self.validators is None:
+            self.validators = validators
+        else:
+            self.validators &= validators
+
+    def make_teststep(self):
+        """ make teststep of group, with validators shared by all duplicates.
+        """
+        validate = self.teststep.get("validate", [])
+        if len(self.validators) == len(validate):
+            return self.teststep
+
+        teststep = dict(self.teststep)
+        teststep["validate"] = [
+            validator
+            for validator in validate
+            if codec.dumps_canonical(validator) in self.validators
+        ]
+        return teststep
+
+
+class TeststepDeduplicator(object):
+    """ index teststeps by name and request, and drop duplicates. Teststeps are
+        emitted in order of their first occurrence.
+    """
+
+    def __init__(self):
+        # teststep digest: group
+        self.groups = {}
+        self.order = []
+        self.teststeps_count = 0
+        self.duplicates_count = 0
+
+    def add(self, teststep):
+        self.teststeps_count += 1
+        digest = hashlib.sha1(
+            codec.dumps_canonical([teststep.get("name"), teststep["request"]])).digest()
+        group = self.groups.get(digest)
+        if group is None:
+            group = self.groups[digest] = _TeststepGroup(teststep)
+            self.order.append(group)
+        else:
+            self.duplicates_count += 1
+
+        group.add(teststep)
+
+    @property
+    def compression_ratio(self):
+        """ teststeps count divided by deduplicated teststeps count.
+        """
+        return float(self.teststeps_count) / len(self.order) if self.order else 1.0
+
+    def iter_teststeps(self):
+        for group in self.order:
+            yield group.make_teststep()
+
+
+def dedup_teststeps(teststeps, stats=None):
+    """ deduplicate teststeps, and log compression ratio.
+
+    Args:
+        teststeps (iterable): teststeps to deduplicate, all of them are consumed
+            before the first one is yielded.
+        stats (ConversionStats): record counter of dropped teststeps.
+
+    Yields:
+        dict: deduplicated teststeps.
+
+    """
+    deduplicator = TeststepDeduplicator()
+    for teststep in teststeps:
+        deduplicator.add(teststep)
+
+    logging.info(
+        "Deduplicated {} teststeps into {}, {} duplicates dropped, "
+        "compression ratio {:.2f}.".format(
+            deduplicator.teststeps_count, len(deduplicator.order),
+            deduplicator.duplicates_count, deduplicator.compression_ratio)
+    )
+    if stats is not None:
+        stats.incr("dedup_dropped", deduplicator.duplicates_count)
+
+    for teststep in deduplicator.iter_teststeps():
+        yield teststep
@@ -0,0 +1,21 @@
+""" har2case exceptions.
+
+Errors are raised instead of exiting the interpreter, so that one bad HAR
+file does not take down batch conversions or services embedding har2case.
+"""
+
+
+class MyBaseError(Exception):
+    pass
+
+
+class FileFormatError(MyBaseError):
+    pass
+
+
+class ParamsError(MyBaseError):
+    pass
+
+
+class ConversionTimeout(MyBaseError):
+    pass
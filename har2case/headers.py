@@ -0,0 +1,159 @@
+""" Request header filtering and response header lookup.
+
+Header names are case insensitive, and HTTP/2 captures use lower case names,
+so names are compared case folded. Folded names are memoized, as captures
+repeat a small set of header names in every entry.
+
+Request headers in IGNORE_REQUEST_HEADERS are not converted to teststeps by
+default. Allow list keeps headers which are ignored by default, e.g. cookie,
+and deny list ignores more headers. Lists can be given on command line, or
+in a JSON/YAML config file:
+
+    {
+        "allow": ["Cookie"],
+        "deny": ["X-Request-Id", "User-Agent"]
+    }
+
+Usage:
+    >>> header_filter = HeaderFilter(allow=["Cookie"], deny=["X-Request-Id"])
+    >>> header_filter.is_ignored("x-request-id")
+    True
+    >>> lookup_headers([("content-type", "text/html")], ["Content-Type"])
+    {'Content-Type': 'text/html'}
+
+"""
+
+import io
+
+from har2case.compat import is_py2
+from har2case.exceptions import FileFormatError
+
+IGNORE_REQUEST_HEADERS = [
+    "host",
+    "accept",
+    "content-length",
+    "connection",
+    "accept-encoding",
+    "accept-language",
+    "origin",
+    "referer",
+    "cache-control",
+    "pragma",
+    "cookie",
+    "upgrade-insecure-requests",
+    ":authority",
+    ":method",
+    ":scheme",
+    ":path"
+]
+
+# response headers validated in teststeps
+VALIDATE_RESPONSE_HEADERS = ["Content-Type"]
+
+# max header names memoized, names beyond it are folded on each lookup
+_FOLD_CACHE_SIZE = 4096
+
+_fold_cache = {}
+
+
+def fold(name):
+    """ case fold header name.
+    """
+    try:
+        return _fold_cache[name]
+    except KeyError:
+        pass
+
+    folded_name = name.lower() if is_py2 else name.casefold()
+    if len(_fold_cache) < _FOLD_CACHE_SIZE:
+        _fold_cache[name] = folded_name
+
+    return folded_name
+
+
+class HeaderFilter(object):
+    """ decide which request headers are converted to teststeps.
+
+    Args:
+        allow (list): header names kept, even if ignored by default.
+        deny (list): header names ignored, in addition to IGNORE_REQUEST_HEADERS.
+
+    """
+
+    def __init__(self, allow=None, deny=None):
+        self.allow = frozenset(fold(name) for name in allow or [])
+        self.deny = frozenset(fold(name) for name in deny or [])
+        self.ignored = (
+            frozenset(fold(name) for name in IGNORE_REQUEST_HEADERS) | self.deny
+        ) - self.allow
+
+    def is_ignored(self, name):
+        return fold(name) in self.ignored
+
+    def filter(self, header_pairs):
+        """ make teststep headers mapping of (name, value) pairs not ignored.
+        """
+        ignored = self.ignored
+        fold_cache = _fold_cache
+        return {
+            name: value
+            for name, value in header_pairs
+            if (fold_cache.get(name) or fold(name)) not in ignored
+        }
+
+
+def lookup_headers(header_pairs, names):
+    """ look up headers case insensitively, in one pass over header pairs.
+
+    Args:
+        header_pairs (iterable): (name, value) pairs.
+        names (list): header names to look up.
+
+    Returns:
+        dict: value of each header found, keyed by name as in names. The last
+            value wins if a header is repeated.
+
+    """
+    wanted = dict((fold(name), name) for name in names)
+    found = {}
+    for name, value in header_pairs:
+        wanted_name = wanted.get(fold(name))
+        if wanted_name is not None:
+            found[wanted_name] = value
+
+    return found
+
+
+def load_header_filter(config_path=None, allow=None, deny=None):
+    """ make header filter of config file and lists, lists are added to lists in
+        config file.
+
+    Raises:
+        exceptions.FileFormatError: config file content error.
+
+    """
+    allow = list(allow or [])
+    deny = list(deny or [])
+    if config_path:
+        # PyYAML is only needed for config files, which are JSON or YAML
+        import yaml
+
+        with io.open(config_path, encoding="utf-8") as f:
+            try:
+                config = yaml.safe_load(f) or {}
+            except yaml.YAMLError as ex:
+                raise FileFormatError(
+                    "headers config content error: {}, {}".format(config_path, ex))
+
+        if not isinstance(config, dict):
+            raise FileFormatError(
+                "headers config should be a mapping: {}".format(config_path))
+
+        for key, names in [("allow", allow), ("deny", deny)]:
+            value = config.get(key) or []
+            if not isinstance(value, list):
+                raise FileFormatError(
+                    "headers config {} should be a list: {}".format(key, config_path))
+            names.extend(value)
+
+    return HeaderFilter(allow, deny)
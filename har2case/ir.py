@@ -0,0 +1,253 @@
+""" Compact intermediate representation of HAR entries.
+
+Only the fields used to make teststeps are kept, in slotted objects instead of
+nested dicts. Param lists are tuples of (name, value) pairs, and so are header
+lists once iterated, with interned header names. No mapping is built per entry
+unless a teststep field needs one. Response content text is kept as loaded,
+and decoded from base64 only when its bytes are needed. Texts loaded as lazy
+slices of a mapped HAR file (see har2case.mapped) are decoded on first use.
+
+Usage:
+    >>> entry = make_entry(entry_json)
+    >>> entry.request.method
+    'POST'
+    >>> entry.response.headers.get("Content-Type")
+    'application/json; charset=utf-8'
+
+"""
+
+import base64
+
+from har2case.compat import basestring, is_py2
+from har2case.exceptions import FileFormatError
+from har2case.mapped import LazyText, decode_text
+
+if is_py2:
+    # intern() only takes byte strings on Python 2, names are loaded as unicode
+    def _intern(name):
+        return name
+else:
+    import sys
+    _intern = sys.intern
+
+
+def _make_pairs(items):
+    """ convert HAR name/value list to tuple of (name, value) pairs.
+    """
+    if not items:
+        return ()
+
+    return tuple([(item["name"], item.get("value")) for item in items])
+
+
+class Headers(object):
+    """ header list of HAR entry, as a tuple of (name, value) pairs with interned
+        names. Pairs are made on first iteration, headers only looked up by name,
+        e.g. response headers, are read from HAR list directly.
+    """
+
+    __slots__ = ("_headers_json", "_items")
+
+    def __init__(self, headers_json=None):
+        self._headers_json = headers_json or ()
+        self._items = None
+
+    @property
+    def items(self):
+        if self._items is None:
+            self._items = tuple([
+                (_intern(item["name"]), item.get("value"))
+                for item in self._headers_json
+            ])
+            self._headers_json = None
+
+        return self._items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self._items if self._items is not None else self._headers_json)
+
+    def get(self, name, default=None):
+        """ value of the last header named name, as in a dict of headers.
+        """
+        if self._items is not None:
+            for header_name, value in reversed(self._items):
+                if header_name == name:
+                    return value
+        else:
+            for item in reversed(self._headers_json):
+                if item["name"] == name:
+                    return item.get("value")
+
+        return default
+
+
+class Request(object):
+    """ HAR entry request.
+
+    post_text is None and post_params are set if postData has no text, as
+    text and params fields are mutually exclusive.
+    """
+
+    __slots__ = ("method", "url", "query", "headers", "post_mime_type", "_post_text",
+                 "post_params")
+
+    def __init__(self, method=None, url=None, query=(), headers=None, post_mime_type=None,
+                 post_text=None, post_params=()):
+        self.method = method
+        self.url = url
+        self.query = query
+        self.headers = headers if headers is not None else Headers()
+        self.post_mime_type = post_mime_type
+        self._post_text = post_text
+        self.post_params = post_params
+
+    @property
+    def post_text(self):
+        self._post_text = decode_text(self._post_text)
+        return self._post_text
+
+
+class Response(object):
+    """ HAR entry response, content text is kept undecoded, and may be a lazy text
+        slice.
+    """
+
+    __slots__ = ("status", "headers", "mime_type", "text", "encoding")
+
+    def __init__(self, status=None, headers=None, mime_type=None, text=None, encoding=None):
+        self.status = status
+        self.headers = headers if headers is not None else Headers()
+        self.mime_type = mime_type
+        self.text = text
+        self.encoding = encoding
+
+    @property
+    def is_base64(self):
+        return self.encoding == "base64"
+
+    @property
+    def body_size(self):
+        """ size of content in bytes, estimated for base64 content without decoding.
+        """
+        if not self.text:
+            return 0
+        return len(self.text) * 3 // 4 if self.is_base64 else len(self.text)
+
+    def body_text(self):
+        """ content text as str, lazy text is decoded on each call.
+        """
+        return decode_text(self.text)
+
+    def body(self):
+        """ content decoded from base64 as bytes, or text as is, decoded on each call.
+        """
+        text = self.body_text()
+        if text and self.is_base64:
+            try:
+                return base64.b64decode(text)
+            except (TypeError, ValueError) as ex:
+                raise FileFormatError(
+                    "HAR entry content error: invalid base64 text, {!r}".format(ex))
+        return text
+
+
+class Entry(object):
+
+    __slots__ = ("request", "response")
+
+    def __init__(self, request, response):
+        self.request = request
+        self.response = response
+
+
+def get_object(parent_json, key):
+    """ get HAR object field of parent_json, {} if missing.
+
+    Raises:
+        exceptions.FileFormatError: field is not an object.
+
+    """
+    value = parent_json.get(key)
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise FileFormatError("HAR entry error: {} is not an object, {!r}".format(key, value))
+
+    return value
+
+
+def _get_string(parent_json, key):
+    value = parent_json.get(key)
+    if value is not None and not isinstance(value, (basestring, LazyText)):
+        raise FileFormatError("HAR entry error: {} is not a string, {!r}".format(key, value))
+
+    return value
+
+
+def _get_name_value_list(parent_json, key):
+    """ get HAR name/value list field, checking that items are objects with names.
+    """
+    items = parent_json.get(key)
+    if not items:
+        return None
+
+    if not isinstance(items, list) \
+            or not all(isinstance(item, dict) and "name" in item for item in items):
+        raise FileFormatError(
+            "HAR entry error: {} is not a list of name/value objects.".format(key))
+
+    return items
+
+
+def make_request(request_json):
+    post_data = get_object(request_json, "postData")
+    if "text" in post_data:
+        post_text, post_params = _get_string(post_data, "text"), None
+    else:
+        post_text, post_params = None, _make_pairs(_get_name_value_list(post_data, "params"))
+
+    return Request(
+        _get_string(request_json, "method"),
+        _get_string(request_json, "url"),
+        _make_pairs(_get_name_value_list(request_json, "queryString")),
+        Headers(_get_name_value_list(request_json, "headers")),
+        _get_string(post_data, "mimeType"),
+        post_text,
+        post_params
+    )
+
+
+def make_response(response_json):
+    content = get_object(response_json, "content")
+    return Response(
+        response_json.get("status"),
+        Headers(_get_name_value_list(response_json, "headers")),
+        _get_string(content, "mimeType"),
+        _get_string(content, "text"),
+        content.get("encoding")
+    )
+
+
+def make_entry(entry_json):
+    """ make entry IR of HAR log entry, entries already made are returned as is.
+
+    Raises:
+        exceptions.FileFormatError: entry has no request, or fields of wrong types.
+
+    """
+    if isinstance(entry_json, Entry):
+        return entry_json
+
+    if not isinstance(entry_json, dict):
+        raise FileFormatError("HAR entry error: entry is not an object, {!r}".format(entry_json))
+
+    if "request" not in entry_json:
+        raise FileFormatError("HAR entry error: request missed in entry.")
+
+    return Entry(
+        make_request(get_object(entry_json, "request")),
+        make_response(get_object(entry_json, "response"))
+    )
@@ -0,0 +1,305 @@
+""" Memory-mapped HAR loading.
+
+Plain HAR files on local disk are mapped into memory and parsed straight from
+the mapped bytes, instead of being read into bytes and decoded into a str
+copy first. Large string values of "text" fields, i.e. request postData and
+response content, can be left in the mapping as LazyText slices, which are
+decoded only when a teststep builder needs them. Captures full of images,
+scripts and pages never decode most of their bytes.
+
+The mapping stays open as long as entries or lazy slices refer to it.
+
+Usage:
+    >>> entries = load_mapped_har_log_entries("demo.har", lazy_text_size=64 * 1024)
+    >>> text = entries[0]["response"]["content"]["text"]
+    >>> text.decode() if isinstance(text, LazyText) else text
+
+"""
+
+import codecs
+import io
+import mmap
+
+from har2case import codec
+from har2case.exceptions import FileFormatError
+
+# text values larger than this, in bytes, are kept as lazy slices by default
+LAZY_TEXT_SIZE = 64 * 1024
+
+_TEXT_KEY = b'"text"'
+
+_WHITESPACE = b" \t\n\r"
+
+# whitespace looked at around keys, keys with longer indentation are not cut
+_MAX_INDENT_LENGTH = 256
+
+# lazy text is replaced with this string while parsing, followed by its index
+_PLACEHOLDER_PREFIX = u"\x00har2case-lazy-text:"
+_PLACEHOLDER = b'"\\u0000har2case-lazy-text:%d"'
+
+_text_type = type(_PLACEHOLDER_PREFIX)
+
+# (entry field, field) of objects with "text" values in HAR entries
+_TEXT_PARENTS = (("request", "postData"), ("response", "content"))
+
+
+class LazyText(object):
+    """ JSON string value left undecoded in HAR file mapping.
+
+    len() is the size of the raw JSON literal, which is the text length for
+    ASCII text without escapes, e.g. base64 content. Lazy texts are pickled as
+    decoded str, as mappings can not be shared with other processes.
+    """
+
+    __slots__ = ("buffer", "start", "end")
+
+    def __init__(self, buffer, start, end):
+        # buffer[start:end] is the literal without quotes
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __bool__(self):
+        return self.end > self.start
+
+    __nonzero__ = __bool__
+
+    def decode(self):
+        """ decode JSON string literal to str, decoded on each call.
+        """
+        return codec.loads(self.buffer[self.start - 1:self.end + 1])
+
+    def __str__(self):
+        return self.decode()
+
+    def __repr__(self):
+        return "<LazyText {} bytes>".format(len(self))
+
+    def __eq__(self, other):
+        if isinstance(other, LazyText):
+            other = other.decode()
+        return self.decode() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.decode())
+
+    def __reduce__(self):
+        return (_text_type, (self.decode(),))
+
+
+def decode_text(value):
+    """ decode value if it is lazy text, other values are returned as is.
+    """
+    if isinstance(value, LazyText):
+        return value.decode()
+    return value
+
+
+def decode_entry_texts(entry_json):
+    """ return entry with lazy texts of postData and content decoded, entry is
+        copied only as deep as needed, and returned as is if nothing is lazy.
+    """
+    for parent_key, key in _TEXT_PARENTS:
+        try:
+            text = entry_json[parent_key][key]["text"]
+        except (KeyError, TypeError):
+            continue
+
+        if isinstance(text, LazyText):
+            entry_json = dict(entry_json)
+            entry_json[parent_key] = dict(entry_json[parent_key])
+            entry_json[parent_key][key] = dict(entry_json[parent_key][key], text=text.decode())
+
+    return entry_json
+
+
+def _map_file(file_path):
+    """ map file read-only, return None if it can not be mapped, e.g. pipes.
+    """
+    with io.open(file_path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, mmap.error, OSError):
+            # empty files, and files which are not regular files
+            return None
+
+
+def _view(buffer, start):
+    """ view of buffer from start without copying, or a bytes slice of it if
+        buffer has no buffer interface, e.g. mappings on Python 2.
+    """
+    try:
+        return memoryview(buffer)[start:]
+    except TypeError:
+        return buffer[start:]
+
+
+def _find_text_value(buffer, pos):
+    """ find string value of the next "text" key from pos, return offset of the
+        opening quote of value, or -1.
+
+    Valid JSON only has unescaped quotes as string delimiters, so "text" after
+    { or , and followed by : is always a key, wherever the search starts.
+    """
+    while True:
+        key_pos = buffer.find(_TEXT_KEY, pos)
+        if key_pos < 0:
+            return -1
+
+        pos = key_pos + len(_TEXT_KEY)
+        before = buffer[max(key_pos - _MAX_INDENT_LENGTH, 0):key_pos].rstrip(_WHITESPACE)
+        if not before.endswith((b"{", b",")):
+            continue
+
+        after = buffer[pos:pos + _MAX_INDENT_LENGTH]
+        separator = after.lstrip(_WHITESPACE)
+        if not separator.startswith(b":"):
+            continue
+
+        value = separator[1:].lstrip(_WHITESPACE)
+        if value.startswith(b'"'):
+            return pos + len(after) - len(value)
+
+
+def _find_string_end(buffer, pos):
+    """ find closing quote of string starting at pos, return its offset, or -1.
+    """
+    while True:
+        quote_pos = buffer.find(b'"', pos)
+        if quote_pos < 0:
+            return -1
+
+        backslash_pos = quote_pos
+        while buffer[backslash_pos - 1:backslash_pos] == b"\\":
+            backslash_pos -= 1
+
+        if (quote_pos - backslash_pos) % 2 == 0:
+            return quote_pos
+
+        pos = quote_pos + 1
+
+
+def _cut_lazy_texts(buffer, start, lazy_text_size):
+    """ split document into segments around text values larger than
+        lazy_text_size, which are replaced with placeholders.
+
+    Returns:
+        tuple: (document bytes with placeholders, list of LazyText), None if
+            there is no large text value.
+
+    """
+    segments = []
+    lazy_texts = []
+    pos = search_pos = start
+    while True:
+        quote_pos = _find_text_value(buffer, search_pos)
+        if quote_pos < 0:
+            break
+
+        text_start = quote_pos + 1
+        text_end = _find_string_end(buffer, text_start)
+        if text_end < 0:
+            raise ValueError("unterminated string at byte {}".format(text_start))
+
+        # text values are scanned once, their content is never searched for keys
+        search_pos = text_end + 1
+        if text_end - text_start < lazy_text_size:
+            continue
+
+        segments.append(buffer[pos:text_start - 1])
+        segments.append(_PLACEHOLDER % len(lazy_texts))
+        lazy_texts.append(LazyText(buffer, text_start, text_end))
+        pos = text_end + 1
+
+    if not lazy_texts:
+        return None
+
+    segments.append(buffer[pos:])
+    return b"".join(segments), lazy_texts
+
+
+def _restore_lazy_texts(value, lazy_texts):
+    """ replace placeholders in parsed value with lazy texts, in place.
+    """
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return
+
+    for key, item in list(items):
+        if isinstance(item, (dict, list)):
+            _restore_lazy_texts(item, lazy_texts)
+        elif isinstance(item, _text_type) and item.startswith(_PLACEHOLDER_PREFIX):
+            value[key] = lazy_texts[int(item[len(_PLACEHOLDER_PREFIX):])]
+
+
+def _restore_entry_lazy_texts(entries, lazy_texts):
+    """ replace placeholders in postData and content of entries, return False if
+        placeholders are left elsewhere.
+    """
+    restored_count = 0
+    prefix = _PLACEHOLDER_PREFIX
+    for entry_json in entries:
+        for parent_key, key in _TEXT_PARENTS:
+            try:
+                fields = entry_json[parent_key][key]
+                text = fields["text"]
+            except (KeyError, TypeError):
+                continue
+
+            if isinstance(text, _text_type) and text.startswith(prefix):
+                fields["text"] = lazy_texts[int(text[len(prefix):])]
+                restored_count += 1
+
+    return restored_count == len(lazy_texts)
+
+
+def load_mapped_har_log_entries(file_path, lazy_text_size=LAZY_TEXT_SIZE):
+    """ load log entries of plain HAR file, parsed from its memory mapping.
+
+    Args:
+        file_path (str): HAR file path, compressed files are not supported.
+        lazy_text_size (int): "text" values larger than this, in bytes, are kept
+            as LazyText, None to decode all values.
+
+    Returns:
+        list: entries, as loaded by utils.load_har_log_entries.
+
+    Raises:
+        exceptions.FileFormatError: HAR file content error.
+
+    """
+    buffer = _map_file(file_path)
+    if buffer is None:
+        with io.open(file_path, "rb") as f:
+            buffer = f.read()
+
+    start = len(codecs.BOM_UTF8) if buffer[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+    try:
+        cut = None
+        if lazy_text_size is not None:
+            cut = _cut_lazy_texts(buffer, start, lazy_text_size)
+
+        if cut is None:
+            content_json = codec.loads_buffer(_view(buffer, start))
+        else:
+            document, lazy_texts = cut
+            content_json = codec.loads(document)
+
+        entries = content_json["log"]["entries"]
+        if cut is not None and not _restore_entry_lazy_texts(entries, lazy_texts):
+            # "text" keys outside of postData and content
+            _restore_lazy_texts(content_json, lazy_texts)
+
+        return entries
+    except (KeyError, TypeError, ValueError) as ex:
+        raise FileFormatError(
+            "HAR file content error: {}, {!r}".format(file_path, ex))
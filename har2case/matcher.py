@@ -0,0 +1,199 @@
+""" Compiled filter and exclude rules of HAR entries.
+
+Filter and exclude expressions are rules joined with '|'. Rules are compiled
+once, and all rules of the same scope are combined into one regex, so each
+entry is checked with a single search per scope whatever the count of rules.
+
+    keyword             url includes keyword
+    url:keyword         same as keyword
+    host:keyword        host of url includes keyword, case insensitive
+    path:keyword        path of url includes keyword
+    method:POST         request method is POST, case insensitive
+    status:404          response status is 404, e.g. status:re:^5 for 5xx
+    mime:keyword        response content mimeType includes keyword
+    re:pattern          url matches regex pattern, scopes can be combined with
+                        regex as well, e.g. path:re:^/api/v\\d+/
+
+A literal '|' in a rule is escaped as '\\|'.
+
+An entry is converted if it matches at least one filter rule of every scope
+used in filter expression, and is not converted if it matches any exclude rule.
+
+Usage:
+    >>> matcher = EntryMatcher("host:httprunner.org|method:POST", "re:\\.(js|css)$")
+    >>> matcher.check_entry(entry_json)
+    'excluded'
+
+"""
+
+import re
+
+from har2case.exceptions import FileFormatError, ParamsError
+from har2case.ir import get_object
+from har2case.urls import parse_url
+
+SCOPES = ["url", "host", "path", "method", "status", "mime"]
+
+FILTERED = "filtered"
+EXCLUDED = "excluded"
+
+_RULE_SEPARATOR_RE = re.compile(r"(?<!\\)\|")
+_REGEX_PREFIX = "re:"
+_IGNORECASE_SCOPES = ("host", "method")
+_EXACT_SCOPES = ("method", "status")
+
+
+def parse_rules(expression):
+    """ parse filter or exclude expression.
+
+    Args:
+        expression (str): rules joined with '|'.
+
+    Returns:
+        list: (scope, regex pattern str) of each rule.
+
+    Raises:
+        ParamsError: invalid regex pattern.
+
+    """
+    rules = []
+    if not expression:
+        return rules
+
+    for rule in _RULE_SEPARATOR_RE.split(expression):
+        rule = rule.replace("\\|", "|")
+        scope = "url"
+        prefix, separator, value = rule.partition(":")
+        if separator and prefix in SCOPES:
+            scope, rule = prefix, value
+
+        if rule.startswith(_REGEX_PREFIX):
+            pattern = rule[len(_REGEX_PREFIX):]
+            try:
+                re.compile(pattern)
+            except re.error as ex:
+                raise ParamsError("invalid regex in rule {!r}: {}".format(rule, ex))
+        elif scope in _EXACT_SCOPES:
+            pattern = "^{}$".format(re.escape(rule.strip()))
+        else:
+            pattern = re.escape(rule)
+
+        if pattern:
+            rules.append((scope, pattern))
+
+    return rules
+
+
+def compile_rules(expression):
+    """ compile rules of expression to one regex per scope.
+
+    Returns:
+        list: (scope, compiled regex) of each scope used, in order of SCOPES.
+
+    """
+    patterns = {}
+    for scope, pattern in parse_rules(expression):
+        patterns.setdefault(scope, []).append(pattern)
+
+    compiled_rules = []
+    for scope in SCOPES:
+        if scope not in patterns:
+            continue
+
+        flags = re.IGNORECASE if scope in _IGNORECASE_SCOPES else 0
+        combined_pattern = "|".join(
+            "(?:{})".format(pattern) for pattern in patterns[scope]
+        )
+        try:
+            compiled_rules.append((scope, re.compile(combined_pattern, flags)))
+        except re.error as ex:
+            # e.g. the same group name used in two regex rules
+            raise ParamsError("invalid {} rules {!r}: {}".format(scope, expression, ex))
+
+    return compiled_rules
+
+
+class EntryMatcher(object):
+    """ check HAR entries against filter and exclude expressions.
+
+    Args:
+        filter_str (str): only entries matching filter rules will be converted.
+        exclude_str (str): entries matching any exclude rule will be ignored.
+
+    """
+
+    def __init__(self, filter_str=None, exclude_str=None):
+        self.filter_rules = compile_rules(filter_str)
+        self.exclude_rules = compile_rules(exclude_str)
+
+        scopes = set(
+            scope for scope, _ in self.filter_rules + self.exclude_rules
+        )
+        self.parse_url = bool(scopes & {"host", "path"})
+
+    def __bool__(self):
+        return bool(self.filter_rules or self.exclude_rules)
+
+    __nonzero__ = __bool__
+
+    def _make_fields(self, url, method, mime_type, status):
+        fields = {
+            "url": url or "",
+            "method": method or "",
+            "mime": mime_type or "",
+            "status": "" if status is None else str(status)
+        }
+        if self.parse_url:
+            try:
+                url_parts = parse_url(fields["url"])
+                fields["host"] = url_parts.host
+                fields["path"] = url_parts.path
+            except ValueError:
+                fields["host"] = fields["path"] = ""
+
+        return fields
+
+    def check(self, url, method=None, mime_type=None, status=None):
+        """ check entry fields.
+
+        Args:
+            url (str): request url, None if missing.
+            method (str): request method.
+            mime_type (str): response content mimeType.
+            status (int): response status.
+
+        Returns:
+            str: FILTERED or EXCLUDED if entry should be dropped, otherwise None.
+
+        """
+        fields = self._make_fields(url, method, mime_type, status)
+        for scope, regex in self.filter_rules:
+            if not regex.search(fields[scope]):
+                return FILTERED
+
+        for scope, regex in self.exclude_rules:
+            if regex.search(fields[scope]):
+                return EXCLUDED
+
+        return None
+
+    def check_entry(self, entry_json):
+        """ check HAR log entry, missing fields are matched as empty strings.
+            Only the fields in reader.ENTRY_FILTER_FIELDS are used.
+
+        Raises:
+            exceptions.FileFormatError: entry or its request, response or content
+                is not an object.
+
+        """
+        if not isinstance(entry_json, dict):
+            raise FileFormatError(
+                "HAR entry error: entry is not an object, {!r}".format(entry_json))
+
+        request = get_object(entry_json, "request")
+        response = get_object(entry_json, "response")
+        content = get_object(response, "content")
+        return self.check(
+            request.get("url"), request.get("method"), content.get("mimeType"),
+            response.get("status")
+        )
@@ -0,0 +1,260 @@
+""" Merge HAR files into a single testsuite.
+
+Recordings of the same product repeat the same leading requests, e.g. login
+and config calls. HAR files are converted one by one with the same options
+and one teststeps cache, and written as an HttpRunner testsuite:
+
+    suite/
+        testsuite.json           references testcase of each HAR file
+        testcases/common.json    leading teststeps common to all HAR files
+        testcases/demo.json      teststeps of demo.har after common ones
+
+Testcases of HAR files start with a teststep referencing the common testcase.
+Common teststeps are found while converting, in a single pass: only leading
+teststeps of the first HAR file, at most max_prefix_steps, are kept in memory,
+and other teststeps are spooled to temporary files until the common prefix
+is known. Memory use does not grow with count or size of HAR files.
+
+Usage:
+    >>> testsuite_file, failures = merge_har_files(["a.har", "b.har"], "suite")
+
+"""
+
+import io
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+
+from har2case import codec, utils, writers
+from har2case.compression import strip_har_suffix
+from har2case.core import HarParser
+from har2case.exceptions import ParamsError
+
+# leading teststeps of the first HAR file compared with other HAR files
+DEFAULT_MAX_PREFIX_STEPS = 50
+
+TESTSUITE_NAME = "testsuite"
+TESTCASES_DIR = "testcases"
+COMMON_TESTCASE_NAME = "common"
+
+
+class _MergedTestcase(object):
+    """ testcase of a HAR file, with teststeps after matched_count leading
+        teststeps spooled to spool_file.
+    """
+
+    __slots__ = ("har_file_path", "name", "matched_count", "spool_file")
+
+    def __init__(self, har_file_path, name, matched_count, spool_file):
+        self.har_file_path = har_file_path
+        self.name = name
+        self.matched_count = matched_count
+        self.spool_file = spool_file
+
+
+def _make_testcase_name(har_file_path, used_names):
+    """ name testcase after HAR file, names are made unique with a number suffix.
+    """
+    base_name = os.path.basename(strip_har_suffix(har_file_path))
+    name = base_name
+    index = 1
+    while name in used_names:
+        index += 1
+        name = "{}_{}".format(base_name, index)
+
+    used_names.add(name)
+    return name
+
+
+def _count_matched(teststeps, prefix, limit):
+    """ consume leading teststeps equal to prefix teststeps, at most limit.
+
+    Returns:
+        tuple: (matched count, list of the first teststep not matched, if any)
+
+    """
+    for index in range(limit):
+        teststep = next(teststeps, None)
+        if teststep is None:
+            return index, []
+        if teststep != prefix[index]:
+            return index, [teststep]
+
+    return limit, []
+
+
+def _spool_teststeps(teststeps, spool_file):
+    with io.open(spool_file, "w", encoding="utf-8") as f:
+        for teststep in teststeps:
+            # line breaks in strings are escaped, each teststep takes one line
+            f.write(codec.dumps(teststep))
+            f.write(u"\n")
+
+
+def _iter_spooled_teststeps(spool_file):
+    with io.open(spool_file, encoding="utf-8") as f:
+        for line in f:
+            yield codec.loads(line)
+
+
+def _write_testcase(testcase_file, file_type, fmt_version, config, teststeps):
+    with io.open(testcase_file, "w", encoding="utf-8") as outfile:
+        writer = writers.make_testcase_writer(file_type, outfile, fmt_version)
+        writer.write_config(config)
+        for teststep in teststeps:
+            writer.write_teststep(teststep)
+        writer.close()
+
+
+def _write_testsuite(testsuite_file, file_type, fmt_version, testcases):
+    """ write testsuite in HttpRunner format of fmt_version, testcases are keyed
+        by name in v1, and listed with their names in v2.
+
+    Args:
+        testcases (list): (name, path) of testcases.
+
+    """
+    if fmt_version == "v1":
+        testsuite_testcases = {
+            name: {"testcase": path}
+            for name, path in testcases
+        }
+    else:
+        testsuite_testcases = [
+            {"name": name, "testcase": path}
+            for name, path in testcases
+        ]
+
+    testsuite = {
+        "config": {
+            "name": "testsuite description",
+            "variables": {}
+        },
+        "testcases": testsuite_testcases
+    }
+    with io.open(testsuite_file, "w", encoding="utf-8") as outfile:
+        if file_type == "JSON":
+            outfile.write(codec.dumps(testsuite, indent=4))
+        else:
+            utils.yaml_dump(testsuite, outfile)
+
+
+def merge_har_files(har_files, output_dir, file_type="JSON", fmt_version="v1",
+                    max_prefix_steps=DEFAULT_MAX_PREFIX_STEPS, **options):
+    """ convert HAR files into a testsuite in output_dir, with leading teststeps
+        common to all HAR files hoisted into a common testcase.
+
+    Args:
+        har_files (list): HAR file paths, plain or compressed.
+        output_dir (str): directory of testsuite and testcases, created if missing.
+        file_type (str): JSON or YAML/YML.
+        fmt_version (str): testcase format version, v1 or v2.
+        max_prefix_steps (int): max common leading teststeps hoisted.
+        options: HarParser arguments, e.g. filter_str or cache_dir.
+
+    Returns:
+        tuple: (testsuite file path, list of (har_file_path, error) of HAR files
+            failed to convert, which are left out of testsuite).
+
+    Raises:
+        exceptions.ParamsError: incremental conversion is requested, merged
+            testcases are always converted from scratch, or correlation is
+            requested, variables extracted in common teststeps are not visible
+            to testcases referencing them.
+
+    """
+    if options.get("incremental"):
+        raise ParamsError("incremental conversion is not supported in merge mode.")
+    if options.get("correlate"):
+        raise ParamsError("correlation is not supported in merge mode.")
+
+    extension = file_type.lower()
+    testcases_dir = os.path.join(output_dir, TESTCASES_DIR)
+    if not os.path.isdir(testcases_dir):
+        os.makedirs(testcases_dir)
+
+    # leading teststeps of the first HAR file converted, and count of them common
+    # to all HAR files converted so far
+    prefix = None
+    prefix_count = 0
+    merged_testcases = []
+    failures = []
+    used_names = set([COMMON_TESTCASE_NAME])
+    shared_cache = None
+    spool_dir = tempfile.mkdtemp(prefix=".har2case-merge-", dir=output_dir)
+    try:
+        for har_file_path in har_files:
+            har_parser = HarParser(har_file_path, **options)
+            if shared_cache is None:
+                shared_cache = har_parser._open_cache()
+            har_parser._shared_cache = shared_cache
+
+            spool_file = os.path.join(spool_dir, "{}.jsonl".format(len(merged_testcases)))
+            try:
+                teststeps = har_parser.iter_teststeps()
+                if prefix is None:
+                    first_prefix = list(itertools.islice(teststeps, max_prefix_steps))
+                    matched_count, unmatched = len(first_prefix), []
+                else:
+                    matched_count, unmatched = _count_matched(teststeps, prefix, prefix_count)
+
+                _spool_teststeps(itertools.chain(unmatched, teststeps), spool_file)
+            except Exception as ex:
+                logging.error("Failed to convert {}: {}".format(har_file_path, ex))
+                failures.append((har_file_path, "{}: {}".format(type(ex).__name__, ex)))
+                continue
+
+            if prefix is None:
+                prefix = first_prefix
+                prefix_count = matched_count
+            else:
+                prefix_count = min(prefix_count, matched_count)
+
+            merged_testcases.append(_MergedTestcase(
+                har_file_path, _make_testcase_name(har_file_path, used_names),
+                matched_count, spool_file
+            ))
+            logging.debug("Converted {}, {} leading teststeps in common.".format(
+                har_file_path, prefix_count))
+
+        # teststeps are common only if they are shared by more than one HAR file
+        if len(merged_testcases) < 2:
+            prefix_count = 0
+
+        testsuite_testcases = []
+        if prefix_count:
+            common_path = "{}/{}.{}".format(TESTCASES_DIR, COMMON_TESTCASE_NAME, extension)
+            _write_testcase(
+                os.path.join(output_dir, common_path), file_type, fmt_version,
+                {"name": COMMON_TESTCASE_NAME, "variables": {}}, prefix[:prefix_count]
+            )
+
+        for testcase in merged_testcases:
+            teststeps = itertools.chain(
+                prefix[prefix_count:testcase.matched_count],
+                _iter_spooled_teststeps(testcase.spool_file)
+            )
+            if prefix_count:
+                common_step = {"name": "common teststeps", "testcase": common_path}
+                teststeps = itertools.chain([common_step], teststeps)
+
+            testcase_path = "{}/{}.{}".format(TESTCASES_DIR, testcase.name, extension)
+            _write_testcase(
+                os.path.join(output_dir, testcase_path), file_type, fmt_version,
+                {"name": testcase.name, "variables": {}}, teststeps
+            )
+            os.remove(testcase.spool_file)
+            testsuite_testcases.append((testcase.name, testcase_path))
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        if shared_cache is not None:
+            shared_cache.close()
+
+    testsuite_file = os.path.join(output_dir, "{}.{}".format(TESTSUITE_NAME, extension))
+    _write_testsuite(testsuite_file, file_type, fmt_version, testsuite_testcases)
+    logging.info(
+        "Merged {} HAR files into testsuite: {}, {} common teststeps hoisted.".format(
+            len(merged_testcases), testsuite_file, prefix_count))
+    return testsuite_file, failures
@@ -0,0 +1,632 @@
+""" Incremental HAR reader.
+
+A HAR file is a single JSON document, but only the ``log.entries`` array is
+needed for conversion. The reader in this module pulls the file chunk by
+chunk, locates ``log.entries`` and decodes the array elements one at a time,
+so peak memory is bounded by the largest single entry instead of the whole
+archive.
+
+Usage:
+    >>> for entry_json in iter_har_log_entries("demo.har"):
+    ...     print(entry_json["request"]["url"])
+
+"""
+
+import base64
+import codecs
+import collections
+import io
+import json
+import re
+
+from har2case import codec
+from har2case.compat import builtin_str
+from har2case.compression import open_har_file
+from har2case.exceptions import FileFormatError, ParamsError
+
+try:
+    from json.decoder import JSONDecodeError
+except ImportError:
+    JSONDecodeError = ValueError
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL_RE = re.compile(r"[0-9.eE+-]*")
+
+# longest JSON literal, used to tell truncated data from malformed data
+_MAX_LITERAL_LENGTH = len("false")
+
+# stop guessing element ends after this many wrong guesses
+_MAX_FAST_READ_MISSES = 3
+
+_MAX_INDENT_LENGTH = 256
+
+# entries smaller than this are decoded and checked as a whole even if they may
+# be skipped, walking them key by key in Python is slower than decoding in C.
+_MAX_DECODED_SKIPPED_ENTRY_SIZE = 32 * 1024
+
+_FIRST_KEY_RE = re.compile(r'\{[ \t\n\r]*("[^"\\]*")')
+
+# run of complete strings and chars other than quotes and brackets
+_SKIPPABLE_RE = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+_BASE64_INVALID_CHAR_RE = re.compile(r"[^A-Za-z0-9+/=]")
+
+_MISSING = object()
+
+# HAR sources of these types are file paths, bytes are HAR content on Python 3
+_PATH_TYPES = (type(u""), builtin_str)
+
+# entry fields decoded to decide whether an entry is skipped, True marks a leaf,
+# and bodies are walked into so that their text is skipped without decoding.
+ENTRY_FILTER_FIELDS = {
+    u"request": {
+        u"url": True,
+        u"method": True,
+        u"postData": {}
+    },
+    u"response": {
+        u"status": True,
+        u"content": {
+            u"mimeType": True
+        }
+    }
+}
+
+
+class _TextScanner(object):
+    """ minimal pull scanner over a JSON document read from a binary file object.
+
+    Values are decoded with the C accelerated ``JSONDecoder.raw_decode``. When a
+    value is cut off by the end of buffer, more data is read and decoding is
+    retried, with read size doubled each time so that huge values are decoded
+    in amortized linear time.
+
+    If a fast JSON backend is given, array elements of pretty-printed documents
+    are decoded with it instead: the end of an element is guessed from the
+    indentation of its first line, and the guess is verified by decoding.
+    """
+
+    def __init__(self, fp, chunk_size=DEFAULT_CHUNK_SIZE, fast_loads=None, offset=None):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.raw_decode = json.JSONDecoder().raw_decode
+        self.fast_loads = fast_loads
+        self.fast_read_misses = 0
+        self.buf = u""
+        self.pos = 0
+        self.eof = False
+        # byte offset in file of buf[offset_pos], tracked if offset is given
+        self.offset = offset
+        self.offset_pos = 0
+
+    def fill(self, size=None):
+        """ read more data into buffer, return False on EOF.
+        """
+        if self.eof:
+            return False
+
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buf += self.decoder.decode(b"", final=True)
+            return False
+
+        self.buf += self.decoder.decode(chunk)
+        return True
+
+    def discard(self):
+        """ drop consumed data from buffer, once it is larger than a chunk.
+        """
+        if self.pos > self.chunk_size:
+            if self.offset is not None:
+                self.tell()
+                self.offset_pos = 0
+
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+    def tell(self):
+        """ byte offset in file of current position, scanner must be created with
+            offset of where reading starts.
+        """
+        self.offset += len(self.buf[self.offset_pos:self.pos].encode("utf-8"))
+        self.offset_pos = self.pos
+        return self.offset
+
+    def peek(self):
+        """ skip whitespaces and return next char, None on EOF.
+        """
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+
+            if not self.fill():
+                return None
+
+    def expect(self, chars):
+        char = self.peek()
+        if char is None or char not in chars:
+            raise ValueError(
+                "expecting one of {!r} at char {}, got {!r}".format(chars, self.pos, char))
+
+        self.pos += 1
+        return char
+
+    def _is_truncated(self, err):
+        pos = getattr(err, "pos", None)
+        if pos is None:
+            return True
+
+        msg = getattr(err, "msg", "")
+        return msg.startswith("Unterminated string") \
+            or pos >= len(self.buf) - _MAX_LITERAL_LENGTH
+
+    def read_value(self):
+        """ decode next JSON value, and move to the end of it.
+        """
+        self.peek()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self.raw_decode(self.buf, self.pos)
+            except JSONDecodeError as err:
+                if not (self._is_truncated(err) and self.fill(read_size)):
+                    raise
+            else:
+                # bare numbers may continue in next chunk, e.g. "-1" + ".5e3"
+                if self.buf[end - 1] in u'"]}' \
+                        or _NUMBER_TAIL_RE.match(self.buf, end).end() < len(self.buf) \
+                        or not self.fill(read_size):
+                    self.pos = end
+                    return value
+
+            read_size *= 2
+
+    def _read_object_fast(self):
+        """ decode next object with fast_loads, return _MISSING if end of object
+            can not be guessed.
+
+        Pretty-printed objects end with a closing bracket indented the same as
+        the line they start on, e.g. "\n    {...\n    }". A JSON object can not be
+        a prefix of another one, so if the guessed slice decodes, it is exact.
+        """
+        start = self.pos
+        line_start = self.buf.rfind(u"\n", max(0, start - _MAX_INDENT_LENGTH), start)
+        indent = self.buf[line_start + 1:start]
+        if line_start == -1 or indent.strip(u" \t"):
+            return _MISSING
+
+        closing = u"\n" + indent + u"}"
+        search_from = start
+        read_size = self.chunk_size
+        while True:
+            end = self.buf.find(closing, search_from)
+            if end != -1:
+                break
+
+            search_from = max(start, len(self.buf) - len(closing))
+            if not self.fill(read_size):
+                return _MISSING
+
+            read_size *= 2
+
+        end += len(closing)
+        try:
+            value = self.fast_loads(self.buf[start:end])
+        except ValueError:
+            value = None
+
+        if not isinstance(value, dict):
+            self.fast_read_misses += 1
+            return _MISSING
+
+        self.pos = end
+        return value
+
+    def read_element(self):
+        """ decode next array element, with fast_loads if possible.
+        """
+        if self.fast_loads and self.fast_read_misses < _MAX_FAST_READ_MISSES \
+                and self.peek() == u"{":
+            value = self._read_object_fast()
+            if value is not _MISSING:
+                return value
+
+        return self.read_value()
+
+    def skip_value(self):
+        """ move to the end of next value. Strings without escapes are skipped with
+            str.find, so large bodies are neither decoded nor copied; other values
+            are decoded and dropped.
+        """
+        if self.peek() == u'"':
+            start = self.pos
+            search_from = start + 1
+            read_size = self.chunk_size
+            while True:
+                end = self.buf.find(u'"', search_from)
+                if end != -1:
+                    break
+
+                search_from = len(self.buf)
+                if not self.fill(read_size):
+                    break
+
+                read_size *= 2
+
+            if end != -1 and self.buf.find(u"\\", start + 1, end) == -1:
+                self.pos = end + 1
+                return
+
+        self.read_value()
+
+    def skip_container(self):
+        """ move to the end of next object or array without decoding it. Consumed
+            data is dropped while skipping, so memory is bounded by chunk size.
+        """
+        depth = 0
+        read_size = self.chunk_size
+        while True:
+            self.pos = _SKIPPABLE_RE.match(self.buf, self.pos).end()
+            if self.pos == len(self.buf) or self.buf[self.pos] == u'"':
+                # string cut off by end of buffer
+                self.discard()
+                if not self.fill(read_size):
+                    raise ValueError("unterminated value at end of data")
+
+                read_size *= 2
+                continue
+
+            char = self.buf[self.pos]
+            self.pos += 1
+            read_size = self.chunk_size
+            if char in u"[{":
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth == 0:
+                return
+
+    def pluck_object(self, fields):
+        """ walk next object, decode values of keys in fields and skip other values.
+
+        Args:
+            fields (dict): key => True to decode value, or nested fields dict to
+                walk into, values of other keys are skipped.
+
+        Returns:
+            dict: decoded values, with the same nesting as fields.
+
+        """
+        plucked = {}
+        self.expect(u"{")
+        if self.peek() == u"}":
+            self.pos += 1
+            return plucked
+
+        while True:
+            name = self.read_value()
+            self.expect(u":")
+            sub_fields = fields.get(name)
+            if sub_fields is True:
+                plucked[name] = self.read_value()
+            elif sub_fields is not None and self.peek() == u"{":
+                plucked[name] = self.pluck_object(sub_fields)
+            else:
+                self.skip_value()
+
+            if self.expect(u",}") == u"}":
+                return plucked
+
+    def _is_small_object(self):
+        """ guess if next object is smaller than _MAX_DECODED_SKIPPED_ENTRY_SIZE.
+
+        Array elements mostly start with the same key, so the next element is
+        expected where the first key of this one appears again. The guess only
+        picks how the element is read, not what is read.
+        """
+        start = self.pos
+        while len(self.buf) - start < _MAX_DECODED_SKIPPED_ENTRY_SIZE and self.fill():
+            pass
+
+        match = _FIRST_KEY_RE.match(self.buf, start)
+        if match is None:
+            return False
+
+        return self.buf.find(
+            match.group(1), match.end(), start + _MAX_DECODED_SKIPPED_ENTRY_SIZE
+        ) != -1
+
+    def read_element_unless(self, fields, skip):
+        """ read next object element and return it, or _MISSING if skip(element)
+            is true.
+
+        Large elements are walked with pluck_object and skip is called with the
+        plucked fields only, so that elements skipped are never decoded.
+        """
+        if self.peek() != u"{" or self._is_small_object():
+            value = self.read_element()
+            return _MISSING if skip(value) else value
+
+        start = self.pos
+        if skip(self.pluck_object(fields)):
+            return _MISSING
+
+        if self.fast_loads:
+            return self.fast_loads(self.buf[start:self.pos])
+
+        return self.raw_decode(self.buf, start)[0]
+
+    def seek_key(self, key):
+        """ iterate over current object and stop right after ``"key":``.
+        """
+        self.expect(u"{")
+        if self.peek() == u"}":
+            raise KeyError(key)
+
+        while True:
+            name = self.read_value()
+            self.expect(u":")
+            if name == key:
+                return
+
+            self.read_value()
+            self.discard()
+            if self.expect(u",}") == u"}":
+                raise KeyError(key)
+
+    def iter_array(self, read_element=None, resume=False):
+        """ iterate over current array, and decode elements one by one.
+
+        Args:
+            read_element (callable): read next element, defaults to read_element.
+            resume (bool): scanner is right after an element of array, instead of
+                before the array.
+
+        """
+        read_element = read_element or self.read_element
+        if resume:
+            if self.expect(u",]") == u"]":
+                return
+        else:
+            self.expect(u"[")
+            if self.peek() == u"]":
+                self.pos += 1
+                return
+
+        while True:
+            self.discard()
+            yield read_element()
+            if self.expect(u",]") == u"]":
+                return
+
+
+class Base64Reader(object):
+    """ binary file object over base64 text, decoded chunk by chunk.
+    """
+
+    def __init__(self, text):
+        if _BASE64_INVALID_CHAR_RE.search(text):
+            # line breaks and other ignored chars break chunk alignment
+            text = _BASE64_INVALID_CHAR_RE.sub("", text)
+
+        self.text = text
+        self.pos = 0
+        self.decoded_bytes = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self.text)
+
+        # 4 base64 chars for every 3 bytes
+        end = self.pos + (size + 2) // 3 * 4
+        chunk = base64.b64decode(self.text[self.pos:end])
+        self.pos = end
+        self.decoded_bytes += len(chunk)
+        return chunk
+
+
+class TextReader(object):
+    """ binary file object over text, encoded to UTF-8 chunk by chunk.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self.text)
+
+        chunk = self.text[self.pos:self.pos + size]
+        self.pos += size
+        return chunk.encode("utf-8")
+
+
+def scan_object_scalars(fp, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ scan top level object of JSON document, without decoding nested values.
+
+    Args:
+        fp (file): binary file object, e.g. TextReader or Base64Reader.
+
+    Returns:
+        list: (key, value) of top level keys with scalar values, in the same order
+            as json.loads(document).items(). None if document is not an object.
+
+    Raises:
+        ValueError: invalid JSON document.
+
+    """
+    scanner = _TextScanner(fp, chunk_size)
+    if scanner.peek() != u"{":
+        # validate document, but there are no keys anyway
+        scanner.read_value()
+        return None
+
+    items = collections.OrderedDict()
+    scanner.expect(u"{")
+    if scanner.peek() == u"}":
+        return []
+
+    while True:
+        key = scanner.read_value()
+        scanner.expect(u":")
+        if scanner.peek() in (u"{", u"["):
+            scanner.skip_container()
+            value = _MISSING
+        else:
+            value = scanner.read_value()
+
+        # like json.loads, duplicate keys keep first position and last value
+        items[key] = value
+        scanner.discard()
+        if scanner.expect(u",}") == u"}":
+            break
+
+    if scanner.peek() is not None:
+        raise ValueError("extra data at char {}".format(scanner.pos))
+
+    return [
+        (key, value)
+        for key, value in items.items()
+        if value is not _MISSING
+    ]
+
+
+def iter_entries(scanner, skip_entry=None, resume=False, progress=None):
+    """ move scanner to log.entries, and yield entries one by one.
+
+    Args:
+        skip_entry (callable): called with each entry, or only ENTRY_FILTER_FIELDS
+            of large entries, entries are skipped if it returns true.
+        resume (bool): scanner is right after an entry, instead of at document start.
+        progress (dict): updated with entries_count and offset after each entry.
+
+    """
+    if not resume:
+        scanner.seek_key(u"log")
+        scanner.seek_key(u"entries")
+
+    if skip_entry is None:
+        read_element = None
+    else:
+        def read_element():
+            return scanner.read_element_unless(ENTRY_FILTER_FIELDS, skip_entry)
+
+    for entry_json in scanner.iter_array(read_element, resume):
+        if progress is not None:
+            progress["entries_count"] = progress.get("entries_count", 0) + 1
+            progress["offset"] = scanner.tell()
+
+        if entry_json is not _MISSING:
+            yield entry_json
+
+
+def iter_har_log_entries(file_path, chunk_size=DEFAULT_CHUNK_SIZE, skip_entry=None,
+                         start_offset=None, progress=None):
+    """ load HAR file incrementally and yield log entries one by one.
+
+    Args:
+        file_path (str)
+        chunk_size (int): bytes read from file at a time.
+        skip_entry (callable): called with each entry, entries are skipped if it
+            returns true. Large entries are passed with only the fields in
+            ENTRY_FILTER_FIELDS, e.g. {"request": {"url": "...", "method": "GET"}},
+            and their bodies are not decoded if they are skipped.
+        start_offset (int): byte offset right after an entry, as recorded in progress
+            of a previous read, only entries after it are read. Not supported by
+            compressed files.
+        progress (dict): updated with count of entries read, including skipped ones,
+            as entries_count, and byte offset right after the last entry as offset.
+
+    Yields:
+        dict: entry
+            {
+                "request": {},
+                "response": {}
+            }
+
+    Raises:
+        exceptions.FileFormatError: HAR file content error.
+
+    """
+    fast_loads = _get_fast_loads()
+    with open_har_file(file_path) as f:
+        offset = None
+        if start_offset:
+            f.seek(start_offset)
+            offset = start_offset
+        elif progress is not None:
+            offset = len(codecs.BOM_UTF8) if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8 else 0
+            f.seek(offset)
+
+        scanner = _TextScanner(f, chunk_size, fast_loads, offset)
+        try:
+            for entry_json in iter_entries(scanner, skip_entry, bool(start_offset), progress):
+                yield entry_json
+        except (KeyError, TypeError, ValueError) as ex:
+            raise FileFormatError(
+                "HAR file content error: {}, {!r}".format(file_path, ex))
+
+
+def is_file_path(source):
+    """ whether source is a file path, instead of content, entries or a file object.
+    """
+    return isinstance(source, _PATH_TYPES)
+
+
+def _get_fast_loads():
+    json_codec = codec.get_codec()
+    return json_codec.loads if json_codec.name != "json" else None
+
+
+def iter_har_source_entries(source, chunk_size=DEFAULT_CHUNK_SIZE, skip_entry=None):
+    """ yield log entries of HAR source in memory one by one.
+
+    Args:
+        source: HAR content as bytes, binary file object to read HAR content
+            from, HAR document dict, or iterable of log entries.
+        chunk_size (int): bytes read from file object at a time.
+        skip_entry (callable): called with each entry, entries are skipped if it
+            returns true. Only large entries read from bytes or file objects
+            are passed with ENTRY_FILTER_FIELDS alone.
+
+    Raises:
+        exceptions.FileFormatError: HAR content error.
+        exceptions.ParamsError: source of unsupported type.
+
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    if hasattr(source, "read"):
+        if isinstance(source.read(0), type(u"")):
+            raise ParamsError("HAR file object should be opened in binary mode.")
+
+        scanner = _TextScanner(source, chunk_size, _get_fast_loads())
+        try:
+            for entry_json in iter_entries(scanner, skip_entry):
+                yield entry_json
+        except (KeyError, TypeError, ValueError) as ex:
+            raise FileFormatError("HAR content error: {!r}".format(ex))
+        return
+
+    if isinstance(source, dict):
+        try:
+            source = source["log"]["entries"]
+        except (KeyError, TypeError) as ex:
+            raise FileFormatError("HAR content error: {!r}".format(ex))
+
+    try:
+        entries = iter(source)
+    except TypeError:
+        raise ParamsError("unsupported HAR source: {!r}".format(source))
+
+    for entry_json in entries:
+        if skip_entry is None or not skip_entry(entry_json):
+            yield entry_json
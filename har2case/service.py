@@ -0,0 +1,347 @@
+""" Asyncio conversion service.
+
+aconvert() converts HAR sources in a pool of worker processes, so event loops
+of services embedding har2case are never blocked by conversion. Conversions
+in flight are bounded, callers wait for a free slot, and each conversion has
+a timeout, which stops the worker conversion as well on Unix. Errors are
+raised as har2case exceptions.
+
+serve() runs a minimal local HTTP server on top of it, testcases are made of
+HAR content posted to /convert:
+
+    $ curl --data-binary @demo.har "http://127.0.0.1:8000/convert?format=yaml&dedup=1"
+
+Query parameters are format (json or yaml), fmt_version (v1 or v2), filter,
+exclude and dedup. Responses are 200 with testcase, 400 on HAR content
+errors, 503 if all slots are busy, and 504 on timeout.
+
+Usage:
+    >>> async with ConversionService(workers=4) as service:
+    ...     testcase = await service.aconvert(har_content, fmt_version="v2")
+
+"""
+
+import asyncio
+import concurrent.futures
+import io
+import logging
+import multiprocessing
+import signal
+
+from har2case import codec
+from har2case.api import convert
+from har2case.compat import urlparse
+from har2case.exceptions import ConversionTimeout, MyBaseError, ParamsError
+
+DEFAULT_TIMEOUT = 60
+
+# max size of HAR content posted to HTTP server
+DEFAULT_MAX_UPLOAD_SIZE = 256 * 1024 * 1024
+
+# time given to workers to report their own timeout, before it is reported here
+_TIMEOUT_GRACE = 1
+
+_MAX_HEADER_SIZE = 64 * 1024
+
+_FILE_TYPES = {"json": "JSON", "yaml": "YAML", "yml": "YAML"}
+
+_CONTENT_TYPES = {"JSON": "application/json", "YAML": "application/x-yaml"}
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout"
+}
+
+
+def _get_mp_context():
+    # workers forked from the service would inherit its client sockets, and keep
+    # connections open after responses
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return None
+
+
+def _init_service_worker(json_backend):
+    # Ctrl-C stops the service in the main process, which shuts workers down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    codec.use_backend(json_backend)
+
+
+def _raise_timeout(signum, frame):
+    raise ConversionTimeout("conversion timed out.")
+
+
+def _convert_in_worker(source, file_type, fmt_version, options, timeout):
+    """ convert HAR source in worker process, stopped after timeout seconds
+        where interval timers are available.
+
+    Returns:
+        testcase structure if file_type is None, otherwise testcase text.
+
+    """
+    use_timer = timeout and hasattr(signal, "setitimer")
+    if use_timer:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        if file_type is None:
+            return convert(source, fmt_version=fmt_version, **options)
+
+        outfile = io.StringIO()
+        convert(source, outfile, file_type, fmt_version, **options)
+        return outfile.getvalue()
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ConversionService(object):
+    """ convert HAR sources in worker processes, with bounded conversions in
+        flight and per conversion timeout.
+
+    Args:
+        workers (int): worker processes count, defaults to CPU count.
+        max_pending (int): max conversions submitted to workers at a time,
+            defaults to twice workers count, others wait for a free slot.
+        timeout (float): seconds a conversion may take, None for no limit.
+        options (dict): default HarParser arguments of conversions.
+
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=DEFAULT_TIMEOUT, options=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_pending = max_pending or self.workers * 2
+        self.timeout = timeout
+        self.options = options or {}
+        self.executor = None
+        self._slots = None
+
+    def start(self):
+        """ start worker pool, called on first conversion if not started.
+        """
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                self.workers,
+                mp_context=_get_mp_context(),
+                initializer=_init_service_worker,
+                initargs=(codec.get_codec().name,)
+            )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def is_busy(self):
+        """ whether all slots are taken, new conversions would wait.
+        """
+        return self._slots is not None and self._slots.locked()
+
+    async def aconvert(self, source, file_type=None, fmt_version="v1", **options):
+        """ convert HAR source in a worker process.
+
+        Args:
+            source: HAR file path, HAR content as bytes, HAR document dict, list
+                of log entries, or binary file object, which is read here.
+            file_type (str): JSON or YAML to get testcase text, None to get
+                testcase structure.
+            fmt_version (str): testcase format version, v1 or v2.
+            options: HarParser arguments, added to service default options.
+
+        Raises:
+            exceptions.ConversionTimeout: conversion took longer than timeout.
+            exceptions.FileFormatError: HAR content error.
+            exceptions.ParamsError: invalid source or options.
+
+        """
+        conversion_options = dict(self.options, **options)
+        if conversion_options.get("workers", 1) != 1:
+            raise ParamsError("service conversions are made in one worker process each.")
+
+        self.start()
+        if hasattr(source, "read"):
+            source = source.read()
+
+        loop = asyncio.get_running_loop()
+        async with self._slots:
+            future = loop.run_in_executor(
+                self.executor, _convert_in_worker,
+                source, file_type, fmt_version, conversion_options, self.timeout
+            )
+            try:
+                if self.timeout is None:
+                    return await future
+                return await asyncio.wait_for(future, self.timeout + _TIMEOUT_GRACE)
+            except asyncio.TimeoutError:
+                raise ConversionTimeout("conversion timed out.")
+            except concurrent.futures.process.BrokenProcessPool:
+                # a worker died, e.g. out of memory, start a new pool next time
+                logging.error("conversion worker process died, restart worker pool.")
+                self.executor.shutdown(wait=False)
+                self.executor = None
+                raise
+
+
+async def _read_request(reader, max_upload_size):
+    """ read HTTP request, return (status, method, target, body), status is None
+        if request is valid.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, target = lines[0].split(" ")[:2]
+
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if method != "POST":
+        return None, method, target, b""
+
+    if "content-length" not in headers:
+        return 411, method, target, None
+
+    content_length = int(headers["content-length"])
+    if content_length > max_upload_size:
+        return 413, method, target, None
+
+    body = await reader.readexactly(content_length)
+    return None, method, target, body
+
+
+def _make_response(status, body=b"", content_type="text/plain; charset=utf-8"):
+    head = (
+        "HTTP/1.1 {} {}\r\n"
+        "Content-Type: {}\r\n"
+        "Content-Length: {}\r\n"
+        "Connection: close\r\n"
+        "\r\n"
+    ).format(status, _REASONS[status], content_type, len(body))
+    return head.encode("latin-1") + body
+
+
+def _parse_query(target):
+    """ parse /convert query string, return (file type, fmt version, options).
+
+    Raises:
+        exceptions.ParamsError: invalid parameter.
+
+    """
+    query = dict(urlparse.parse_qsl(urlparse.urlsplit(target).query))
+    file_type = _FILE_TYPES.get(query.get("format", "json").lower())
+    if file_type is None:
+        raise ParamsError("unsupported format: {}".format(query["format"]))
+
+    fmt_version = query.get("fmt_version", "v1").lower()
+    if fmt_version not in ("v1", "v2"):
+        raise ParamsError("unsupported fmt_version: {}".format(fmt_version))
+
+    options = {}
+    if "filter" in query:
+        options["filter_str"] = query["filter"]
+    if "exclude" in query:
+        options["exclude_str"] = query["exclude"]
+    if query.get("dedup") in ("1", "true"):
+        options["dedup"] = True
+
+    return file_type, fmt_version, options
+
+
+async def _respond(service, status, method, target, body):
+    if status is not None:
+        return _make_response(status)
+
+    path = urlparse.urlsplit(target).path
+    if path != "/convert":
+        return _make_response(404)
+    if method != "POST":
+        return _make_response(405)
+
+    if service.is_busy:
+        return _make_response(503, b"all conversion slots are busy, retry later.")
+
+    try:
+        file_type, fmt_version, options = _parse_query(target)
+        testcase = await service.aconvert(body, file_type, fmt_version, **options)
+    except ConversionTimeout as ex:
+        return _make_response(504, str(ex).encode("utf-8"))
+    except MyBaseError as ex:
+        return _make_response(400, str(ex).encode("utf-8"))
+
+    return _make_response(
+        200, testcase.encode("utf-8"), "{}; charset=utf-8".format(_CONTENT_TYPES[file_type]))
+
+
+def make_request_handler(service, max_upload_size=DEFAULT_MAX_UPLOAD_SIZE):
+    """ make asyncio.start_server client handler converting HAR content posted to
+        /convert with service.
+    """
+    async def handle(reader, writer):
+        try:
+            try:
+                status, method, target, body = await _read_request(reader, max_upload_size)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                status, method, target, body = 400, None, None, None
+
+            try:
+                response = await _respond(service, status, method, target, body)
+            except Exception as ex:
+                # a bad request never takes the server down
+                logging.error("conversion request failed: {!r}".format(ex))
+                response = _make_response(500)
+
+            writer.write(response)
+            await writer.drain()
+        except (IOError, OSError):
+            # client went away
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def _serve(host, port, service, max_upload_size):
+    async with service:
+        server = await asyncio.start_server(
+            make_request_handler(service, max_upload_size), host, port,
+            limit=_MAX_HEADER_SIZE
+        )
+        logging.info("Serve HAR conversion on http://{}:{}/convert with {} workers.".format(
+            host, port, service.workers))
+        async with server:
+            await server.serve_forever()
+
+
+def serve(host="127.0.0.1", port=8000, workers=None, max_pending=None,
+          timeout=DEFAULT_TIMEOUT, max_upload_size=DEFAULT_MAX_UPLOAD_SIZE, options=None):
+    """ run conversion HTTP server until interrupted.
+
+    Args:
+        options (dict): default HarParser arguments, filter and exclude rules
+            are replaced by query parameters of requests.
+
+    """
+    service = ConversionService(workers, max_pending, timeout, options)
+    try:
+        asyncio.run(_serve(host, port, service, max_upload_size))
+    except KeyboardInterrupt:
+        logging.info("Stop serving HAR conversion.")
@@ -0,0 +1,106 @@
+""" Conversion statistics.
+
+HarParser records wall time and call counts of each conversion step, and
+counters such as entries filtered or bytes decoded, when it is created with
+profile=True. The stats can be read after gen_testcase:
+
+    >>> har_parser = HarParser("demo.har", profile=True)
+    >>> har_parser.gen_testcase()
+    >>> har_parser.stats.counters["teststeps"]
+    2
+    >>> print(har_parser.stats.report())
+
+"""
+
+import collections
+import time
+
+default_timer = getattr(time, "perf_counter", time.time)
+
+
+class _Timer(object):
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start_at = default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.add_time(self.name, default_timer() - self.start_at)
+
+
+class ConversionStats(object):
+    """ wall time and call counts of steps, and named counters.
+
+    Attributes:
+        timings (OrderedDict): step name => [calls count, total seconds]
+        counters (OrderedDict): counter name => value
+
+    """
+
+    def __init__(self):
+        self.timings = collections.OrderedDict()
+        self.counters = collections.OrderedDict()
+
+    def timer(self, name):
+        """ context manager which adds elapsed time of the block to step name.
+        """
+        return _Timer(self, name)
+
+    def iter_timed(self, name, iterable):
+        """ iterate over iterable, and add time taken by each item to step name.
+        """
+        iterator = iter(iterable)
+        while True:
+            start_at = default_timer()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+
+            self.add_time(name, default_timer() - start_at)
+            yield item
+
+    def add_time(self, name, seconds, calls=1):
+        timing = self.timings.setdefault(name, [0, 0.0])
+        timing[0] += calls
+        timing[1] += seconds
+
+    def incr(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other):
+        """ add timings and counters of other stats, e.g. made in worker processes.
+        """
+        for name, (calls, seconds) in other.timings.items():
+            self.add_time(name, seconds, calls)
+
+        for name, value in other.counters.items():
+            self.incr(name, value)
+
+    def to_dict(self):
+        return {
+            "timings": {
+                name: {"calls": calls, "seconds": seconds}
+                for name, (calls, seconds) in self.timings.items()
+            },
+            "counters": dict(self.counters)
+        }
+
+    def report(self):
+        """ format stats as a text table.
+        """
+        lines = ["{:<24} {:>10} {:>12} {:>12}".format("step", "calls", "total(s)", "avg(ms)")]
+        for name, (calls, seconds) in self.timings.items():
+            lines.append("{:<24} {:>10} {:>12.4f} {:>12.4f}".format(
+                name, calls, seconds, seconds * 1000 / calls if calls else 0))
+
+        lines.append("")
+        lines.append("{:<24} {:>10}".format("counter", "value"))
+        for name, value in self.counters.items():
+            lines.append("{:<24} {:>10}".format(name, value))
+
+        return "\n".join(lines)
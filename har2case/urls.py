@@ -0,0 +1,75 @@
+""" Memoized URL decomposition.
+
+Captures request the same URLs again and again, e.g. polling and static
+resources, and each URL is used by filter rules, teststep name and url.
+URLs are parsed once, and the parts are memoized by raw URL string. The memo
+is bounded, and cleared when it is full, so that captures of unique URLs do
+not grow it without limit.
+
+Usage:
+    >>> parts = parse_url("https://httprunner.top/api/v1;v=2?a=1")
+    >>> parts.host, parts.path, parts.name, parts.base_url
+    ('httprunner.top', '/api/v1;v=2', '/api/v1', 'https://httprunner.top/api/v1;v=2')
+
+"""
+
+from har2case.compat import urlparse
+
+# max URLs memoized
+URL_CACHE_SIZE = 4096
+
+_url_cache = {}
+
+
+class URLParts(object):
+    """ parts of URL used in har2case.
+
+    Attributes:
+        host (str): host name in lower case, empty if missing.
+        path (str): path, including ;params of the last segment.
+        name (str): path without ;params, which is used as teststep name.
+        base_url (str): URL without query string.
+
+    """
+
+    __slots__ = ("host", "path", "name", "base_url")
+
+    def __init__(self, host, path, name, base_url):
+        self.host = host
+        self.path = path
+        self.name = name
+        self.base_url = base_url
+
+
+def _parse_url(url):
+    parsed_object = urlparse.urlparse(url)
+    path = parsed_object.path
+    if parsed_object.params:
+        # keep str type of URL, which may be unicode on Python 2
+        path = path + ";" + parsed_object.params
+
+    return URLParts(
+        parsed_object.hostname or "",
+        path,
+        parsed_object.path,
+        parsed_object._replace(query="").geturl()
+    )
+
+
+def parse_url(url):
+    """ parse URL, parts are memoized.
+
+    Raises:
+        ValueError: invalid URL, e.g. malformed IPv6 address.
+
+    """
+    try:
+        return _url_cache[url]
+    except KeyError:
+        pass
+
+    parts = _parse_url(url)
+    if len(_url_cache) >= URL_CACHE_SIZE:
+        _url_cache.clear()
+    _url_cache[url] = parts
+    return parts
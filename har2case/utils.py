@@ -1,17 +1,34 @@
 import io
-import json
 import logging
-import sys
+import re
 
-import yaml
-from har2case.compat import bytes, ensure_ascii, str, unquote
+from har2case import codec
+from har2case.compression import get_compression, open_har_file
+from har2case.mapped import load_mapped_har_log_entries
+from har2case.compat import basestring, is_py2, str, unquote
+from har2case.exceptions import FileFormatError
 
+# (SafeDumper, CSafeDumper) of PyYAML, which is imported on first YAML dump, so
+# that JSON conversions never load it
+_yaml_dumpers = None
 
-def load_har_log_entries(file_path):
-    """ load HAR file and return log entries list
+# scalars with these chars are double quoted, and LibYAML escapes and folds them
+# differently from the pure Python emitter.
+_YAML_ESCAPED_CHAR_RE = re.compile(u"[^\x20-\x7e\xa0-\ud7ff\ue000-\ufffd]|\ufeff")
+
+# emitters measure key length differently when choosing "? key" style for
+# long keys, stay well below their limit of 128.
+_YAML_SIMPLE_KEY_MAX_LENGTH = 64
+
+
+def load_har_log_entries(file_path, lazy_text_size=None):
+    """ load HAR file and return log entries list, plain files are parsed from
+        their memory mapping without being copied.
 
     Args:
         file_path (str)
+        lazy_text_size (int): "text" values of plain files larger than this, in
+            bytes, are loaded as mapped.LazyText, None to decode all values.
 
     Returns:
         list: entries
@@ -26,14 +43,20 @@ def load_har_log_entries(file_path):
                 }
             ]
 
+    Raises:
+        exceptions.FileFormatError: HAR file content error.
+
     """
-    with io.open(file_path, "r+", encoding="utf-8-sig") as f:
+    if not get_compression(file_path):
+        return load_mapped_har_log_entries(file_path, lazy_text_size)
+
+    with open_har_file(file_path) as f:
         try:
-            content_json = json.loads(f.read())
+            content_json = codec.loads(f.read().decode("utf-8-sig"))
             return content_json["log"]["entries"]
-        except (KeyError, TypeError):
-            logging.error("HAR file content error: {}".format(file_path))
-            sys.exit(1)
+        except (KeyError, TypeError, ValueError) as ex:
+            raise FileFormatError(
+                "HAR file content error: {}, {!r}".format(file_path, ex))
 
 
 def x_www_form_urlencoded(post_data):
@@ -58,17 +81,18 @@ def x_www_form_urlencoded(post_data):
 
 
 def convert_x_www_form_urlencoded_to_dict(post_data):
-    """ convert x_www_form_urlencoded data to dict
+    """ convert x_www_form_urlencoded data to dict, values of repeated names are
+        collected in a list.
 
     Args:
-        post_data (str): a=1&b=2
+        post_data (str): a=1&b=2&b=3
 
     Returns:
-        dict: {"a":1, "b":2}
+        dict: {"a": "1", "b": ["2", "3"]}
 
     """
     if isinstance(post_data, str):
-        converted_dict = {}
+        pairs = []
         for k_v in post_data.split("&"):
             try:
                 key, value = k_v.split("=")
@@ -76,14 +100,42 @@ def convert_x_www_form_urlencoded_to_dict(post_data):
                 raise Exception(
                     "Invalid x_www_form_urlencoded data format: {}".format(post_data)
                 )
-            converted_dict[key] = unquote(value)
-        return converted_dict
+            pairs.append((key, unquote(value)))
+        return convert_pairs_to_dict(pairs)
     else:
         return post_data
 
 
+def convert_pairs_to_dict(pairs):
+    """ convert (name, value) pairs to mapping, values of repeated names are
+        collected in a list.
+
+    Args:
+        pairs (iterable)
+            [("v", "1"), ("w", "2"), ("w", "3")]
+
+    Returns:
+        dict:
+            {"v": "1", "w": ["2", "3"]}
+
+    """
+    mapping = {}
+    repeated_names = set()
+    for name, value in pairs:
+        if name not in mapping:
+            mapping[name] = value
+        elif name in repeated_names:
+            mapping[name].append(value)
+        else:
+            mapping[name] = [mapping[name], value]
+            repeated_names.add(name)
+
+    return mapping
+
+
 def convert_list_to_dict(origin_list):
-    """ convert HAR data list to mapping
+    """ convert HAR data list to mapping, values of repeated names are collected
+        in a list.
 
     Args:
         origin_list (list)
@@ -97,10 +149,81 @@ def convert_list_to_dict(origin_list):
             {"v": "1", "w": "2"}
 
     """
-    return {
-        item["name"]: item.get("value")
+    return convert_pairs_to_dict(
+        (item["name"], item.get("value"))
         for item in origin_list
-    }
+    )
+
+
+def _is_yaml_simple_key(key):
+    if isinstance(key, basestring):
+        return 0 < len(key.encode("utf-8")) <= _YAML_SIMPLE_KEY_MAX_LENGTH \
+            and _YAML_ESCAPED_CHAR_RE.search(key) is None
+
+    return not isinstance(key, (dict, list))
+
+
+def _is_libyaml_safe(obj):
+    """ check if LibYAML emits obj the same as the pure Python emitter.
+    """
+    if isinstance(obj, dict):
+        return all(
+            _is_yaml_simple_key(key) and _is_libyaml_safe(value)
+            for key, value in obj.items()
+        )
+    elif isinstance(obj, list):
+        return all(_is_libyaml_safe(item) for item in obj)
+    elif isinstance(obj, basestring):
+        return _YAML_ESCAPED_CHAR_RE.search(obj) is None
+    else:
+        return True
+
+
+def get_yaml_dumpers():
+    """ import PyYAML and get its YAML Dumper classes.
+
+    Returns:
+        tuple: (SafeDumper, CSafeDumper), CSafeDumper is None if PyYAML is built
+            without LibYAML.
+
+    """
+    global _yaml_dumpers
+    if _yaml_dumpers is None:
+        import yaml
+        _yaml_dumpers = (yaml.SafeDumper, getattr(yaml, "CSafeDumper", None))
+
+    return _yaml_dumpers
+
+
+def get_yaml_dumper(obj):
+    """ get YAML Dumper class for obj.
+        LibYAML emitter is used if available, unless obj has strings that LibYAML
+        would emit differently, so that the document is the same either way.
+
+    """
+    safe_dumper, fast_dumper = get_yaml_dumpers()
+    if fast_dumper is None or not _is_libyaml_safe(obj):
+        return safe_dumper
+
+    return fast_dumper
+
+
+def yaml_dump(obj, stream):
+    """ dump obj to YAML stream, in block style with indent 4.
+    """
+    dumper_class = get_yaml_dumper(obj)
+    if is_py2 and not getattr(stream, "encoding", None):
+        # LibYAML emitter writes byte strings to streams without encoding, e.g.
+        # io.StringIO, on Python 2
+        dumper_class = get_yaml_dumpers()[0]
+
+    dumper = dumper_class(stream, allow_unicode=True, default_flow_style=False, indent=4)
+    try:
+        dumper.open()
+        dumper.represent(obj)
+        dumper.close()
+    finally:
+        dumper.dispose()
 
 
 def dump_yaml(testcase, yaml_file):
@@ -109,7 +232,7 @@ def dump_yaml(testcase, yaml_file):
     logging.info("dump testcase to YAML format.")
 
     with io.open(yaml_file, 'w', encoding="utf-8") as outfile:
-        yaml.dump(testcase, outfile, allow_unicode=True, default_flow_style=False, indent=4)
+        yaml_dump(testcase, outfile)
 
     logging.info("Generate YAML testcase successfully: {}".format(yaml_file))
 
@@ -120,10 +243,6 @@ def dump_json(testcase, json_file):
     logging.info("dump testcase to JSON format.")
 
     with io.open(json_file, 'w', encoding="utf-8") as outfile:
-        my_json_str = json.dumps(testcase, ensure_ascii=ensure_ascii, indent=4)
-        if isinstance(my_json_str, bytes):
-            my_json_str = my_json_str.decode("utf-8")
-
-        outfile.write(my_json_str)
+        outfile.write(codec.dumps(testcase, indent=4))
 
     logging.info("Generate JSON testcase successfully: {}".format(json_file))
@@ -0,0 +1,365 @@
+""" Watch a spool directory and convert HAR files dropped into it.
+
+New and changed HAR files in the directory, plain or compressed, are
+converted once they have not changed for a settle time, so files still being
+written are not converted half way. Changes are detected with inotify on
+Linux, and by polling the directory elsewhere. Files are converted by a long
+running pool of worker processes, so each file only costs its conversion,
+without interpreter startup and imports.
+
+Usage:
+    # watch spool directory, and convert HAR files with 4 worker processes
+    >>> har2case watch spool/ -j 4
+
+"""
+
+import collections
+import ctypes
+import ctypes.util
+import errno
+import logging
+import multiprocessing
+import os
+import select
+import signal
+import struct
+import sys
+import time
+
+from har2case import codec
+from har2case.batch import _convert_har_file_star, _init_worker
+from har2case.compression import is_har_file, strip_har_suffix
+
+# seconds a HAR file must stay unchanged before it is converted
+DEFAULT_SETTLE_TIME = 2.0
+
+# seconds between directory scans, or max wait of inotify events
+DEFAULT_POLL_INTERVAL = 1.0
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class PollingWatcher(object):
+    """ detect changes by scanning the whole directory every poll interval.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def wait(self, timeout):
+        """ wait for changes in directory.
+
+        Returns:
+            list: paths of changed files, or None if the whole directory should
+                be scanned.
+
+        """
+        time.sleep(timeout)
+        return None
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(object):
+    """ detect changes with Linux inotify, through libc with ctypes.
+
+    Raises:
+        OSError: inotify is not available.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        try:
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except AttributeError:
+            raise OSError(errno.ENOSYS, "inotify is not supported")
+
+        self.fd = inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        path = directory.encode(sys.getfilesystemencoding())
+        if inotify_add_watch(self.fd, path, mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error), directory)
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as ex:
+            if ex.errno == errno.EAGAIN:
+                return []
+            raise
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_size = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            if mask & _IN_Q_OVERFLOW:
+                # events were dropped
+                return None
+
+            name = data[offset:offset + name_size].rstrip(b"\0")
+            offset += name_size
+            if name:
+                paths.append(os.path.join(
+                    self.directory, name.decode(sys.getfilesystemencoding())))
+
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _init_watch_worker(log_level, json_backend):
+    # Ctrl-C stops watching in the main process, which terminates workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_worker(log_level, json_backend)
+
+
+def make_watcher(directory, use_inotify=None):
+    """ make inotify watcher if available, otherwise polling watcher.
+
+    Args:
+        directory (str): directory to watch.
+        use_inotify (bool): None to use inotify if available, False to always poll.
+
+    """
+    if use_inotify is not False and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except OSError as ex:
+            logging.info("inotify is not available, poll directory instead: {}".format(ex))
+
+    return PollingWatcher(directory)
+
+
+class SpoolConverter(object):
+    """ convert HAR files in a directory as they are dropped into it.
+
+    Args:
+        directory (str): spool directory, HAR files directly in it are converted.
+        workers (int): worker processes count, defaults to CPU count.
+            HAR files are converted in current process if workers is 1.
+        convert_args (tuple): arguments of batch.convert_har_file after HAR file path.
+        settle_time (float): seconds a HAR file must stay unchanged before conversion.
+        poll_interval (float): seconds between directory scans.
+        use_inotify (bool): None to use inotify if available, False to always poll.
+
+    """
+
+    def __init__(self, directory, workers=None, convert_args=(),
+                 settle_time=DEFAULT_SETTLE_TIME, poll_interval=DEFAULT_POLL_INTERVAL,
+                 use_inotify=None):
+        self.directory = directory
+        self.workers = workers or multiprocessing.cpu_count()
+        self.convert_args = tuple(convert_args)
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.watcher = make_watcher(directory, use_inotify)
+
+        # path: (stat signature, time of last change) of files waiting to settle
+        self.pending = {}
+        # path: stat signature of files converted
+        self.converted = {}
+        self.ready = collections.deque()
+        # (path, signature, async result) of files being converted by workers
+        self.running = collections.deque()
+        self.pool = None
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(
+                self.workers,
+                initializer=_init_watch_worker,
+                initargs=(logging.getLogger().getEffectiveLevel(), codec.get_codec().name)
+            )
+
+    def close(self):
+        self.watcher.close()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def _output_path(self, har_file_path):
+        file_type = self.convert_args[0] if self.convert_args else "JSON"
+        return "{}.{}".format(strip_har_suffix(har_file_path), file_type.lower())
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _list_har_files(self):
+        return [
+            os.path.join(self.directory, filename)
+            for filename in sorted(os.listdir(self.directory))
+            if is_har_file(filename)
+        ]
+
+    def skip_converted(self):
+        """ mark existing HAR files with testcases newer than themselves as converted.
+        """
+        for path in self._list_har_files():
+            signature = self._stat(path)
+            output_signature = self._stat(self._output_path(path))
+            if signature and output_signature and output_signature[1] >= signature[1]:
+                self.converted[path] = signature
+
+    def scan(self, paths=None):
+        """ record changes of HAR files.
+
+        Args:
+            paths (list): changed paths, the whole directory is scanned if None.
+
+        """
+        now = time.time()
+        if paths is None:
+            paths = self._list_har_files()
+
+        for path in paths:
+            if not is_har_file(path):
+                continue
+
+            signature = self._stat(path)
+            if signature is None:
+                self.pending.pop(path, None)
+                continue
+
+            if self.converted.get(path) == signature:
+                continue
+
+            if path not in self.pending or self.pending[path][0] != signature:
+                self.pending[path] = (signature, now)
+
+    def _settle(self):
+        """ move HAR files unchanged for settle time to ready queue.
+        """
+        now = time.time()
+        for path, (signature, changed_at) in list(self.pending.items()):
+            if now - changed_at < self.settle_time:
+                continue
+
+            current_signature = self._stat(path)
+            if current_signature != signature:
+                # changed without event, e.g. only polled when events are dropped
+                if current_signature is None:
+                    del self.pending[path]
+                else:
+                    self.pending[path] = (current_signature, now)
+                continue
+
+            del self.pending[path]
+            if path not in (ready_path for ready_path, _ in self.ready):
+                self.ready.append((path, signature))
+
+    def _submit(self):
+        """ submit ready HAR files, pending conversions are bounded by workers count.
+        """
+        results = []
+        while self.ready and len(self.running) < self.workers * 2:
+            path, signature = self.ready.popleft()
+            task = (path,) + self.convert_args
+            if self.pool is None:
+                results.append(self._finish(path, signature, _convert_har_file_star(task)))
+            else:
+                self.running.append(
+                    (path, signature, self.pool.apply_async(_convert_har_file_star, (task,))))
+
+        return results
+
+    def _collect(self):
+        results = []
+        while self.running and self.running[0][2].ready():
+            path, signature, result = self.running.popleft()
+            results.append(self._finish(path, signature, result.get()))
+
+        return results
+
+    def _finish(self, path, signature, result):
+        har_file_path, output_testcase_file, error = result
+        self.converted[path] = signature
+        if error:
+            logging.error("FAILED {}: {}".format(har_file_path, error))
+        else:
+            logging.info("OK {} -> {}".format(har_file_path, output_testcase_file))
+
+        return result
+
+    def step(self, timeout=None):
+        """ wait for changes, and convert HAR files settled.
+
+        Args:
+            timeout (float): max seconds to wait for changes, defaults to poll
+                interval, and is shortened while files are settling.
+
+        Returns:
+            list: (har_file_path, output_testcase_file, error) of HAR files
+                converted in this step.
+
+        """
+        if timeout is None:
+            timeout = self.poll_interval
+            if self.pending:
+                timeout = min(timeout, self.settle_time)
+            if self.running:
+                timeout = min(timeout, 0.1)
+
+        self.scan(self.watcher.wait(timeout))
+        self._settle()
+        results = self._collect()
+        results.extend(self._submit())
+        return results
+
+    def run(self):
+        """ convert HAR files until interrupted, HAR files already converted
+            before are skipped.
+        """
+        logging.info("Watch {} for HAR files, {} worker processes.".format(
+            self.directory, self.workers))
+        self.skip_converted()
+        self.scan()
+        try:
+            while True:
+                self.step()
+        except KeyboardInterrupt:
+            logging.info("Stop watching {}.".format(self.directory))
+        finally:
+            self.close()
+
+
+def watch(directory, workers=None, file_type="JSON", fmt_version="v1", filter_str=None,
+          exclude_str=None, max_body_size=None, oversize_body="scan", cache_dir=None,
+          cache_size=None, incremental=False, dedup=False, header_filter=None,
+          use_mmap=False, correlate=False, settle_time=DEFAULT_SETTLE_TIME,
+          use_inotify=None):
+    """ convert HAR files dropped into directory until interrupted.
+    """
+    convert_args = (
+        file_type, fmt_version, filter_str, exclude_str, max_body_size, oversize_body,
+        cache_dir, cache_size, incremental, dedup, header_filter, use_mmap, correlate
+    )
+    SpoolConverter(
+        directory, workers, convert_args, settle_time, use_inotify=use_inotify
+    ).run()
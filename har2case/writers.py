@@ -0,0 +1,171 @@
+""" Streaming testcase writers.
+
+Writers emit the config block first and then append teststeps to the output
+file one at a time, so only the teststep being written is kept in memory.
+The output is identical to dumping the whole testcase with utils.dump_json
+or utils.dump_yaml. MemoryTestcaseWriter is the in memory sink, which builds
+the testcase structure instead of writing it.
+
+Usage:
+    >>> with io.open("demo.json", "w", encoding="utf-8") as outfile:
+    ...     writer = make_testcase_writer("JSON", outfile, "v2")
+    ...     writer.write_config(config)
+    ...     for teststep in teststeps:
+    ...         writer.write_teststep(teststep)
+    ...     writer.close()
+
+"""
+
+from har2case import codec, utils
+
+
+class TestcaseWriter(object):
+    """ base class of streaming testcase writers.
+
+    Args:
+        outfile (file): text file object opened for writing.
+        fmt_version (str): testcase format version, v1 or v2.
+
+    """
+
+    def __init__(self, outfile, fmt_version="v1"):
+        self.outfile = outfile
+        self.fmt_version = fmt_version
+        self.teststeps_count = 0
+
+    def write_config(self, config):
+        raise NotImplementedError
+
+    def write_teststep(self, teststep):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def resume(self, teststeps_count):
+        """ continue a testcase written before close, the output file is positioned
+            right after its last teststep.
+        """
+        self.teststeps_count = teststeps_count
+
+    def _make_item(self, teststep):
+        if self.fmt_version == "v1":
+            return {"test": teststep}
+
+        # v2
+        return teststep
+
+
+class JSONTestcaseWriter(TestcaseWriter):
+    """ write testcase in the same layout as json.dumps(testcase, indent=4).
+    """
+
+    def _dumps(self, obj, indent_level):
+        json_str = codec.dumps(obj, indent=4)
+
+        # JSON encoders escape line breaks in strings, all newlines are layout
+        return json_str.replace("\n", "\n" + " " * 4 * indent_level)
+
+    def write_config(self, config):
+        if self.fmt_version == "v1":
+            self.outfile.write(u"[\n    ")
+            self.outfile.write(self._dumps({"config": config}, 1))
+        else:
+            # v2
+            self.outfile.write(u'{\n    "config": ')
+            self.outfile.write(self._dumps(config, 1))
+            self.outfile.write(u',\n    "teststeps": [')
+
+    def write_teststep(self, teststep):
+        item = self._make_item(teststep)
+        if self.fmt_version == "v1":
+            self.outfile.write(u",\n    ")
+            self.outfile.write(self._dumps(item, 1))
+        else:
+            # v2
+            if self.teststeps_count:
+                self.outfile.write(u",")
+            self.outfile.write(u"\n        ")
+            self.outfile.write(self._dumps(item, 2))
+
+        self.teststeps_count += 1
+
+    def close(self):
+        if self.fmt_version == "v1":
+            self.outfile.write(u"\n]")
+        elif self.teststeps_count:
+            self.outfile.write(u"\n    ]\n}")
+        else:
+            self.outfile.write(u"]\n}")
+
+
+class YAMLTestcaseWriter(TestcaseWriter):
+    """ write testcase in the same layout as yaml.dump(testcase, indent=4).
+
+    Top level sequences are not indented in block style, so each teststep can
+    be dumped as a single item list and appended to the output.
+    """
+
+    def _dump(self, obj):
+        utils.yaml_dump(obj, self.outfile)
+
+    def write_config(self, config):
+        if self.fmt_version == "v1":
+            self._dump([{"config": config}])
+        else:
+            # v2
+            self._dump({"config": config})
+
+    def write_teststep(self, teststep):
+        if self.fmt_version != "v1" and not self.teststeps_count:
+            self.outfile.write(u"teststeps:\n")
+
+        self._dump([self._make_item(teststep)])
+        self.teststeps_count += 1
+
+    def close(self):
+        if self.fmt_version != "v1" and not self.teststeps_count:
+            self.outfile.write(u"teststeps: []\n")
+
+
+class MemoryTestcaseWriter(TestcaseWriter):
+    """ build testcase in memory, as HarParser.make_testcase returns it.
+    """
+
+    def __init__(self, outfile=None, fmt_version="v1"):
+        super(MemoryTestcaseWriter, self).__init__(outfile, fmt_version)
+        self.testcase = None
+
+    def write_config(self, config):
+        if self.fmt_version == "v1":
+            self.testcase = [{"config": config}]
+        else:
+            # v2
+            self.testcase = {"config": config, "teststeps": []}
+
+    def write_teststep(self, teststep):
+        if self.fmt_version == "v1":
+            self.testcase.append(self._make_item(teststep))
+        else:
+            # v2
+            self.testcase["teststeps"].append(teststep)
+
+        self.teststeps_count += 1
+
+    def close(self):
+        pass
+
+
+def make_testcase_writer(file_type, outfile, fmt_version="v1"):
+    """ make streaming testcase writer for file type.
+
+    Args:
+        file_type (str): JSON or YAML.
+        outfile (file): text file object opened for writing.
+        fmt_version (str): testcase format version, v1 or v2.
+
+    """
+    if file_type == "JSON":
+        return JSONTestcaseWriter(outfile, fmt_version)
+    else:
+        return YAMLTestcaseWriter(outfile, fmt_version)
@@ -69,7 +69,7 @@ setup(
     url=about['__url__'],
     license=about['__license__'],
     python_requires='>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, <4',
-    packages=find_packages(exclude=['test.*', 'test']),
+    packages=find_packages(exclude=['test.*', 'test', 'benchmarks.*', 'benchmarks']),
     package_data={},
     keywords='har converter HttpRunner yaml json',
     install_requires=install_requires,
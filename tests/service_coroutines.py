@@ -0,0 +1,62 @@
+""" coroutines of service tests, kept out of test modules so that Python 2 and
+    Python 3 before 3.7 can still import them.
+"""
+
+import asyncio
+import io
+
+from har2case import exceptions, service
+
+
+def run_with_service(coroutine_function, *args, **kwargs):
+    """ run coroutine_function(conversion_service, *args) with a new service.
+    """
+    async def run():
+        async with service.ConversionService(workers=1, **kwargs) as conversion_service:
+            return await coroutine_function(conversion_service, *args)
+
+    return asyncio.run(run())
+
+
+async def aconvert_sources(conversion_service, har_content, har_path):
+    return await asyncio.gather(
+        conversion_service.aconvert(har_content, fmt_version="v2"),
+        conversion_service.aconvert(io.BytesIO(har_content), "YAML"),
+        conversion_service.aconvert(har_path, "JSON", filter_str="method:GET")
+    )
+
+
+async def aconvert_errors(conversion_service, test_case, har_content):
+    with test_case.assertRaises(exceptions.FileFormatError):
+        await conversion_service.aconvert(b'{"log": {"entries": [{"request": 1}]}}')
+
+    with test_case.assertRaises(exceptions.ParamsError):
+        await conversion_service.aconvert(har_content, workers=2)
+
+    # service still converts after errors
+    return await conversion_service.aconvert(har_content)
+
+
+async def aconvert_timeout(conversion_service, test_case, har_content):
+    with test_case.assertRaises(exceptions.ConversionTimeout):
+        await conversion_service.aconvert(har_content)
+
+
+async def _request(port, raw_request):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw_request)
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), body
+
+
+async def request_server(conversion_service, raw_requests):
+    server = await asyncio.start_server(
+        service.make_request_handler(conversion_service, max_upload_size=1024 * 1024),
+        "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await asyncio.gather(*[
+            _request(port, raw_request) for raw_request in raw_requests
+        ])
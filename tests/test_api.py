@@ -0,0 +1,105 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import har2case
+from har2case import exceptions, utils, writers
+from har2case.compat import is_py2
+from har2case.core import HarParser
+
+# bytes is str on Python 2, which is taken as HAR file path
+har_bytes = bytearray if is_py2 else bytes
+
+
+class TestAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.har_path = os.path.join(
+            os.path.dirname(__file__), "data", "demo.har")
+        with io.open(self.har_path, "rb") as f:
+            self.har_content = har_bytes(f.read())
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_convert_sources(self):
+        for fmt_version in ["v1", "v2"]:
+            expected_testcase = HarParser(self.har_path).make_testcase(fmt_version)
+            entries = utils.load_har_log_entries(self.har_path)
+            sources = [
+                self.har_path,
+                self.har_content,
+                io.BytesIO(self.har_content),
+                json.loads(self.har_content.decode("utf-8")),
+                entries,
+                iter(entries)
+            ]
+            for source in sources:
+                testcase = har2case.convert(source, fmt_version=fmt_version)
+                self.assertEqual(testcase, expected_testcase)
+
+    def test_iter_teststeps(self):
+        entries = utils.load_har_log_entries(self.har_path)
+        for source in [self.har_content, entries]:
+            teststeps = list(har2case.iter_teststeps(source))
+            self.assertEqual(teststeps[0]["name"], "/api/v1/Account/Login")
+
+            teststeps = list(har2case.iter_teststeps(source, filter_str="method:GET"))
+            self.assertEqual(teststeps, [])
+
+    def test_convert_outputs(self):
+        for file_type in ["JSON", "YAML"]:
+            har_path = os.path.join(self.tmp_dir, "demo.har")
+            shutil.copy(self.har_path, har_path)
+            with io.open(HarParser(har_path).gen_testcase(file_type), encoding="utf-8") as f:
+                expected_content = f.read()
+
+            output_path = os.path.join(self.tmp_dir, "output.txt")
+            self.assertEqual(
+                har2case.convert(self.har_content, output_path, file_type), output_path)
+            with io.open(output_path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), expected_content)
+
+            text_file = io.StringIO()
+            har2case.convert(self.har_content, text_file, file_type)
+            self.assertEqual(text_file.getvalue(), expected_content)
+
+            binary_file = io.BytesIO()
+            har2case.convert(self.har_content, binary_file, file_type)
+            self.assertFalse(binary_file.closed)
+            self.assertEqual(binary_file.getvalue(), expected_content.encode("utf-8"))
+
+        writer = writers.MemoryTestcaseWriter(fmt_version="v2")
+        har2case.convert(self.har_content, writer)
+        self.assertEqual(writer.testcase, HarParser(self.har_path).make_testcase("v2"))
+
+    def test_convert_errors(self):
+        with self.assertRaises(exceptions.FileFormatError):
+            har2case.convert(har_bytes(b'{"log": {"entries": [}}'))
+
+        with self.assertRaises(exceptions.FileFormatError):
+            har2case.convert({"log": {}})
+
+        with self.assertRaises(exceptions.ParamsError):
+            har2case.convert(io.StringIO(self.har_content.decode("utf-8")))
+
+        with self.assertRaises(exceptions.ParamsError):
+            har2case.convert(1)
+
+        with self.assertRaises(exceptions.ParamsError):
+            har2case.convert(self.har_content, incremental=True)
+
+        with self.assertRaises(exceptions.ParamsError):
+            HarParser(self.har_content).gen_testcase()
+
+        output_path = os.path.join(self.tmp_dir, "output.json")
+        with self.assertRaises(exceptions.FileFormatError):
+            har2case.convert(har_bytes(
+                b'{"log": {"entries": [{"request": '
+                b'{"method": "GET", "url": "https://httprunner.top/"}}, ]}}'
+            ), output_path)
+        self.assertFalse(os.path.exists(output_path))
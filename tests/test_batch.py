@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from har2case import batch
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = os.path.join(os.path.dirname(__file__), "data")
+        self.tmp_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.tmp_dir, "sub"))
+        shutil.copy(
+            os.path.join(self.data_dir, "demo.har"),
+            os.path.join(self.tmp_dir, "demo.har"))
+        shutil.copy(
+            os.path.join(self.data_dir, "demo-quickstart.har"),
+            os.path.join(self.tmp_dir, "sub", "demo-quickstart.har"))
+        with open(os.path.join(self.tmp_dir, "sub", "malformed.har"), "w") as f:
+            f.write('{"log": {"entries": [')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_collect_har_files(self):
+        har_files = batch.collect_har_files([
+            self.tmp_dir,
+            os.path.join(self.tmp_dir, "*.har")
+        ])
+        self.assertEqual(
+            har_files,
+            [
+                os.path.join(self.tmp_dir, "demo.har"),
+                os.path.join(self.tmp_dir, "sub", "demo-quickstart.har"),
+                os.path.join(self.tmp_dir, "sub", "malformed.har")
+            ]
+        )
+
+        har_files = batch.collect_har_files([os.path.join(self.tmp_dir, "sub", "[d]emo-?uick*")])
+        self.assertEqual(har_files, [os.path.join(self.tmp_dir, "sub", "demo-quickstart.har")])
+
+    def test_iter_convert_har_files(self):
+        har_files = batch.collect_har_files([self.tmp_dir])
+        for workers in [1, 2]:
+            results = sorted(batch.iter_convert_har_files(har_files, workers))
+            self.assertEqual(len(results), 3)
+            self.assertEqual(
+                results[0],
+                (har_files[0], os.path.join(self.tmp_dir, "demo.json"), None)
+            )
+            self.assertIsNone(results[1][2])
+            self.assertIsNone(results[2][1])
+            self.assertIn("FileFormatError", results[2][2])
+            self.assertFalse(
+                os.path.exists(os.path.join(self.tmp_dir, "sub", "malformed.json")))
+
+    def test_run_batch(self):
+        failures = batch.run_batch([self.tmp_dir], workers=2, file_type="YAML")
+        self.assertEqual(failures, 1)
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, "demo.yaml")))
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from har2case import cache
+from har2case.core import IGNORE_REQUEST_HEADERS
+
+
+def make_entry(url, headers=None, text="{}"):
+    return {
+        "startedDateTime": "2019-01-01T00:00:00.000+08:00",
+        "request": {"method": "GET", "url": url, "headers": headers or []},
+        "response": {"status": 200, "content": {"text": text}}
+    }
+
+
+def put_teststeps(cache_dir, prefix, count):
+    with cache.TeststepCache(cache_dir, IGNORE_REQUEST_HEADERS) as teststep_cache:
+        for index in range(count):
+            teststep_cache.put("{}{}".format(prefix, index), {"name": prefix})
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def open_cache(self, **kwargs):
+        return cache.TeststepCache(self.cache_dir, IGNORE_REQUEST_HEADERS, **kwargs)
+
+    def test_make_key(self):
+        with self.open_cache() as teststep_cache:
+            key = teststep_cache.make_key(make_entry("http://a.b/1"))
+            entry_json = make_entry(
+                "http://a.b/1", [{"name": "Cookie", "value": "a=1"}])
+            entry_json["startedDateTime"] = "2020-01-01T00:00:00.000+08:00"
+            self.assertEqual(teststep_cache.make_key(entry_json), key)
+
+            self.assertNotEqual(teststep_cache.make_key(make_entry("http://a.b/2")), key)
+            self.assertNotEqual(
+                teststep_cache.make_key(make_entry(
+                    "http://a.b/1", [{"name": "X-Token", "value": "1"}])),
+                key
+            )
+
+        with self.open_cache(options={"max_body_size": 1}) as teststep_cache:
+            self.assertNotEqual(teststep_cache.make_key(make_entry("http://a.b/1")), key)
+
+        with cache.TeststepCache(self.cache_dir, ["cookie"]) as teststep_cache:
+            self.assertNotEqual(teststep_cache.make_key(make_entry("http://a.b/1")), key)
+
+    def test_get_put(self):
+        teststep = {"name": "", "request": {"url": "http://a.b/1"}, "validate": []}
+        with self.open_cache() as teststep_cache:
+            self.assertIsNone(teststep_cache.get("key"))
+            teststep_cache.put("key", teststep)
+
+        with self.open_cache() as teststep_cache:
+            self.assertEqual(teststep_cache.get("key"), teststep)
+
+    def test_evict(self):
+        teststep = {"name": "x" * 100}
+        with self.open_cache(max_size=1000) as teststep_cache:
+            for index in range(5):
+                teststep_cache.put("key{}".format(index), teststep)
+
+        with self.open_cache(max_size=1000) as teststep_cache:
+            self.assertEqual(teststep_cache.get("key0"), teststep)
+            for index in range(5, 12):
+                teststep_cache.put("key{}".format(index), teststep)
+
+        with self.open_cache(max_size=1000) as teststep_cache:
+            # least recently used are evicted
+            self.assertIsNotNone(teststep_cache.get("key0"))
+            self.assertIsNone(teststep_cache.get("key1"))
+            self.assertIsNotNone(teststep_cache.get("key11"))
+
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_dir, cache.CACHE_FILE_NAME)))
+
+    def test_put_from_processes(self):
+        with self.open_cache() as teststep_cache:
+            # puts of an open cache do not lock out other processes
+            teststep_cache.put("key", {"name": "main"})
+            processes = [
+                multiprocessing.Process(
+                    target=put_teststeps, args=(self.cache_dir, prefix, 50))
+                for prefix in ["a", "b"]
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(30)
+                if process.is_alive():
+                    process.terminate()
+                self.assertEqual(process.exitcode, 0)
+
+            self.assertEqual(teststep_cache.get("a49"), {"name": "a"})
+            self.assertEqual(teststep_cache.get("b0"), {"name": "b"})
+
+        with self.open_cache() as teststep_cache:
+            self.assertEqual(teststep_cache.get("key"), {"name": "main"})
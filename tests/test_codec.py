@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from har2case import codec
+from har2case.compat import ensure_ascii
+
+
+class StrictJSON(object):
+    """ json module of Python 3.4 and 3.5, whose loads only accepts str.
+    """
+
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+    def loads(self, s, **kwargs):
+        if not isinstance(s, type(u"")):
+            raise TypeError("the JSON object must be str, not {}".format(type(s).__name__))
+        return json.loads(s, **kwargs)
+
+
+class TestCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.codecs = []
+        for name in codec.JSON_BACKENDS:
+            try:
+                self.codecs.append(codec.make_codec(name))
+            except ImportError:
+                continue
+
+        self.obj = {
+            "name": u"/api/中文",
+            "request": {"params": {"a": ["1", "2"]}, "json": {"b": None, "c": [], "d": {}}},
+            "validate": [{"eq": ["status_code", 200]}, {"eq": ["content.e", True]}]
+        }
+
+    def tearDown(self):
+        codec.use_backend()
+
+    def test_make_codec_auto(self):
+        self.assertEqual(codec.make_codec("auto").name, self.codecs[0].name)
+        with self.assertRaises(ValueError):
+            codec.make_codec("unknown")
+
+    def test_loads(self):
+        json_str = json.dumps(self.obj)
+        for json_codec in self.codecs:
+            self.assertEqual(json_codec.loads(json_str), self.obj)
+            self.assertEqual(json_codec.loads(json_str.encode("utf-8")), self.obj)
+
+    def test_loads_bytes_as_str(self):
+        json_bytes = json.dumps(self.obj).encode("utf-8")
+        loads_bytes = codec._JSON_LOADS_BYTES
+        codec.json, codec._JSON_LOADS_BYTES = StrictJSON(), False
+        try:
+            for json_codec in self.codecs:
+                self.assertEqual(json_codec.loads(json_bytes), self.obj)
+                self.assertEqual(json_codec.loads(bytearray(json_bytes)), self.obj)
+                self.assertTrue(json_codec.loads(b'{"a": NaN}')["a"] != 0)
+                self.assertEqual(json_codec.loads_buffer(bytearray(json_bytes)), self.obj)
+                self.assertTrue(json_codec.loads_buffer(bytearray(b'{"a": NaN}'))["a"] != 0)
+        finally:
+            codec.json, codec._JSON_LOADS_BYTES = json, loads_bytes
+
+    def test_loads_fallback(self):
+        for json_codec in self.codecs:
+            self.assertTrue(json_codec.loads('{"a": NaN}')["a"] != 0)
+            with self.assertRaises(codec.JSONDecodeError):
+                json_codec.loads("{")
+
+    def test_dumps_indent(self):
+        expected = json.dumps(self.obj, ensure_ascii=ensure_ascii, indent=4)
+        for json_codec in self.codecs:
+            self.assertEqual(json_codec.loads(json_codec.dumps(self.obj, indent=4)), self.obj)
+            if json_codec.name in ["orjson", "simplejson", "json"]:
+                self.assertEqual(json_codec.dumps(self.obj, indent=4), expected)
+
+    def test_dumps_fallback(self):
+        obj = {"a": 2 ** 70}
+        for json_codec in self.codecs:
+            self.assertEqual(json.loads(json_codec.dumps(obj, indent=4)), obj)
+
+    def test_dumps_non_finite_floats(self):
+        obj = {"a": float("nan"), "b": [float("inf"), None]}
+        expected = json.dumps(obj, indent=4)
+        expected_canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+        for json_codec in self.codecs:
+            self.assertEqual(json_codec.dumps(obj, indent=4), expected)
+            self.assertEqual(
+                json_codec.dumps_canonical(obj).decode("utf-8"), expected_canonical)
+
+    def test_dumps_canonical(self):
+        reordered_obj = json.loads(json.dumps(self.obj, sort_keys=True))
+        for json_codec in self.codecs:
+            canonical = json_codec.dumps_canonical(self.obj)
+            self.assertIsInstance(canonical, bytes)
+            self.assertEqual(json.loads(canonical.decode("utf-8")), self.obj)
+            self.assertEqual(json_codec.dumps_canonical(reordered_obj), canonical)
+            self.assertEqual(
+                json_codec.dumps_canonical({"a": 2 ** 70}), b'{"a":1180591620717411303424}')
+
+    def test_use_backend(self):
+        self.assertEqual(codec.use_backend("json"), "json")
+        self.assertEqual(codec.loads('{"a": 1}'), {"a": 1})
@@ -0,0 +1,102 @@
+import bz2
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from har2case import compression, exceptions, reader, utils
+from har2case.core import HarParser
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.har_path = os.path.join(
+            os.path.dirname(__file__), "data", "demo.har")
+        with io.open(self.har_path, "rb") as f:
+            self.content = f.read()
+        self.log_entries = utils.load_har_log_entries(self.har_path)
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def compress(self, suffix, content=None):
+        har_path = os.path.join(self.tmp_dir, "demo.har" + suffix)
+        open_file = {".gz": gzip.GzipFile, ".bz2": bz2.BZ2File}
+        if lzma is not None:
+            open_file[".xz"] = lzma.LZMAFile
+        with open_file[suffix](har_path, "wb") as f:
+            f.write(self.content if content is None else content)
+        return har_path
+
+    def test_har_suffix(self):
+        self.assertTrue(compression.is_har_file("a/demo.har.zst"))
+        self.assertFalse(compression.is_har_file("a/demo.json.gz"))
+        self.assertEqual(compression.get_compression("demo.har.xz"), ".xz")
+        self.assertIsNone(compression.get_compression("demo.har"))
+        self.assertEqual(compression.strip_har_suffix("a/demo.har.gz"), "a/demo")
+        self.assertEqual(compression.strip_har_suffix("a/demo.txt"), "a/demo")
+
+    def test_iter_har_log_entries(self):
+        # lzma is not in the standard library of Python 2
+        suffixes = [".gz", ".bz2", ".xz"] if lzma is not None else [".gz", ".bz2"]
+        for suffix in suffixes:
+            har_path = self.compress(suffix)
+            self.assertEqual(list(reader.iter_har_log_entries(har_path)), self.log_entries)
+            self.assertEqual(utils.load_har_log_entries(har_path), self.log_entries)
+
+    def test_read_small_blocks(self):
+        har_path = self.compress(".gz")
+        block_size = compression.DECOMPRESS_BLOCK_SIZE
+        compression.DECOMPRESS_BLOCK_SIZE = 7
+        try:
+            with compression.open_har_file(har_path) as f:
+                self.assertEqual(f.read(10) + f.read(1000) + f.read(), self.content)
+                self.assertEqual(f.read(10), b"")
+
+            # closed before the whole file is read
+            with compression.open_har_file(har_path) as f:
+                self.assertEqual(f.read(3), self.content[:3])
+        finally:
+            compression.DECOMPRESS_BLOCK_SIZE = block_size
+
+    def test_corrupted(self):
+        har_path = self.compress(".gz")
+        with io.open(har_path, "r+b") as f:
+            f.truncate(os.path.getsize(har_path) // 2)
+
+        with self.assertRaises(exceptions.FileFormatError):
+            list(reader.iter_har_log_entries(har_path))
+
+    @unittest.skipUnless(zstandard, "zstandard is not installed")
+    def test_zstd(self):
+        har_path = os.path.join(self.tmp_dir, "demo.har.zst")
+        with io.open(har_path, "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(self.content))
+        self.assertEqual(utils.load_har_log_entries(har_path), self.log_entries)
+
+    def test_gen_testcase(self):
+        har_path = self.compress(".gz")
+        json_file = HarParser(har_path, incremental=True).gen_testcase()
+        self.assertEqual(json_file, os.path.join(self.tmp_dir, "demo.json"))
+
+        expected_file = HarParser(self.har_path).gen_testcase()
+        try:
+            with io.open(json_file, encoding="utf-8") as f, \
+                    io.open(expected_file, encoding="utf-8") as expected_f:
+                self.assertEqual(f.read(), expected_f.read())
+        finally:
+            os.remove(expected_file)
@@ -0,0 +1,116 @@
+import json
+import os
+import unittest
+
+from har2case import correlate
+from har2case.compat import is_py2
+from har2case.core import HarParser
+
+
+def make_entry(headers=(), body=None):
+    content = {}
+    if body is not None:
+        content = {"mimeType": "application/json", "text": json.dumps(body)}
+    return {
+        "request": {"method": "GET", "url": "https://httprunner.top/"},
+        "response": {
+            "status": 200,
+            "headers": [{"name": name, "value": value} for name, value in headers],
+            "content": content
+        }
+    }
+
+
+def make_teststep(url, headers=None, **fields):
+    request = dict(url=url, method="GET", **fields)
+    if headers:
+        request["headers"] = headers
+    return {"name": url, "request": request, "validate": [{"eq": ["status_code", 200]}]}
+
+
+class TestCorrelate(unittest.TestCase):
+
+    def test_is_dynamic_value(self):
+        self.assertTrue(correlate.is_dynamic_value("baNLX1zhFYP11Seb"))
+        self.assertFalse(correlate.is_dynamic_value("application/json"))
+        self.assertFalse(correlate.is_dynamic_value("1000"))
+        self.assertFalse(correlate.is_dynamic_value("user 123456"))
+        self.assertFalse(correlate.is_dynamic_value(12345678))
+
+    def test_collect_response_values(self):
+        entry_json = make_entry(
+            [("Set-Cookie", "sid=s3ss10n; Path=/"), ("Location", "/orders/ord1234")],
+            {"data": {"token": "t0ken123", "items": [{"id": "item0001"}]}, "a.b": "ignored1"}
+        )
+        values = correlate.collect_response_values(entry_json)
+        content_values = [
+            ("t0ken123", "content.data.token", "token"),
+            ("item0001", "content.data.items.0.id", "id")
+        ]
+        if is_py2:
+            # JSON objects are loaded as unordered dicts on Python 2
+            self.assertEqual(sorted(values[:2]), sorted(content_values))
+        else:
+            self.assertEqual(values[:2], content_values)
+        self.assertEqual(values[2:], [
+            ("s3ss10n", "cookies.sid", "sid"),
+            ("/orders/ord1234", "headers.Location", "location")
+        ])
+
+    def test_correlate_teststeps(self):
+        pairs = [
+            (make_teststep("https://httprunner.top/login"), correlate.collect_response_values(
+                make_entry([("Location", "/orders/ord1234")], {"token": "t0ken123"}))),
+            (make_teststep(
+                "https://httprunner.top/orders/ord1234",
+                {"Authorization": "Bearer t0ken123"},
+                json={"ids": ["t0ken123"], "name": "user1"}
+            ), []),
+            (make_teststep("https://httprunner.top/orders/ord1234", params={"t": "t0ken123"}), [])
+        ]
+        pairs[0][0]["validate"].append({"eq": ["content.token", "t0ken123"]})
+
+        login_step, order_step, location_step = correlate.correlate_teststeps(pairs)
+        self.assertEqual(login_step["extract"], [
+            {"location": "headers.Location"},
+            {"token": "content.token"}
+        ])
+        # validators of extracted values are dropped
+        self.assertEqual(login_step["validate"], [{"eq": ["status_code", 200]}])
+        if not is_py2:
+            self.assertEqual(list(login_step), ["name", "request", "extract", "validate"])
+
+        # relative location includes leading slash
+        self.assertEqual(order_step["request"]["url"], "https://httprunner.top$location")
+        self.assertEqual(order_step["request"]["headers"], {"Authorization": "Bearer $token"})
+        self.assertEqual(order_step["request"]["json"], {"ids": ["$token"], "name": "user1"})
+        self.assertNotIn("extract", order_step)
+        self.assertEqual(location_step["request"]["params"], {"t": "$token"})
+
+    def test_sent_values_not_correlated(self):
+        correlator = correlate.TeststepCorrelator(index_size=2)
+        # device id sent before it is returned, values evicted from index
+        correlator.add(make_teststep("https://httprunner.top/dev1ce01"), [])
+        correlator.add(make_teststep("https://httprunner.top/a"), [
+            ("dev1ce01", "content.device", "device"),
+            ("value001", "content.a", "a"),
+            ("value002", "content.b", "b"),
+            ("value003", "content.c", "c")
+        ])
+        correlator.add(make_teststep("https://httprunner.top/dev1ce01/value001/value003"), [])
+
+        teststeps = list(correlator.iter_teststeps())
+        self.assertEqual(teststeps[0]["request"]["url"], "https://httprunner.top/dev1ce01")
+        self.assertEqual(
+            teststeps[2]["request"]["url"], "https://httprunner.top/dev1ce01/value001/$c")
+        self.assertEqual(teststeps[1]["extract"], [{"c": "content.c"}])
+
+    def test_har_parser_correlate(self):
+        har_path = os.path.join(os.path.dirname(__file__), "data", "demo-quickstart.har")
+        testcase = HarParser(har_path, correlate=True).make_testcase()
+        self.assertEqual(testcase[1]["test"]["extract"], [{"token": "content.token"}])
+        self.assertEqual(testcase[2]["test"]["request"]["headers"]["token"], "$token")
+
+        self.assertEqual(
+            HarParser(har_path, correlate=True, workers=2).make_testcase(), testcase)
+        self.assertFalse(HarParser(har_path, correlate=True, dedup=True).correlate)
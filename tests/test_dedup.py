@@ -0,0 +1,56 @@
+import unittest
+
+from har2case import dedup
+
+
+def make_teststep(params, json_body=None, validate=None):
+    teststep = {
+        "name": "/api/users",
+        "request": {
+            "url": "https://httprunner.top/api/users",
+            "params": params,
+            "method": "POST",
+            "headers": {"Content-Type": "application/json"}
+        },
+        "validate": validate or [{"eq": ["status_code", 200]}]
+    }
+    if json_body is not None:
+        teststep["request"]["json"] = json_body
+    return teststep
+
+
+class TestDedup(unittest.TestCase):
+
+    def dedup(self, teststeps):
+        deduplicator = dedup.TeststepDeduplicator()
+        for teststep in teststeps:
+            deduplicator.add(teststep)
+        return deduplicator, list(deduplicator.iter_teststeps())
+
+    def test_drop_duplicates(self):
+        teststep = make_teststep({"page": "1"}, {"user": "a"})
+        other = make_teststep({"page": "1", "size": "10"})
+        deduplicator, teststeps = self.dedup(
+            [teststep, other, make_teststep({"page": "1"}, {"user": "a"})])
+        self.assertEqual(teststeps, [teststep, other])
+        self.assertEqual(deduplicator.duplicates_count, 1)
+        self.assertEqual(deduplicator.compression_ratio, 1.5)
+
+    def test_duplicates_validators(self):
+        teststeps = [
+            make_teststep(
+                {"page": "1"}, None,
+                [{"eq": ["status_code", 200]}, {"eq": ["content.ts", ts]}])
+            for ts in [1, 2, 1]
+        ]
+        _, deduplicated = self.dedup(teststeps)
+        self.assertEqual(len(deduplicated), 1)
+        # validators differing between duplicates are dropped
+        self.assertEqual(deduplicated[0]["validate"], [{"eq": ["status_code", 200]}])
+        self.assertEqual(len(teststeps[0]["validate"]), 2)
+
+    def test_keep_near_duplicates(self):
+        teststeps = [make_teststep({"page": str(page), "size": "10"}) for page in [1, 2]]
+        deduplicator, deduplicated = self.dedup(teststeps)
+        self.assertEqual(deduplicated, teststeps)
+        self.assertEqual(deduplicator.duplicates_count, 0)
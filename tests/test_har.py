@@ -1,10 +1,25 @@
+# -*- coding: utf-8 -*-
+import base64
+import io
+import json
 import os
+import shutil
+import tempfile
 
+from har2case import exceptions
 from har2case.utils import load_har_log_entries
 from har2case.core import HarParser
 from tests.test_utils import TestUtils
 
 
+def dumps_text(obj, **kwargs):
+    json_str = json.dumps(obj, **kwargs)
+    # json.dumps returns byte str on Python 2
+    if isinstance(json_str, bytes):
+        json_str = json_str.decode("utf-8")
+    return json_str
+
+
 class TestHar(TestUtils):
 
     def setUp(self):
@@ -95,6 +110,24 @@ class TestHar(TestUtils):
         teststeps = har_parser._prepare_teststeps("v1")
         self.assertEqual(teststeps, [])
 
+    def test_make_request_url(self):
+        entry_json = {
+            "request": {
+                "method": "GET",
+                "url": "https://httprunner.top/api/v1;v=2?ids=1&ids=2&page=1",
+                "queryString": [
+                    {"name": "ids", "value": "1"},
+                    {"name": "ids", "value": "2"},
+                    {"name": "page", "value": "1"}
+                ]
+            },
+            "response": {"status": 200}
+        }
+        teststep = self.har_parser._prepare_teststep(entry_json)
+        self.assertEqual(teststep["name"], "/api/v1")
+        self.assertEqual(teststep["request"]["url"], "https://httprunner.top/api/v1;v=2")
+        self.assertEqual(teststep["request"]["params"], {"ids": ["1", "2"], "page": "1"})
+
     def test_make_request_data_params(self):
         testcase_dict = {
             "name": "",
@@ -194,6 +227,72 @@ class TestHar(TestUtils):
             {"eq": ["headers.Content-Type", "application/json; charset=utf-8"]}
         )
 
+    def test_make_validate_lower_case_headers(self):
+        testcase_dict = {"name": "", "request": {}, "validate": []}
+        entry_json = {
+            "request": {},
+            "response": {
+                "status": 200,
+                "headers": [{"name": "content-type", "value": "text/html"}],
+                "content": {"mimeType": "text/html", "text": "<html></html>"}
+            }
+        }
+        self.har_parser._make_validate(testcase_dict, entry_json)
+        self.assertEqual(
+            testcase_dict["validate"][1],
+            {"eq": ["headers.Content-Type", "text/html"]}
+        )
+
+    def test_make_validate_oversize_body(self):
+        content = json.dumps({
+            "IsSuccess": True,
+            "Value": {"items": [{"id": index} for index in range(100)]},
+            "Code": 200,
+            "Message": None
+        })
+
+        def make_validate(har_parser, encoding):
+            testcase_dict = {"name": "", "request": {}, "validate": []}
+            text = content
+            if encoding == "base64":
+                text = base64.b64encode(content.encode("utf-8")).decode("ascii")
+
+            entry_json = {
+                "request": {"url": "https://httprunner.top/api"},
+                "response": {
+                    "status": 200,
+                    "content": {
+                        "mimeType": "application/json",
+                        "text": text,
+                        "encoding": encoding
+                    }
+                }
+            }
+            har_parser._make_validate(testcase_dict, entry_json)
+            return testcase_dict["validate"]
+
+        def sort_validators(validators):
+            # loaded content is unordered on Python 2, scanned content is not
+            return sorted(validators, key=lambda validator: validator["eq"][0])
+
+        for encoding in [None, "base64"]:
+            validators = sort_validators(make_validate(self.har_parser, encoding))
+            self.assertEqual(validators, [
+                {"eq": ["content.Code", 200]},
+                {"eq": ["content.IsSuccess", True]},
+                {"eq": ["content.Message", None]},
+                {"eq": ["status_code", 200]}
+            ])
+
+            har_parser = HarParser(self.har_path, max_body_size=100, profile=True)
+            self.assertEqual(sort_validators(make_validate(har_parser, encoding)), validators)
+            self.assertEqual(har_parser.stats.counters["validate_scanned_oversize"], 1)
+
+            har_parser = HarParser(
+                self.har_path, max_body_size=100, oversize_body="skip", profile=True)
+            self.assertEqual(make_validate(har_parser, encoding), [{"eq": ["status_code", 200]}])
+            self.assertEqual(har_parser.stats.counters["validate_skipped_oversize"], 1)
+
     def test_make_testcase_v1(self):
         har_path = os.path.join(
             os.path.dirname(__file__), "data", "demo-quickstart.har")
@@ -214,3 +313,153 @@ class TestHar(TestUtils):
         self.assertIn("config", testcase)
         self.assertIn("teststeps", testcase)
         self.assertEqual(len(testcase["teststeps"]), 2)
+
+    def test_gen_testcase_parallel(self):
+        log_entries = load_har_log_entries(self.har_path)
+        entries = []
+        for index in range(300):
+            entry_json = json.loads(json.dumps(log_entries[index % len(log_entries)]))
+            entry_json["request"]["url"] += "?index={}".format(index)
+            entries.append(entry_json)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            har_path = os.path.join(tmp_dir, "parallel.har")
+            with io.open(har_path, "w", encoding="utf-8") as f:
+                f.write(dumps_text({"log": {"entries": entries}}))
+
+            outputs = []
+            for workers in [1, 3]:
+                json_file = HarParser(har_path, workers=workers).gen_testcase(fmt_version="v2")
+                with io.open(json_file, encoding="utf-8") as f:
+                    outputs.append(f.read())
+
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual(len(json.loads(outputs[1])["teststeps"]), 300)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_gen_testcase_profile(self):
+        har_parser = HarParser(self.har_path, exclude_str="v2", profile=True)
+        json_file = har_parser.gen_testcase(file_type="JSON")
+        output_bytes = os.path.getsize(json_file)
+        os.remove(json_file)
+
+        stats = har_parser.stats
+        entries_count = len(load_har_log_entries(self.har_path))
+        self.assertEqual(stats.counters["entries_total"], entries_count)
+        self.assertEqual(
+            stats.counters["teststeps"],
+            entries_count - stats.counters.get("entries_excluded", 0)
+        )
+        self.assertEqual(stats.counters["output_bytes"], output_bytes)
+        self.assertEqual(stats.timings["load_entry"][0], entries_count)
+        self.assertEqual(stats.timings["make_validate"][0], stats.counters["teststeps"])
+        self.assertEqual(stats.timings["write_teststep"][0], stats.counters["teststeps"])
+        self.assertIn("make_request_url", stats.report())
+
+    def test_gen_testcase_no_profile(self):
+        self.assertIsNone(self.har_parser.stats)
+
+    def test_gen_testcase_cache(self):
+        har_path = os.path.join(
+            os.path.dirname(__file__), "data", "demo-quickstart.har")
+        cache_dir = tempfile.mkdtemp()
+        try:
+            outputs = []
+            for workers in [1, 1, 2]:
+                har_parser = HarParser(
+                    har_path, workers=workers, profile=True, cache_dir=cache_dir)
+                json_file = har_parser.gen_testcase(fmt_version="v2")
+                with io.open(json_file, encoding="utf-8") as f:
+                    outputs.append(f.read())
+                os.remove(json_file)
+
+                counters = har_parser.stats.counters
+                if outputs[1:]:
+                    self.assertEqual(counters["cache_hits"], counters["teststeps"])
+                else:
+                    self.assertEqual(counters["cache_misses"], counters["teststeps"])
+
+            self.assertEqual(outputs[0], outputs[1])
+            self.assertEqual(outputs[0], outputs[2])
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_gen_testcase_incremental(self):
+        log_entries = load_har_log_entries(self.har_path)
+        entries = []
+        for index in range(10):
+            entry_json = json.loads(json.dumps(log_entries[index % len(log_entries)]))
+            entry_json["request"]["url"] += u"?index={}&name=测试".format(index)
+            entries.append(entry_json)
+
+        def write_har(har_path, entries):
+            with io.open(har_path, "w", encoding="utf-8") as f:
+                f.write(dumps_text(
+                    {"log": {"entries": entries}}, indent=4, ensure_ascii=False))
+
+        def read(file_path):
+            with io.open(file_path, encoding="utf-8") as f:
+                return f.read()
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            har_path = os.path.join(tmp_dir, "incremental.har")
+            for file_type in ["JSON", "YAML"]:
+                for fmt_version in ["v1", "v2"]:
+                    write_har(har_path, entries)
+                    expected = read(HarParser(har_path).gen_testcase(file_type, fmt_version))
+
+                    for count in [0, 4, 10]:
+                        write_har(har_path, entries[:count])
+                        HarParser(har_path, incremental=True).gen_testcase(
+                            file_type, fmt_version)
+
+                    write_har(har_path, entries)
+                    har_parser = HarParser(har_path, profile=True, incremental=True)
+                    output = read(har_parser.gen_testcase(file_type, fmt_version))
+                    self.assertEqual(output, expected)
+                    self.assertEqual(har_parser.stats.counters["checkpoint_resumed"], 1)
+                    self.assertEqual(har_parser.stats.counters.get("teststeps", 0), 0)
+
+            # changed prefix rebuilds testcase
+            entries[0]["request"]["url"] += "&changed=1"
+            write_har(har_path, entries)
+            expected = read(HarParser(har_path).gen_testcase("JSON", "v2"))
+            har_parser = HarParser(har_path, profile=True, incremental=True)
+            output = read(har_parser.gen_testcase("JSON", "v2"))
+            self.assertEqual(output, expected)
+            self.assertEqual(har_parser.stats.counters["checkpoint_rebuilt"], 1)
+            self.assertEqual(har_parser.stats.counters["teststeps"], 10)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_gen_testcase_incremental_error(self):
+        entries = load_har_log_entries(self.har_path)
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            har_path = os.path.join(tmp_dir, "incremental.har")
+            with io.open(har_path, "w", encoding="utf-8") as f:
+                f.write(dumps_text({"log": {"entries": entries[:1]}}, indent=4))
+            testcase_path = HarParser(har_path, incremental=True).gen_testcase()
+            with io.open(testcase_path, "rb") as f:
+                testcase = f.read()
+
+            # failed resumed conversion keeps testcase and checkpoint
+            with io.open(har_path, "w", encoding="utf-8") as f:
+                f.write(dumps_text({"log": {"entries": entries[:1] + [{"request": 1}]}}, indent=4))
+            with self.assertRaises(exceptions.FileFormatError):
+                HarParser(har_path, incremental=True).gen_testcase()
+            with io.open(testcase_path, "rb") as f:
+                self.assertEqual(f.read(), testcase)
+
+            with io.open(har_path, "w", encoding="utf-8") as f:
+                f.write(dumps_text({"log": {"entries": entries}}, indent=4))
+            har_parser = HarParser(har_path, profile=True, incremental=True)
+            har_parser.gen_testcase()
+            self.assertEqual(har_parser.stats.counters["checkpoint_resumed"], 1)
+            with io.open(testcase_path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f), HarParser(har_path).make_testcase())
+        finally:
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from har2case import headers
+from har2case.exceptions import FileFormatError
+
+
+class TestHeaders(unittest.TestCase):
+
+    def test_header_filter(self):
+        header_filter = headers.HeaderFilter()
+        self.assertTrue(header_filter.is_ignored("Host"))
+        self.assertTrue(header_filter.is_ignored(":authority"))
+        self.assertFalse(header_filter.is_ignored("User-Agent"))
+
+        header_filter = headers.HeaderFilter(allow=["Cookie"], deny=["x-request-id"])
+        self.assertEqual(
+            header_filter.filter([
+                ("Cookie", "a=1"),
+                ("X-Request-ID", "1"),
+                ("host", "httprunner.top"),
+                ("User-Agent", "iOS/10.3")
+            ]),
+            {"Cookie": "a=1", "User-Agent": "iOS/10.3"}
+        )
+
+    def test_lookup_headers(self):
+        header_pairs = [
+            ("content-type", "text/plain"),
+            ("Server", "nginx"),
+            ("Content-Type", "application/json")
+        ]
+        self.assertEqual(
+            headers.lookup_headers(header_pairs, ["Content-Type", "Date"]),
+            {"Content-Type": "application/json"}
+        )
+
+    def test_load_header_filter(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            config_path = os.path.join(tmp_dir, "headers.yml")
+            with open(config_path, "w") as f:
+                f.write("allow: [Cookie]\ndeny:\n  - X-Request-Id\n")
+
+            header_filter = headers.load_header_filter(config_path, deny=["User-Agent"])
+            self.assertFalse(header_filter.is_ignored("cookie"))
+            self.assertTrue(header_filter.is_ignored("x-request-id"))
+            self.assertTrue(header_filter.is_ignored("user-agent"))
+
+            with open(config_path, "w") as f:
+                f.write('{"allow": "Cookie"}')
+            with self.assertRaises(FileFormatError):
+                headers.load_header_filter(config_path)
+        finally:
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,90 @@
+import base64
+import unittest
+
+from har2case import exceptions, ir
+
+
+class TestIR(unittest.TestCase):
+
+    def setUp(self):
+        self.entry_json = {
+            "request": {
+                "method": "POST",
+                "url": "https://httprunner.top/api?v=1",
+                "queryString": [{"name": "v", "value": "1"}],
+                "headers": [
+                    {"name": "Content-Type", "value": "application/json"},
+                    {"name": "User-Agent", "value": "iOS/10.3"}
+                ],
+                "postData": {
+                    "mimeType": "application/x-www-form-urlencoded",
+                    "params": [{"name": "a", "value": "1"}]
+                }
+            },
+            "response": {
+                "status": 200,
+                "headers": [
+                    {"name": "Content-Type", "value": "text/plain"},
+                    {"name": "Content-Type", "value": "application/json"}
+                ],
+                "content": {
+                    "mimeType": "application/json",
+                    "text": base64.b64encode(b'{"a": 1}').decode("ascii"),
+                    "encoding": "base64"
+                }
+            }
+        }
+
+    def test_make_entry(self):
+        entry = ir.make_entry(self.entry_json)
+        self.assertIs(ir.make_entry(entry), entry)
+
+        request = entry.request
+        self.assertEqual(request.method, "POST")
+        self.assertEqual(request.query, (("v", "1"),))
+        self.assertEqual(request.post_params, (("a", "1"),))
+        self.assertIsNone(request.post_text)
+        self.assertEqual(
+            list(request.headers),
+            [("Content-Type", "application/json"), ("User-Agent", "iOS/10.3")]
+        )
+
+        response = entry.response
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body(), b'{"a": 1}')
+        self.assertEqual(response.body_size, 9)
+
+    def test_headers_get(self):
+        headers = ir.make_entry(self.entry_json).response.headers
+        self.assertEqual(len(headers), 2)
+        self.assertEqual(headers.get("Content-Type"), "application/json")
+        self.assertIsNone(headers.get("Server"))
+        list(headers)
+        self.assertEqual(headers.get("Content-Type"), "application/json")
+
+    def test_post_text(self):
+        self.entry_json["request"]["postData"] = {"mimeType": "text/plain", "text": ""}
+        del self.entry_json["response"]
+        entry = ir.make_entry(self.entry_json)
+        self.assertEqual(entry.request.post_text, "")
+        self.assertIsNone(entry.request.post_params)
+        self.assertIsNone(entry.response.status)
+        self.assertEqual(len(entry.response.headers), 0)
+
+    def test_make_entry_errors(self):
+        malformed_entries = [
+            1,
+            {"response": {}},
+            {"request": 1},
+            {"request": {"url": 1}},
+            {"request": {"headers": [1]}},
+            {"request": {"postData": {"params": {"a": "1"}}}},
+            {"request": {}, "response": {"content": []}}
+        ]
+        for entry_json in malformed_entries:
+            with self.assertRaises(exceptions.FileFormatError):
+                ir.make_entry(entry_json)
+
+        self.entry_json["response"]["content"]["text"] = "abc"
+        with self.assertRaises(exceptions.FileFormatError):
+            ir.make_entry(self.entry_json).response.body()
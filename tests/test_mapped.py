@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import base64
+import codecs
+import io
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from har2case import cache, codec, ir, mapped, utils
+from har2case.core import HarParser
+from har2case.headers import IGNORE_REQUEST_HEADERS
+from tests.test_codec import StrictJSON
+
+
+class TestMapped(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.har_path = os.path.join(self.tmp_dir, "mapped.har")
+        self.content_text = base64.b64encode(
+            b'{"a": 1, "b": "' + b"x" * 300 + b'"}').decode("ascii")
+        self.post_text = u'{"name": "中文 \\"quoted\\" \\\\", "size": "' + u"y" * 300 + u'"}'
+        self.har_json = {
+            "log": {
+                "entries": [
+                    {
+                        "request": {
+                            "method": "POST",
+                            "url": "https://httprunner.top/api",
+                            "headers": [{"name": "Content-Type", "value": "application/json"}],
+                            "postData": {"mimeType": "application/json", "text": self.post_text}
+                        },
+                        "response": {
+                            "status": 200,
+                            "headers": [],
+                            "content": {
+                                "mimeType": "application/json",
+                                "text": self.content_text,
+                                "encoding": "base64"
+                            }
+                        }
+                    },
+                    {
+                        "request": {"method": "GET", "url": "https://httprunner.top/small"},
+                        "response": {
+                            "status": 200,
+                            "content": {"mimeType": "text/plain", "text": "small"}
+                        }
+                    }
+                ]
+            }
+        }
+        self.write_har(self.har_json)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_har(self, har_json, bom=False):
+        with io.open(self.har_path, "wb") as f:
+            if bom:
+                f.write(codecs.BOM_UTF8)
+            f.write(json.dumps(har_json, indent=2, ensure_ascii=False).encode("utf-8"))
+
+    def test_load_lazy_texts(self):
+        entries = mapped.load_mapped_har_log_entries(self.har_path, lazy_text_size=100)
+        self.assertEqual(entries, self.har_json["log"]["entries"])
+
+        content_text = entries[0]["response"]["content"]["text"]
+        post_text = entries[0]["request"]["postData"]["text"]
+        self.assertIsInstance(content_text, mapped.LazyText)
+        self.assertIsInstance(post_text, mapped.LazyText)
+        self.assertEqual(len(content_text), len(self.content_text))
+        self.assertEqual(post_text.decode(), self.post_text)
+        self.assertEqual(entries[1]["response"]["content"]["text"], "small")
+
+        self.assertEqual(pickle.loads(pickle.dumps(post_text)), self.post_text)
+
+    def test_load_plain(self):
+        self.write_har(self.har_json, bom=True)
+        entries = utils.load_har_log_entries(self.har_path)
+        self.assertEqual(entries, self.har_json["log"]["entries"])
+        self.assertNotIsInstance(
+            entries[0]["response"]["content"]["text"], mapped.LazyText)
+
+    def test_load_str_only_json(self):
+        loads_bytes = codec._JSON_LOADS_BYTES
+        codec.json, codec._JSON_LOADS_BYTES = StrictJSON(), False
+        try:
+            for backend in codec.JSON_BACKENDS:
+                try:
+                    codec.use_backend(backend)
+                except ImportError:
+                    continue
+
+                self.assertEqual(
+                    utils.load_har_log_entries(self.har_path), self.har_json["log"]["entries"])
+                entries = mapped.load_mapped_har_log_entries(self.har_path, lazy_text_size=100)
+                self.assertEqual(entries, self.har_json["log"]["entries"])
+                self.assertEqual(
+                    entries[0]["request"]["postData"]["text"].decode(), self.post_text)
+        finally:
+            codec.json, codec._JSON_LOADS_BYTES = json, loads_bytes
+            codec.use_backend()
+
+    def test_text_keys_elsewhere(self):
+        self.har_json["log"]["entries"][1]["_comment"] = {"text": "z" * 200}
+        self.har_json["log"]["entries"][1]["response"]["_mimeType"] = "text"
+        self.write_har(self.har_json)
+
+        entries = mapped.load_mapped_har_log_entries(self.har_path, lazy_text_size=100)
+        self.assertEqual(entries, self.har_json["log"]["entries"])
+        self.assertIsInstance(entries[1]["_comment"]["text"], mapped.LazyText)
+
+    def test_ir(self):
+        entries = mapped.load_mapped_har_log_entries(self.har_path, lazy_text_size=100)
+        entry = ir.make_entry(entries[0])
+        self.assertEqual(entry.request.post_text, self.post_text)
+        self.assertEqual(entry.response.body(), base64.b64decode(self.content_text))
+
+    def test_cache_key(self):
+        lazy_entries = mapped.load_mapped_har_log_entries(self.har_path, lazy_text_size=100)
+        entries = mapped.load_mapped_har_log_entries(self.har_path, lazy_text_size=None)
+        with cache.TeststepCache(self.tmp_dir, IGNORE_REQUEST_HEADERS) as teststep_cache:
+            self.assertEqual(
+                teststep_cache.make_key(lazy_entries[0]), teststep_cache.make_key(entries[0]))
+
+    def test_gen_testcase(self):
+        lazy_text_size = mapped.LAZY_TEXT_SIZE
+        mapped.LAZY_TEXT_SIZE = 100
+        try:
+            with io.open(HarParser(self.har_path, use_mmap=True).gen_testcase(), "rb") as f:
+                mapped_testcase = f.read()
+        finally:
+            mapped.LAZY_TEXT_SIZE = lazy_text_size
+
+        with io.open(HarParser(self.har_path).gen_testcase(), "rb") as f:
+            self.assertEqual(mapped_testcase, f.read())
@@ -0,0 +1,88 @@
+import unittest
+
+from har2case.exceptions import ParamsError
+from har2case.matcher import EXCLUDED, FILTERED, EntryMatcher, parse_rules
+
+
+def make_entry(url, method="GET", mime_type="application/json", status=200):
+    return {
+        "request": {"url": url, "method": method},
+        "response": {"status": status, "content": {"mimeType": mime_type}}
+    }
+
+
+class TestMatcher(unittest.TestCase):
+
+    def test_parse_rules(self):
+        self.assertEqual(parse_rules(None), [])
+        self.assertEqual(
+            parse_rules("cdn|host:Example.com|re:^https|path:re:\\.js$|a\\|b||"),
+            [
+                ("url", "cdn"),
+                ("host", "Example\\.com"),
+                ("url", "^https"),
+                ("path", "\\.js$"),
+                ("url", "a\\|b")
+            ]
+        )
+
+    def test_parse_rules_invalid_regex(self):
+        with self.assertRaises(ParamsError):
+            parse_rules("re:(unclosed")
+
+    def test_empty_matcher(self):
+        matcher = EntryMatcher()
+        self.assertFalse(matcher)
+        self.assertIsNone(matcher.check_entry(make_entry("https://a.com/")))
+
+    def test_exclude_keywords(self):
+        matcher = EntryMatcher(exclude_str="cdn.|analytics|.png")
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://cdn.a.com/app.js")), EXCLUDED)
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://a.com/logo.png")), EXCLUDED)
+        self.assertIsNone(matcher.check_entry(make_entry("https://a.com/api")))
+
+    def test_filter_scopes(self):
+        matcher = EntryMatcher("host:API.a.com|method:post|method:PUT")
+        self.assertIsNone(
+            matcher.check_entry(make_entry("https://api.a.com/x", "POST")))
+        self.assertIsNone(
+            matcher.check_entry(make_entry("https://api.a.com/x", "PUT")))
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://api.a.com/x", "GET")), FILTERED)
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://www.a.com/x", "POST")), FILTERED)
+        # method rules match whole method
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://api.a.com/x", "POSTX")), FILTERED)
+
+    def test_path_and_mime_rules(self):
+        matcher = EntryMatcher(exclude_str="mime:image/|path:re:\\.(?:js\\|css)$")
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://a.com/a.png", mime_type="image/png")),
+            EXCLUDED)
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://a.com/app.css?v=1")), EXCLUDED)
+        self.assertIsNone(
+            matcher.check_entry(make_entry("https://a.com/css/list")))
+
+    def test_status_rules(self):
+        matcher = EntryMatcher(exclude_str="status:0|status:re:^[45]")
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://a.com/", status=0)), EXCLUDED)
+        self.assertEqual(
+            matcher.check_entry(make_entry("https://a.com/", status=503)), EXCLUDED)
+        self.assertIsNone(
+            matcher.check_entry(make_entry("https://a.com/", status=304)))
+        self.assertIsNone(
+            matcher.check_entry(make_entry("https://a.com/", status=200)))
+
+    def test_missing_fields(self):
+        matcher = EntryMatcher("host:a.com", "method:GET")
+        self.assertEqual(matcher.check_entry({"request": {}}), FILTERED)
+        self.assertEqual(matcher.check_entry({}), FILTERED)
+
+        matcher = EntryMatcher(exclude_str="host:a.com|mime:image")
+        self.assertIsNone(matcher.check_entry({"request": {"url": None}}))
+        self.assertIsNone(matcher.check_entry({"request": {"url": "http://[::1"}}))
@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import yaml
+
+from har2case import codec, exceptions, merge
+from har2case.core import HarParser
+
+
+class TestMerge(unittest.TestCase):
+
+    def setUp(self):
+        data_dir = os.path.join(os.path.dirname(__file__), "data")
+        with io.open(os.path.join(data_dir, "demo-quickstart.har"), encoding="utf-8") as f:
+            # get-token, create user
+            self.token_entry, self.user_entry = json.load(f)["log"]["entries"]
+        with io.open(os.path.join(data_dir, "demo.har"), encoding="utf-8") as f:
+            self.login_entry = json.load(f)["log"]["entries"][0]
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.suite_dir = os.path.join(self.tmp_dir, "suite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_har_file(self, file_name, entries):
+        har_path = os.path.join(self.tmp_dir, file_name)
+        if not os.path.isdir(os.path.dirname(har_path)):
+            os.makedirs(os.path.dirname(har_path))
+        with io.open(har_path, "w", encoding="utf-8") as f:
+            f.write(codec.dumps({"log": {"entries": entries}}))
+        return har_path
+
+    def load_suite_file(self, path):
+        with io.open(os.path.join(self.suite_dir, path), encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_merge_common_prefix(self):
+        har_files = [
+            self.create_har_file("a.har", [self.token_entry, self.user_entry, self.login_entry]),
+            self.create_har_file("b.har", [self.token_entry, self.login_entry]),
+            self.create_har_file("c.har", [self.token_entry, self.user_entry])
+        ]
+        testsuite_file, failures = merge.merge_har_files(har_files, self.suite_dir)
+        self.assertEqual(failures, [])
+        self.assertEqual(testsuite_file, os.path.join(self.suite_dir, "testsuite.json"))
+        self.assertEqual(sorted(os.listdir(self.suite_dir)), ["testcases", "testsuite.json"])
+
+        testsuite = self.load_suite_file("testsuite.json")
+        self.assertEqual(testsuite["testcases"], {
+            "a": {"testcase": "testcases/a.json"},
+            "b": {"testcase": "testcases/b.json"},
+            "c": {"testcase": "testcases/c.json"}
+        })
+
+        token_step, user_step, login_step = HarParser(har_files[0]).iter_teststeps()
+        common = self.load_suite_file("testcases/common.json")
+        self.assertEqual(common[1:], [{"test": token_step}])
+
+        common_step = {"test": {"name": "common teststeps", "testcase": "testcases/common.json"}}
+        self.assertEqual(
+            self.load_suite_file("testcases/a.json")[1:],
+            [common_step, {"test": user_step}, {"test": login_step}])
+        self.assertEqual(
+            self.load_suite_file("testcases/b.json")[1:], [common_step, {"test": login_step}])
+        self.assertEqual(
+            self.load_suite_file("testcases/c.json")[1:], [common_step, {"test": user_step}])
+
+    def test_merge_v2(self):
+        har_files = [
+            self.create_har_file("b.har", [self.token_entry, self.login_entry]),
+            self.create_har_file("a.har", [self.token_entry, self.user_entry])
+        ]
+        merge.merge_har_files(har_files, self.suite_dir, "YAML", "v2")
+
+        with io.open(os.path.join(self.suite_dir, "testsuite.yaml"), encoding="utf-8") as f:
+            testsuite = yaml.safe_load(f)
+        self.assertEqual(testsuite["testcases"], [
+            {"name": "b", "testcase": "testcases/b.yaml"},
+            {"name": "a", "testcase": "testcases/a.yaml"}
+        ])
+
+        token_step, user_step = HarParser(har_files[1]).iter_teststeps()
+        with io.open(os.path.join(self.suite_dir, "testcases", "a.yaml"), encoding="utf-8") as f:
+            testcase = yaml.safe_load(f)
+        self.assertEqual(testcase["config"]["name"], "a")
+        self.assertEqual(testcase["teststeps"], [
+            {"name": "common teststeps", "testcase": "testcases/common.yaml"},
+            user_step
+        ])
+
+    def test_merge_without_common_prefix(self):
+        har_files = [
+            self.create_har_file("a.har", [self.token_entry]),
+            self.create_har_file(os.path.join("b", "a.har"), [self.login_entry]),
+        ]
+        merge.merge_har_files(har_files, self.suite_dir, fmt_version="v2")
+
+        self.assertFalse(os.path.exists(os.path.join(self.suite_dir, "testcases", "common.json")))
+        testsuite = self.load_suite_file("testsuite.json")
+        # testcases of v2 testsuite are listed in order of HAR files
+        self.assertEqual(testsuite["testcases"], [
+            {"name": "a", "testcase": "testcases/a.json"},
+            {"name": "a_2", "testcase": "testcases/a_2.json"}
+        ])
+        testcase = self.load_suite_file("testcases/a_2.json")
+        self.assertEqual(testcase["config"]["name"], "a_2")
+        self.assertEqual(testcase["teststeps"], list(HarParser(har_files[1]).iter_teststeps()))
+
+    def test_merge_failures(self):
+        har_files = [
+            self.create_har_file("broken.har", [{"request": {}}]),
+            self.create_har_file("a.har", [self.token_entry, self.user_entry]),
+            self.create_har_file("b.har", [self.token_entry, self.user_entry])
+        ]
+        _, failures = merge.merge_har_files(har_files, self.suite_dir, max_prefix_steps=1)
+        self.assertEqual([har_file for har_file, _ in failures], [har_files[0]])
+
+        testsuite = self.load_suite_file("testsuite.json")
+        self.assertEqual(sorted(testsuite["testcases"]), ["a", "b"])
+        # only max_prefix_steps teststeps are hoisted
+        self.assertEqual(len(self.load_suite_file("testcases/common.json")), 2)
+        self.assertEqual(len(self.load_suite_file("testcases/a.json")), 3)
+
+        with self.assertRaises(exceptions.ParamsError):
+            merge.merge_har_files(har_files, self.suite_dir, incremental=True)
+
+        with self.assertRaises(exceptions.ParamsError):
+            merge.merge_har_files(har_files, self.suite_dir, correlate=True)
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+import base64
+import collections
+import io
+import json
+import os
+import unittest
+
+from har2case import exceptions, reader, utils
+
+
+class TestReader(unittest.TestCase):
+
+    def setUp(self):
+        self.har_path = os.path.join(
+            os.path.dirname(__file__), "data", "demo.har")
+        self.har_file_path = os.path.join(
+            os.path.dirname(__file__), "data", "reader_tmp.har")
+
+    def tearDown(self):
+        if os.path.isfile(self.har_file_path):
+            os.remove(self.har_file_path)
+
+    def create_har_file(self, content):
+        with io.open(self.har_file_path, "wb") as f:
+            f.write(content)
+
+    def test_iter_har_log_entries(self):
+        log_entries = list(reader.iter_har_log_entries(self.har_path))
+        self.assertEqual(log_entries, utils.load_har_log_entries(self.har_path))
+
+    def test_iter_har_log_entries_small_chunks(self):
+        for chunk_size in [1, 2, 3, 7, 64]:
+            log_entries = list(
+                reader.iter_har_log_entries(self.har_path, chunk_size=chunk_size))
+            self.assertEqual(log_entries, utils.load_har_log_entries(self.har_path))
+
+    def test_iter_har_log_entries_tricky_strings(self):
+        entries = [
+            {"request": {"url": u"http://a.b/{[\"]}\\"}, "response": {"content": {}}},
+            {"request": {"url": u"http://a.b/中文"}, "response": {}},
+            {}
+        ]
+        content = {
+            "log": {
+                "version": "1.2",
+                "pages": [{"title": "]}", "id": 1}],
+                "entries": entries,
+                "comment": "ignored"
+            }
+        }
+        self.create_har_file(b"\xef\xbb\xbf" + json.dumps(content).encode("utf-8"))
+        for chunk_size in [1, 5, 1024]:
+            self.assertEqual(
+                list(reader.iter_har_log_entries(self.har_file_path, chunk_size)),
+                entries
+            )
+
+    def test_iter_har_log_entries_empty(self):
+        self.create_har_file(b'{"log": {"entries": []}}')
+        self.assertEqual(list(reader.iter_har_log_entries(self.har_file_path)), [])
+
+    def test_iter_har_log_entries_error(self):
+        for content in [b"", b'""', b"{}", b'{"log": {}}', b'{"log": {"entries": [{"a": 1']:
+            self.create_har_file(content)
+            with self.assertRaises(exceptions.FileFormatError):
+                list(reader.iter_har_log_entries(self.har_file_path))
+
+    def test_iter_har_log_entries_skip_entry(self):
+        entries = [
+            {"request": {"url": "http://a.b/keep/1"}, "response": {"status": 200}},
+            {"request": {"url": "http://a.b/drop"}, "response": {"content": {"text": "x"}}},
+            {"request": {"url": "http://a.b/keep/2"}}
+        ]
+        self.create_har_file(json.dumps({"log": {"entries": entries}}).encode("utf-8"))
+
+        def skip_entry(entry_json):
+            entries_checked.append(entry_json)
+            return "drop" in entry_json["request"]["url"]
+
+        for chunk_size in [1, 7, 1024]:
+            entries_checked = []
+            self.assertEqual(
+                list(reader.iter_har_log_entries(self.har_file_path, chunk_size, skip_entry)),
+                [entries[0], entries[2]]
+            )
+            # small entries are decoded as a whole before checked
+            self.assertEqual(entries_checked[:2], entries[:2])
+
+    def test_iter_har_log_entries_skip_large_entry(self):
+        entries = [
+            {
+                "startedDateTime": "2019",
+                "request": {
+                    "method": "GET",
+                    "headers": [{"name": "a", "value": "[{\"}"}],
+                    "url": u"http://a.b/keep/中文"
+                },
+                "response": {
+                    "content": {"text": "\\\\\\\"]}" * 50, "mimeType": "text/html"},
+                    "status": 200
+                }
+            },
+            {
+                "request": {"url": "http://a.b/drop", "postData": {"text": "a" * 1000}},
+                "response": {"content": {"text": "x" * 1000}, "status": 404}
+            },
+            {"request": [], "response": None},
+            {}
+        ]
+        self.create_har_file(json.dumps({"log": {"entries": entries}}, indent=2).encode("utf-8"))
+
+        def skip_entry(entry_fields):
+            entries_fields.append(entry_fields)
+            return "drop" in entry_fields.get("request", {}).get("url", "")
+
+        max_size = reader._MAX_DECODED_SKIPPED_ENTRY_SIZE
+        reader._MAX_DECODED_SKIPPED_ENTRY_SIZE = 0
+        try:
+            for chunk_size in [1, 7, 1024]:
+                entries_fields = []
+                self.assertEqual(
+                    list(reader.iter_har_log_entries(self.har_file_path, chunk_size, skip_entry)),
+                    [entries[0], entries[2], entries[3]]
+                )
+                self.assertEqual(entries_fields, [
+                    {
+                        "request": {"method": "GET", "url": u"http://a.b/keep/中文"},
+                        "response": {"content": {"mimeType": "text/html"}, "status": 200}
+                    },
+                    {
+                        "request": {"url": "http://a.b/drop", "postData": {}},
+                        "response": {"content": {}, "status": 404}
+                    },
+                    {},
+                    {}
+                ])
+        finally:
+            reader._MAX_DECODED_SKIPPED_ENTRY_SIZE = max_size
+
+    def test_iter_har_log_entries_skip_entry_error(self):
+        self.create_har_file(b'{"log": {"entries": [{"request": {"url": "a'
+                             b'"}, "response": {"content": {"text": "abc')
+        with self.assertRaises(exceptions.FileFormatError):
+            list(reader.iter_har_log_entries(self.har_file_path, skip_entry=lambda e: True))
+
+    def test_iter_har_log_entries_skip_entry_numbers(self):
+        # numbers are cut off by chunk ends right after ".", "e" or a sign
+        statuses = [-1500.5, 1e-20, 1e+20, 10]
+        entries = [{"response": {"status": status}} for status in statuses]
+        self.create_har_file(json.dumps({"log": {"entries": entries}}).encode("utf-8"))
+
+        def skip_entry(entry_fields):
+            skipped_statuses.append(entry_fields["response"]["status"])
+            return True
+
+        max_size = reader._MAX_DECODED_SKIPPED_ENTRY_SIZE
+        reader._MAX_DECODED_SKIPPED_ENTRY_SIZE = 0
+        try:
+            for chunk_size in [1, 2, 3, 1024]:
+                skipped_statuses = []
+                self.assertEqual(
+                    list(reader.iter_har_log_entries(self.har_file_path, chunk_size, skip_entry)),
+                    []
+                )
+                self.assertEqual(skipped_statuses, statuses)
+        finally:
+            reader._MAX_DECODED_SKIPPED_ENTRY_SIZE = max_size
+
+    def test_scan_object_scalars(self):
+        documents = [
+            u'{"a": 1, "b": {"c": [1, {"d": "]}\\""}]}, "e": "中文\\"}", "f": [],'
+            u' "a": {"g": 1}, "h": null, "i": true, "j": -1.5e3}',
+            u'[1, 2]',
+            u'"text"',
+            u' {} '
+        ]
+        for document in documents:
+            # scalars are scanned in document order, dicts are unordered on Python 2
+            expected = json.loads(document, object_pairs_hook=collections.OrderedDict)
+            if isinstance(expected, dict):
+                expected = [
+                    (key, value)
+                    for key, value in expected.items()
+                    if not isinstance(value, (dict, list))
+                ]
+            else:
+                expected = None
+
+            base64_text = base64.b64encode(document.encode("utf-8")).decode("ascii")
+            for chunk_size in [1, 3, 1024]:
+                self.assertEqual(
+                    reader.scan_object_scalars(reader.TextReader(document), chunk_size),
+                    expected
+                )
+                self.assertEqual(
+                    reader.scan_object_scalars(reader.Base64Reader(base64_text), chunk_size),
+                    expected
+                )
+
+    def test_scan_object_scalars_error(self):
+        for document in [u'', u'{"a": 1', u'{"a": [1, {}', u'{"a": 1}x', u'{"a": 1.}']:
+            with self.assertRaises(ValueError):
+                reader.scan_object_scalars(reader.TextReader(document), 4)
@@ -0,0 +1,69 @@
+import io
+import json
+import os
+import sys
+import unittest
+
+from har2case.api import convert
+
+if sys.version_info >= (3, 7):
+    from tests import service_coroutines
+
+
+def post(target, body):
+    return (
+        "POST {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\n\r\n".format(
+            target, len(body)).encode("latin-1") + body
+    )
+
+
+@unittest.skipUnless(sys.version_info >= (3, 7), "asyncio service needs Python 3.7+")
+class TestService(unittest.TestCase):
+
+    def setUp(self):
+        self.har_path = os.path.join(
+            os.path.dirname(__file__), "data", "demo.har")
+        with io.open(self.har_path, "rb") as f:
+            self.har_content = f.read()
+
+    def test_aconvert(self):
+        testcase, yaml_testcase, json_testcase = service_coroutines.run_with_service(
+            service_coroutines.aconvert_sources, self.har_content, self.har_path,
+            max_pending=1
+        )
+        self.assertEqual(testcase, convert(self.har_content, fmt_version="v2"))
+
+        expected_yaml_testcase = io.StringIO()
+        convert(self.har_content, expected_yaml_testcase, "YAML")
+        self.assertEqual(yaml_testcase, expected_yaml_testcase.getvalue())
+        self.assertEqual(len(json.loads(json_testcase)), 1)
+
+    def test_aconvert_errors(self):
+        testcase = service_coroutines.run_with_service(
+            service_coroutines.aconvert_errors, self, self.har_content)
+        self.assertEqual(testcase, convert(self.har_content))
+
+    def test_aconvert_timeout(self):
+        har_json = json.loads(self.har_content.decode("utf-8"))
+        har_json["log"]["entries"] *= 20000
+        har_content = json.dumps(har_json).encode("utf-8")
+
+        service_coroutines.run_with_service(
+            service_coroutines.aconvert_timeout, self, har_content, timeout=0.05)
+
+    def test_http_server(self):
+        responses = service_coroutines.run_with_service(
+            service_coroutines.request_server, [
+                post("/convert?fmt_version=v2", self.har_content),
+                post("/convert?format=xml", self.har_content),
+                post("/convert", b"{}"),
+                post("/other", self.har_content),
+                b"GET /convert HTTP/1.1\r\n\r\n"
+            ]
+        )
+        self.assertEqual(responses[0][0], 200)
+        self.assertEqual(
+            json.loads(responses[0][1].decode("utf-8")),
+            convert(self.har_content, fmt_version="v2")
+        )
+        self.assertEqual([status for status, _ in responses[1:]], [400, 400, 404, 405])
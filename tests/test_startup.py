@@ -0,0 +1,124 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that har2case -V and JSON conversions must not import
+HEAVY_MODULES = ["yaml", "multiprocessing", "sqlite3", "ctypes", "asyncio"]
+
+# har2case modules imported with har2case.cli, others are imported by commands
+# which need them
+CLI_MODULES = [
+    "har2case", "har2case.__about__", "har2case.cli", "har2case.codec",
+    "har2case.compat", "har2case.compression", "har2case.exceptions",
+    "har2case.headers"
+]
+
+# cumulative import time of har2case.cli in microseconds, beyond the standard
+# library modules any command line tool imports. It is about 8ms, the budget
+# leaves room for slow and shared CI hosts.
+CLI_IMPORT_TIME_BUDGET = 32 * 1000
+
+# import time is the minimum of runs, which is the least disturbed by other processes
+CLI_IMPORT_TIME_RUNS = 7
+
+# standard library modules of any command line tool are imported first
+CLI_IMPORT_CODE = "import argparse, glob, json, logging, re\nimport har2case.cli"
+
+
+def run_python(code, *args):
+    """ run code in a new interpreter with interpreter args, return (stdout, stderr).
+    """
+    env = dict(os.environ)
+    # startup is measured with bytecode cached, as in installed packages
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    process = subprocess.Popen(
+        [sys.executable] + list(args) + ["-c", code],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise AssertionError(stderr.decode("utf-8"))
+    return stdout.decode("utf-8"), stderr.decode("utf-8")
+
+
+def get_imported_modules(code):
+    stdout, _ = run_python(
+        code + "\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))")
+    return set(json.loads(stdout.splitlines()[-1]))
+
+
+# lazy module attributes of har2case package need PEP 562
+@unittest.skipUnless(sys.version_info >= (3, 7), "lazy imports need Python 3.7+")
+class TestStartup(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.har_path = os.path.join(self.tmp_dir, "demo.har")
+        shutil.copy(os.path.join(ROOT_DIR, "tests", "data", "demo.har"), self.har_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_cli(self, *args):
+        code = (
+            "import sys\n"
+            "from har2case.cli import main\n"
+            "sys.argv = ['har2case'] + {!r}\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+        ).format(list(args))
+        return get_imported_modules(code)
+
+    def assertNotImported(self, modules, names):
+        self.assertEqual([name for name in names if name in modules], [])
+
+    def test_version(self):
+        modules = self.run_cli("-V")
+        self.assertNotImported(modules, HEAVY_MODULES + ["har2case.core", "har2case.api"])
+
+    def test_json_conversion(self):
+        modules = self.run_cli(self.har_path)
+        self.assertIn("har2case.core", modules)
+        self.assertNotImported(modules, HEAVY_MODULES)
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir, "demo.json")))
+
+        modules = self.run_cli(self.har_path, "-2y")
+        self.assertIn("yaml", modules)
+
+    def test_library_import(self):
+        modules = get_imported_modules("import har2case")
+        self.assertNotImported(modules, HEAVY_MODULES + ["har2case.core"])
+
+        modules = get_imported_modules("import har2case\nhar2case.convert")
+        self.assertIn("har2case.api", modules)
+        self.assertNotImported(modules, HEAVY_MODULES)
+
+    def test_cli_imports(self):
+        # check the modules imported beyond the standard library modules of any
+        # command line tool
+        modules = get_imported_modules(CLI_IMPORT_CODE)
+        self.assertLessEqual(
+            set(name for name in modules if name.split(".")[0] == "har2case"),
+            set(CLI_MODULES)
+        )
+        self.assertNotImported(modules, HEAVY_MODULES)
+
+    def test_cli_import_time(self):
+        import_times = []
+        for _ in range(CLI_IMPORT_TIME_RUNS):
+            _, stderr = run_python(CLI_IMPORT_CODE, "-X", "importtime")
+            for line in stderr.splitlines():
+                fields = line.split("|")
+                if len(fields) == 3 and fields[2].strip() == "har2case.cli":
+                    import_times.append(int(fields[1]))
+
+        self.assertEqual(len(import_times), CLI_IMPORT_TIME_RUNS)
+        self.assertLess(min(import_times), CLI_IMPORT_TIME_BUDGET)
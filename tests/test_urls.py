@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from har2case import urls
+
+
+class TestUrls(unittest.TestCase):
+
+    def test_parse_url(self):
+        parts = urls.parse_url("https://HttpRunner.top/api/v1;v=2?a=1#top")
+        self.assertEqual(parts.host, "httprunner.top")
+        self.assertEqual(parts.path, "/api/v1;v=2")
+        self.assertEqual(parts.name, "/api/v1")
+        self.assertEqual(parts.base_url, "https://HttpRunner.top/api/v1;v=2#top")
+        self.assertIs(urls.parse_url("https://HttpRunner.top/api/v1;v=2?a=1#top"), parts)
+
+        parts = urls.parse_url(u"https://httprunner.top/中文;v=2?a=1")
+        self.assertEqual(parts.path, u"/中文;v=2")
+        self.assertEqual(parts.name, u"/中文")
+
+        self.assertEqual(urls.parse_url("/relative").host, "")
+        with self.assertRaises(ValueError):
+            urls.parse_url("http://[::1/")
+
+    def test_parse_url_cache_bounded(self):
+        cache_size = urls.URL_CACHE_SIZE
+        urls.URL_CACHE_SIZE = 2
+        try:
+            for index in range(5):
+                urls.parse_url("https://httprunner.top/{}".format(index))
+                self.assertLessEqual(len(urls._url_cache), 2)
+        finally:
+            urls.URL_CACHE_SIZE = cache_size
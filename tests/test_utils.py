@@ -1,8 +1,13 @@
+# -*- coding: utf-8 -*-
+import io
 import json
 import os
+import random
 import unittest
 
-from har2case import utils
+import yaml
+from har2case import exceptions, utils
+from har2case.core import HarParser
 
 
 class TestUtils(unittest.TestCase):
@@ -35,11 +40,11 @@ class TestUtils(unittest.TestCase):
         self.assertIn("response", log_entries[0])
 
     def test_load_har_log_key_error(self):
-        with self.assertRaises(SystemExit):
+        with self.assertRaises(exceptions.FileFormatError):
             utils.load_har_log_entries(self.empty_json_file_path)
 
     def test_load_har_log_empty_error(self):
-        with self.assertRaises(SystemExit):
+        with self.assertRaises(exceptions.FileFormatError):
             utils.load_har_log_entries(self.empty_file_path)
 
     # def test_x_www_form_urlencoded(self):
@@ -57,9 +62,55 @@ class TestUtils(unittest.TestCase):
             {"v": "1", "w": "2"}
         )
 
+    def test_convert_list_to_dict_repeated_names(self):
+        origin_list = [
+            {"name": "v", "value": "1"},
+            {"name": "w", "value": "2"},
+            {"name": "w", "value": "3"},
+            {"name": "w", "value": "4"}
+        ]
+        self.assertEqual(
+            utils.convert_list_to_dict(origin_list),
+            {"v": "1", "w": ["2", "3", "4"]}
+        )
+
     def test_convert_x_www_form_urlencoded_to_dict(self):
         origin_str = "a=1&b=2"
         converted_dict = utils.convert_x_www_form_urlencoded_to_dict(origin_str)
         self.assertIsInstance(converted_dict, dict)
         self.assertEqual(converted_dict["a"], "1")
         self.assertEqual(converted_dict["b"], "2")
+
+    def test_convert_x_www_form_urlencoded_to_dict_repeated_names(self):
+        self.assertEqual(
+            utils.convert_x_www_form_urlencoded_to_dict("a=1&b=2&b=3&b=%2F"),
+            {"a": "1", "b": ["2", "3", "/"]}
+        )
+
+    @unittest.skipUnless(utils.get_yaml_dumpers()[1], "PyYAML is built without LibYAML")
+    def test_yaml_dump_emitters_parity(self):
+        def dump(obj, dumper):
+            # LibYAML emitter needs streams with encoding on Python 2
+            stream = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+            yaml.dump(obj, stream, Dumper=dumper,
+                      allow_unicode=True, default_flow_style=False, indent=4)
+            stream.flush()
+            return stream.buffer.getvalue().decode("utf-8")
+
+        def yaml_dump(obj):
+            stream = io.StringIO()
+            utils.yaml_dump(obj, stream)
+            return stream.getvalue()
+
+        fast_dumper = utils.get_yaml_dumpers()[1]
+        testcase = HarParser(self.har_path)._make_testcase("v1")
+        self.assertIs(utils.get_yaml_dumper(testcase), fast_dumper)
+        self.assertEqual(dump(testcase, fast_dumper), dump(testcase, yaml.SafeDumper))
+
+        rand = random.Random(1)
+        chars = u" \t\n\r\x00\x85\xa0\ufeff\u2028:#-'\"{}[]!&*|>%@`,?" \
+            u"abcxyzABC0123éñü中文测试😀"
+        for _ in range(500):
+            value = u"".join(rand.choice(chars) for _ in range(rand.randint(0, 200)))
+            obj = [{"name": value, "request": {"data": [value, {value: 1}]}}]
+            self.assertEqual(yaml_dump(obj), dump(obj, yaml.SafeDumper))
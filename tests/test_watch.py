@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from har2case import watch
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = os.path.join(os.path.dirname(__file__), "data")
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def drop_har(self, filename):
+        har_path = os.path.join(self.tmp_dir, filename)
+        shutil.copy(os.path.join(self.data_dir, "demo.har"), har_path)
+        return har_path
+
+    def run_steps(self, converter, count=20):
+        results = []
+        for _ in range(count):
+            results.extend(converter.step(0.05))
+            if results and not converter.pending and not converter.running:
+                break
+        return results
+
+    def check_convert(self, use_inotify):
+        converter = watch.SpoolConverter(
+            self.tmp_dir, workers=1, settle_time=0, use_inotify=use_inotify)
+        try:
+            har_path = self.drop_har("demo.har")
+            results = self.run_steps(converter)
+            self.assertEqual(results, [(har_path, os.path.join(self.tmp_dir, "demo.json"), None)])
+
+            # output and unchanged HAR files are not converted again
+            self.assertEqual(self.run_steps(converter, 3), [])
+
+            with open(os.path.join(self.tmp_dir, "malformed.har"), "w") as f:
+                f.write('{"log": {"entries": [')
+            results = self.run_steps(converter)
+            self.assertEqual(len(results), 1)
+            self.assertIsNotNone(results[0][2])
+        finally:
+            converter.close()
+
+    def test_convert_polling(self):
+        self.check_convert(False)
+
+    def test_convert_inotify(self):
+        converter = watch.SpoolConverter(self.tmp_dir, workers=1)
+        converter.close()
+        if not isinstance(converter.watcher, watch.InotifyWatcher):
+            self.skipTest("inotify is not available")
+
+        self.check_convert(None)
+
+    def test_settle_time(self):
+        converter = watch.SpoolConverter(
+            self.tmp_dir, workers=1, settle_time=60, use_inotify=False)
+        try:
+            har_path = self.drop_har("demo.har")
+            self.assertEqual(converter.step(0), [])
+            self.assertIn(har_path, converter.pending)
+
+            # settled
+            signature, _ = converter.pending[har_path]
+            converter.pending[har_path] = (signature, time.time() - 60)
+            results = converter.step(0)
+            self.assertEqual(len(results), 1)
+            self.assertIsNone(results[0][2])
+        finally:
+            converter.close()
+
+    def test_skip_converted(self):
+        har_path = self.drop_har("demo.har")
+        self.drop_har("new.har")
+        with open(os.path.join(self.tmp_dir, "demo.json"), "w") as f:
+            f.write("[]")
+
+        converter = watch.SpoolConverter(
+            self.tmp_dir, workers=1, settle_time=0, use_inotify=False)
+        try:
+            converter.skip_converted()
+            self.assertIn(har_path, converter.converted)
+            converter.scan()
+            self.assertEqual(list(converter.pending), [os.path.join(self.tmp_dir, "new.har")])
+        finally:
+            converter.close()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import unittest
+
+import yaml
+from har2case import writers
+from har2case.compat import ensure_ascii, is_py2
+from har2case.core import HarParser
+
+
+class TestWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.har_paths = [
+            os.path.join(os.path.dirname(__file__), "data", "demo.har"),
+            os.path.join(os.path.dirname(__file__), "data", "demo-quickstart.har")
+        ]
+
+    def write_testcase(self, file_type, fmt_version, config, teststeps):
+        outfile = io.StringIO()
+        writer = writers.make_testcase_writer(file_type, outfile, fmt_version)
+        writer.write_config(config)
+        for teststep in teststeps:
+            writer.write_teststep(teststep)
+        writer.close()
+        return outfile.getvalue()
+
+    def assert_same_as_dump(self, fmt_version, teststeps):
+        config = HarParser(self.har_paths[0])._prepare_config()
+        if fmt_version == "v1":
+            testcase = [{"config": config}] + [{"test": step} for step in teststeps]
+        else:
+            testcase = {"config": config, "teststeps": teststeps}
+
+        json_testcase = self.write_testcase("JSON", fmt_version, config, teststeps)
+        if is_py2:
+            # dict order and item separators of json.dumps differ on Python 2
+            self.assertEqual(json.loads(json_testcase), testcase)
+        else:
+            self.assertEqual(
+                json_testcase, json.dumps(testcase, ensure_ascii=ensure_ascii, indent=4))
+        self.assertEqual(
+            self.write_testcase("YAML", fmt_version, config, teststeps),
+            yaml.safe_dump(
+                testcase, encoding=None,
+                allow_unicode=True, default_flow_style=False, indent=4)
+        )
+
+    def test_writers_same_as_dump(self):
+        for har_path in self.har_paths:
+            teststeps = HarParser(har_path)._prepare_teststeps("v2")
+            for fmt_version in ["v1", "v2"]:
+                self.assert_same_as_dump(fmt_version, teststeps)
+
+    def test_writers_no_teststeps(self):
+        for fmt_version in ["v1", "v2"]:
+            self.assert_same_as_dump(fmt_version, [])
+
+    def test_writers_unicode(self):
+        teststeps = [{"name": u"/中文", "request": {"data": u"a\nb"}, "validate": []}]
+        for fmt_version in ["v1", "v2"]:
+            self.assert_same_as_dump(fmt_version, teststeps)